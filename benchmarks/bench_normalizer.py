@@ -0,0 +1,80 @@
+"""
+Benchmark: normalize_text vs CompiledNormalizer.
+
+    python benchmarks/bench_normalizer.py --mb 100
+
+Builds a synthetic Latin text of the given size (with ligatures, u/v, i/j,
+accented vowels and brackets), checks that both normalizers return the same
+string and prints the timings.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from count_corpus_vocabula.normalizer import CompiledNormalizer, normalize_text  # noqa: E402
+
+WORDS = [
+    "Vita", "Iulius", "æternus", "Cæsar", "cœlum", "jus", "vinum", "Iesus",
+    "ánima", "dóminus", "fīlius", "rēx", "(cap.", "12)", "“Œdipus”", "est",
+    "et", "in", "ad", "quod", "Deus", "virtus", "iuventus", "[sic]",
+    "non", "cum", "sed", "enim", "autem", "ergo", "sicut", "quia", "omnis",
+    "esse", "habet", "dicitur", "ratio", "natura", "causa", "substantia",
+    "accidens", "forma", "materia", "motus", "intellectus", "voluntas",
+]
+
+CFG = {
+    "normalization": {
+        "casefold": False,
+        "map_u_v": True,
+        "map_i_j": True,
+        "strip_diacritics": True,
+        "normalize_ligatures": True,
+        "unicode_nf": "NFC",
+    }
+}
+
+
+def make_text(n_chars: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    line = " ".join(rnd.choice(WORDS) for _ in range(2000)) + ".\n"
+    reps = n_chars // len(line) + 1
+    return (line * reps)[:n_chars]
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mb", type=float, default=100.0, help="text size in MB (characters / 1e6)")
+    args = ap.parse_args(argv)
+
+    text = make_text(int(args.mb * 1_000_000))
+    print(f"text: {len(text):,} chars")
+
+    t0 = time.perf_counter()
+    expected = normalize_text(text, CFG)
+    t_ref = time.perf_counter() - t0
+    print(f"normalize_text:         {t_ref:8.2f} s")
+
+    t0 = time.perf_counter()
+    norm = CompiledNormalizer(CFG)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    got = norm(text)
+    t_comp = time.perf_counter() - t0
+    print(f"CompiledNormalizer:     {t_comp:8.2f} s  (+ {t_build:.2f} s one-time build)")
+
+    if got != expected:
+        print("MISMATCH: outputs differ")
+        return 1
+    print(f"outputs identical; speed-up x{t_ref / t_comp:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
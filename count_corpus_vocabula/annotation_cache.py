@@ -0,0 +1,560 @@
+from __future__ import annotations
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .lemma_cache import (
+    CACHE_VERSION,
+    _annotation_file_path,
+    _make_cache_key,
+    _sha256_text,
+    atomic_write_bytes,
+    hash_file_content,
+)
+
+# bump when the annotation payload layout changes
+ANNOTATION_VERSION = 3
+
+# (surface, lemma, upos, start_char)
+Token = Tuple[str, Optional[str], str, Optional[int]]
+
+
+# ---------------------------------------------------------------------------
+# Annotation hash
+# ---------------------------------------------------------------------------
+
+def build_annotation_hash(
+    *,
+    stanza_model: str,
+    lang: str,
+    processors: str,
+    ref_tags_file: Optional[Path] = None,
+    include_ref_tags_in_config_hash: bool = True,
+    extra: Optional[Mapping[str, Any]] = None,
+) -> str:
+    """
+    Settings hash of the annotation tier.
+
+    Only what changes the text given to the pipeline or the pipeline itself
+    goes in here; count-time filters (use_lemma, upos_targets, min length,
+    roman numerals) do not, so changing them reuses the annotations.
+    """
+    d: dict[str, Any] = {
+        "cache_version": CACHE_VERSION,
+        "annotation_version": ANNOTATION_VERSION,
+        "stanza_model": stanza_model,
+        "lang": lang,
+        "processors": processors,
+    }
+
+    # regex-mode ref tags are stripped before NLP and change its input
+    if include_ref_tags_in_config_hash:
+        if ref_tags_file is None:
+            d["ref_tags"] = None
+        else:
+            d["ref_tags_file"] = str(ref_tags_file.resolve())
+            d["ref_tags_hash"] = hash_file_content(ref_tags_file) if ref_tags_file.exists() else "MISSING"
+
+    if extra:
+        d["extra"] = {str(k): extra[k] for k in sorted(extra.keys(), key=lambda x: str(x))}
+
+    s = json.dumps(d, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return _sha256_text(s)
+
+
+# ---------------------------------------------------------------------------
+# Replayed documents
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ReplayWord:
+    text: str
+    lemma: Optional[str]
+    upos: str
+    start_char: Optional[int] = None
+
+
+@dataclass
+class ReplaySentence:
+    words: List[ReplayWord]
+
+    @property
+    def tokens(self) -> List[ReplayWord]:
+        return self.words
+
+    @property
+    def text(self) -> str:
+        return " ".join(w.text for w in self.words)
+
+
+@dataclass
+class ReplayDoc:
+    sentences: List[ReplaySentence]
+
+
+@dataclass
+class SplitText:
+    """Sentence splitter result as the text it was joined into (one sentence per line)."""
+    text: str
+
+
+# ---------------------------------------------------------------------------
+# Payload (columnar)
+# ---------------------------------------------------------------------------
+#
+# One object per file; one row per token, in pipeline call order.
+# Strings (surface, lemma, upos) are dictionary-encoded into one string
+# table and every column is a flat array:
+#
+#   split_crc[i]    CRC-32 of the text given to sentence splitter call i
+#   split_len[i]    UTF-8 byte length of the joined text it produced
+#   doc_crc[d]      CRC-32 of the text of pipeline call d
+#   doc_start[d]    index of the first sentence of call d (n_docs + 1 entries)
+#   sent_start[s]   index of the first token of sentence s (n_sentences + 1)
+#   surface[t], lemma[t], upos[t]   string ids (lemma -1 when missing)
+#   start_char[t]   char offset within the call's text (-1 when missing)
+#
+# header (little-endian): magic, format version, flags, CACHE_VERSION,
+#   n_splits, n_docs, n_sentences, n_tokens, n_strings, byte length of the
+#   string table, byte length of the split texts
+# body (zlib-compressed as a whole when FLAG_ZLIB is set):
+#   string table (UTF-8, NUL-joined), split texts (UTF-8, concatenated),
+#   then the columns above in that order
+
+_ANN_MAGIC = b"CCVA"
+_ANN_FLAG_ZLIB = 1
+_ANN_HEADER = struct.Struct("<4sBBHIIIIIII")
+_ANN_COLUMNS = (
+    ("split_crc", "I"),
+    ("split_len", "I"),
+    ("doc_crc", "I"),
+    ("doc_start", "I"),
+    ("sent_start", "I"),
+    ("surface", "i"),
+    ("lemma", "i"),
+    ("upos", "i"),
+    ("start_char", "q"),
+)
+
+
+class AnnotationPayload:
+    """
+    Every pipeline call made while counting one file, stored column-wise.
+
+    Tokens are appended with add_doc() while the pipeline runs; doc(i)
+    rebuilds call i as a document for replay, and type_counts() / recount()
+    aggregate over the id columns without building any token objects.
+    Sentence splitter calls are kept as the text they were joined into
+    (add_split), so a replay does not need the splitter either.
+    """
+
+    def __init__(self) -> None:
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.splits: List[str] = []
+        self.split_crc = array("I")
+        self.split_len = array("I")
+        self.doc_crc = array("I")
+        self.doc_start = array("I", [0])
+        self.sent_start = array("I", [0])
+        self.surface = array("i")
+        self.lemma = array("i")
+        self.upos = array("i")
+        self.start_char = array("q")
+
+    @property
+    def n_splits(self) -> int:
+        return len(self.split_crc)
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_crc)
+
+    @property
+    def n_sentences(self) -> int:
+        return len(self.sent_start) - 1
+
+    @property
+    def n_tokens(self) -> int:
+        return len(self.surface)
+
+    def _intern(self, s: str) -> int:
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    def add_split(self, crc: int, text: str) -> None:
+        self.splits.append(text)
+        self.split_crc.append(crc & 0xFFFFFFFF)
+        self.split_len.append(len(text.encode("utf-8")))
+
+    def add_doc(self, crc: int, sentences: Iterable[Iterable[Token]]) -> None:
+        intern = self._intern
+        for sent in sentences:
+            for surface, lemma, upos, start in sent:
+                self.surface.append(intern(surface))
+                self.lemma.append(-1 if lemma is None else intern(lemma))
+                self.upos.append(intern(upos))
+                self.start_char.append(-1 if start is None else start)
+            self.sent_start.append(len(self.surface))
+        self.doc_crc.append(crc & 0xFFFFFFFF)
+        self.doc_start.append(self.n_sentences)
+
+    def doc(self, d: int) -> ReplayDoc:
+        strings = self.strings
+        sentences = []
+        for s in range(self.doc_start[d], self.doc_start[d + 1]):
+            words = []
+            for t in range(self.sent_start[s], self.sent_start[s + 1]):
+                lemma, start = self.lemma[t], self.start_char[t]
+                words.append(ReplayWord(
+                    strings[self.surface[t]],
+                    None if lemma < 0 else strings[lemma],
+                    strings[self.upos[t]],
+                    None if start < 0 else start,
+                ))
+            sentences.append(ReplaySentence(words=words))
+        return ReplayDoc(sentences=sentences)
+
+    def key_column(self, *, use_lemma: bool) -> array:
+        """String id of each token's key; a missing lemma falls back to the surface."""
+        if not use_lemma:
+            return self.surface
+        if -1 not in self.lemma:
+            return self.lemma
+        return array("i", [s if l < 0 else l for l, s in zip(self.lemma, self.surface)])
+
+    def type_counts(self, *, use_lemma: bool = True) -> Counter:
+        """Token count per (key, upos), keys as stored (not lowercased)."""
+        strings = self.strings
+        pairs = Counter(zip(self.key_column(use_lemma=use_lemma), self.upos))
+        return Counter({(strings[k], strings[u]): n for (k, u), n in pairs.items()})
+
+    def to_bytes(self, *, compress: bool = True) -> bytes:
+        if any("\0" in s for s in self.strings):
+            raise ValueError("annotation strings must not contain NUL")
+        blob = "\0".join(self.strings).encode("utf-8")
+        split_blob = "".join(self.splits).encode("utf-8")
+        parts = [blob, split_blob]
+        for name, _code in _ANN_COLUMNS:
+            col = getattr(self, name)
+            if sys.byteorder != "little":
+                col = array(col.typecode, col)
+                col.byteswap()
+            parts.append(col.tobytes())
+        body = b"".join(parts)
+        flags = 0
+        if compress:
+            body = zlib.compress(body, 6)
+            flags |= _ANN_FLAG_ZLIB
+        header = _ANN_HEADER.pack(
+            _ANN_MAGIC,
+            ANNOTATION_VERSION,
+            flags,
+            CACHE_VERSION,
+            self.n_splits,
+            self.n_docs,
+            self.n_sentences,
+            self.n_tokens,
+            len(self.strings),
+            len(blob),
+            len(split_blob),
+        )
+        return header + body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "AnnotationPayload":
+        if len(data) < _ANN_HEADER.size:
+            raise ValueError("annotation payload too short")
+        (
+            magic, fmt, flags, cache_ver, n_splits, n_docs, n_sent, n_tok, n_str, blob_len, split_blob_len,
+        ) = _ANN_HEADER.unpack_from(data)
+        if magic != _ANN_MAGIC:
+            raise ValueError("not an annotation payload")
+        if fmt != ANNOTATION_VERSION:
+            raise ValueError(f"annotation format mismatch: {fmt} != {ANNOTATION_VERSION}")
+        if cache_ver != CACHE_VERSION:
+            raise ValueError(f"cache version mismatch: {cache_ver} != {CACHE_VERSION}")
+
+        body = memoryview(data)[_ANN_HEADER.size:]
+        if flags & _ANN_FLAG_ZLIB:
+            body = memoryview(zlib.decompress(body))
+
+        out = cls()
+        out.strings = str(body[:blob_len], "utf-8").split("\0") if n_str else []
+        if len(out.strings) != n_str:
+            raise ValueError("annotation string table mismatch")
+        out._ids = {s: i for i, s in enumerate(out.strings)}
+
+        lengths = {
+            "split_crc": n_splits,
+            "split_len": n_splits,
+            "doc_crc": n_docs,
+            "doc_start": n_docs + 1,
+            "sent_start": n_sent + 1,
+            "surface": n_tok,
+            "lemma": n_tok,
+            "upos": n_tok,
+            "start_char": n_tok,
+        }
+        split_blob = body[blob_len:blob_len + split_blob_len]
+        pos = blob_len + split_blob_len
+        for name, code in _ANN_COLUMNS:
+            col = array(code)
+            end = pos + col.itemsize * lengths[name]
+            if end > len(body):
+                raise ValueError("annotation payload size mismatch")
+            col.frombytes(body[pos:end])
+            if sys.byteorder != "little":
+                col.byteswap()
+            setattr(out, name, col)
+            pos = end
+        if pos != len(body) or sum(out.split_len) != split_blob_len:
+            raise ValueError("annotation payload size mismatch")
+
+        start = 0
+        for n in out.split_len:
+            out.splits.append(str(split_blob[start:start + n], "utf-8"))
+            start += n
+        return out
+
+
+def recount(
+    payloads: Iterable[AnnotationPayload],
+    *,
+    use_lemma: bool = True,
+    upos_targets: Iterable[str] = ("NOUN",),
+) -> Counter:
+    """
+    Key counts of the tokens whose UPOS is in `upos_targets`, summed over
+    `payloads`. Keys are lowercased and a missing lemma falls back to the
+    surface, as in count_nouns_streaming. Tokens are aggregated by id; strings
+    are looked up once per distinct (key, upos) of each payload.
+    """
+    targets = {str(u).strip().upper() for u in upos_targets}
+    total: Counter = Counter()
+    for payload in payloads:
+        strings = payload.strings
+        pairs = Counter(zip(payload.key_column(use_lemma=use_lemma), payload.upos))
+        for (k, u), n in pairs.items():
+            if strings[u] in targets:
+                total[strings[k].lower()] += n
+    return total
+
+
+def _text_crc(text: str) -> int:
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def _sentence_words(sent: Any) -> List[Any]:
+    # stanza: words carry upos/lemma; otherwise tokens, which may in turn
+    # hold several words (multi-word tokens)
+    words = getattr(sent, "words", None)
+    if words:
+        return list(words)
+    out: List[Any] = []
+    for tok in getattr(sent, "tokens", None) or []:
+        sub = getattr(tok, "words", None)
+        if sub:
+            out.extend(sub)
+        else:
+            out.append(tok)
+    return out
+
+
+def _doc_tokens(doc: Any) -> Iterator[List[Token]]:
+    """(surface, lemma, upos, start_char) per word of a pipeline result."""
+    for sent in getattr(doc, "sentences", None) or []:
+        row: List[Token] = []
+        for w in _sentence_words(sent):
+            start = getattr(w, "start_char", None)
+            row.append((
+                str(getattr(w, "text", "") or ""),
+                getattr(w, "lemma", None),
+                str(getattr(w, "upos", "") or ""),
+                int(start) if start is not None else None,
+            ))
+        yield row
+
+
+# ---------------------------------------------------------------------------
+# Recording / replaying pipelines
+# ---------------------------------------------------------------------------
+
+class RecordingNLP:
+    """
+    Wraps a pipeline and appends everything it returns to `payload` as the
+    pipeline runs. bulk_process is only offered when the wrapped pipeline has
+    it, so batched counting takes the same path as without the wrapper.
+    """
+
+    def __init__(self, nlp: Any):
+        self._nlp = nlp
+        self.payload = AnnotationPayload()
+        if callable(getattr(nlp, "bulk_process", None)):
+            self.bulk_process = self._bulk_process
+
+    def __call__(self, text: str) -> Any:
+        doc = self._nlp(text)
+        self.payload.add_doc(_text_crc(text), _doc_tokens(doc))
+        return doc
+
+    def _bulk_process(self, docs: Iterable[Any]) -> List[Any]:
+        docs = list(docs)
+        out = list(self._nlp.bulk_process(docs))
+        for src, doc in zip(docs, out):
+            text = str(getattr(src, "text", "") or "")
+            self.payload.add_doc(_text_crc(text), _doc_tokens(doc))
+        return out
+
+
+class ReplayNLP:
+    """
+    Hands out recorded documents in call order instead of running the pipeline.
+
+    As soon as a call does not match the recording (different text, or more
+    calls than were recorded) the replay is marked `diverged` and that call
+    and all later ones go to the real pipeline, so counts stay correct.
+    Like RecordingNLP, bulk_process is offered when the wrapped pipeline has
+    it; each document of a batch counts as one call.
+    """
+
+    def __init__(self, payload: AnnotationPayload, nlp: Any):
+        self._payload = payload
+        self._nlp = nlp
+        self._next = 0
+        self.diverged = False
+        if callable(getattr(nlp, "bulk_process", None)):
+            self.bulk_process = self._bulk_process
+
+    def _replay(self, text: str) -> Optional[ReplayDoc]:
+        p = self._payload
+        if not self.diverged and self._next < p.n_docs and p.doc_crc[self._next] == _text_crc(text):
+            self._next += 1
+            return p.doc(self._next - 1)
+        self.diverged = True
+        return None
+
+    def __call__(self, text: str) -> Any:
+        doc = self._replay(text)
+        return doc if doc is not None else self._nlp(text)
+
+    def _bulk_process(self, docs: Iterable[Any]) -> List[Any]:
+        docs = list(docs)
+        out: List[Any] = []
+        for i, src in enumerate(docs):
+            doc = self._replay(str(getattr(src, "text", "") or ""))
+            if doc is None:
+                out.extend(self._nlp.bulk_process(docs[i:]))
+                break
+            out.append(doc)
+        return out
+
+    @property
+    def complete(self) -> bool:
+        """Every recorded document was used and nothing else was asked for."""
+        return not self.diverged and self._next == self._payload.n_docs
+
+
+class RecordingSplitter:
+    """
+    Wraps a sentence splitter: `join` turns its result into the text handed
+    on (one sentence per line), which is recorded in `payload` and returned
+    as a SplitText.
+    """
+
+    def __init__(self, splitter: Any, payload: AnnotationPayload, join: Callable[[Any], str]):
+        self._splitter = splitter
+        self._join = join
+        self.payload = payload
+
+    def __call__(self, text: str) -> SplitText:
+        joined = self._join(self._splitter(text))
+        self.payload.add_split(_text_crc(text), joined)
+        return SplitText(joined)
+
+
+class ReplaySplitter:
+    """
+    Hands out recorded splitter results in call order; diverges to the real
+    splitter like ReplayNLP does.
+    """
+
+    def __init__(self, payload: AnnotationPayload, splitter: Any, join: Callable[[Any], str]):
+        self._payload = payload
+        self._splitter = splitter
+        self._join = join
+        self._next = 0
+        self.diverged = False
+
+    def __call__(self, text: str) -> SplitText:
+        p = self._payload
+        if not self.diverged and self._next < p.n_splits and p.split_crc[self._next] == _text_crc(text):
+            self._next += 1
+            return SplitText(p.splits[self._next - 1])
+        self.diverged = True
+        return SplitText(self._join(self._splitter(text)))
+
+    @property
+    def complete(self) -> bool:
+        return not self.diverged and self._next == self._payload.n_splits
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+class AnnotationStore:
+    """
+    Annotation tier: annotations/<xx>/<key>.ann under the lemma cache dir, one
+    columnar AnnotationPayload per (file content, annotation settings).
+    """
+
+    def __init__(self, cache_dir: Path, *, annotation_hash: str, verbose: bool = False):
+        self.cache_dir = cache_dir
+        self.root = cache_dir / "annotations"
+        self.annotation_hash = annotation_hash
+        self.verbose = verbose
+
+    def key(self, content_hash: str) -> str:
+        return _make_cache_key(content_hash, self.annotation_hash)
+
+    def _path(self, key: str) -> Path:
+        return _annotation_file_path(self.cache_dir, key)
+
+    def get(self, content_hash: str) -> Optional[AnnotationPayload]:
+        path = self._path(self.key(content_hash))
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            return AnnotationPayload.from_bytes(data)
+        except Exception as e:
+            if self.verbose:
+                print(f"[CACHE] broken annotation ignored: {path} ({e})")
+            return None
+
+    def contains(self, content_hash: str) -> bool:
+        """Whether an annotation is stored (without reading or validating it)."""
+        return self._path(self.key(content_hash)).exists()
+
+    def get_files(self, paths: Iterable[Path]) -> Iterator[Tuple[Path, Optional[AnnotationPayload]]]:
+        """(path, annotation or None) for each input file, hashing its content."""
+        for path in paths:
+            yield path, self.get(hash_file_content(path))
+
+    def put(self, content_hash: str, payload: AnnotationPayload) -> int:
+        """Write the annotation; returns its size in bytes."""
+        data = payload.to_bytes()
+        atomic_write_bytes(self._path(self.key(content_hash)), data)
+        return len(data)
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .annotation_cache import AnnotationPayload, AnnotationStore
+from .lemma_cache import _connect_sqlite_wal
+
+# bump when the index schema changes (the index is then rebuilt)
+INDEX_VERSION = 1
+
+KINDS = ("lemma", "surface")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    annotation_key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS file_groups (
+    grp TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    PRIMARY KEY (grp, file_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sentences (
+    file_id INTEGER NOT NULL,
+    sent INTEGER NOT NULL,
+    tokens TEXT NOT NULL,
+    PRIMARY KEY (file_id, sent)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    term TEXT NOT NULL,
+    UNIQUE (kind, term)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    sent INTEGER NOT NULL,
+    pos INTEGER NOT NULL,
+    offset INTEGER,
+    upos TEXT NOT NULL,
+    PRIMARY KEY (term_id, file_id, sent, pos)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id);
+"""
+
+# tokens of a sentence are stored joined by TAB
+_SEP = "\t"
+
+
+@dataclass
+class ConcordanceReport:
+    files_indexed: int = 0
+    files_reused: int = 0
+    files_removed: int = 0
+    # input files without a stored annotation (counted before annotation_tier was on)
+    files_missing: int = 0
+
+
+@dataclass(frozen=True)
+class KwicLine:
+    path: str
+    sentence: int
+    # char offset of the keyword within the text of its pipeline call
+    offset: Optional[int]
+    upos: str
+    left: str
+    keyword: str
+    right: str
+
+
+def _open(index_path: Path) -> sqlite3.Connection:
+    conn = _connect_sqlite_wal(index_path, timeout_sec=30.0)
+    row = None
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    except sqlite3.OperationalError:
+        pass
+    if row is not None and row[0] != str(INDEX_VERSION):
+        conn.executescript(
+            "DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS terms;"
+            " DROP TABLE IF EXISTS sentences; DROP TABLE IF EXISTS file_groups;"
+            " DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS meta;"
+        )
+    conn.executescript(_SCHEMA)
+    conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+    return conn
+
+
+def _delete_file(conn: sqlite3.Connection, file_id: int) -> None:
+    for table in ("postings", "sentences", "file_groups"):
+        conn.execute(f"DELETE FROM {table} WHERE file_id = ?", (file_id,))
+    conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+
+class _TermIds:
+    """term id per (kind, term), new terms inserted on first use."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._ids: Dict[Tuple[str, str], int] = {
+            (kind, term): i for i, kind, term in conn.execute("SELECT id, kind, term FROM terms")
+        }
+
+    def get(self, kind: str, term: str) -> int:
+        i = self._ids.get((kind, term))
+        if i is None:
+            cur = self._conn.execute("INSERT INTO terms (kind, term) VALUES (?, ?)", (kind, term))
+            i = self._ids[(kind, term)] = int(cur.lastrowid)
+        return i
+
+
+def _index_payload(conn: sqlite3.Connection, terms: _TermIds, file_id: int, payload: AnnotationPayload) -> None:
+    strings = payload.strings
+    lemma_col = payload.key_column(use_lemma=True)
+    # term ids are resolved once per distinct string, then mapped per token
+    lemma_term = {i: terms.get("lemma", strings[i].lower()) for i in set(lemma_col)}
+    surface_term = {i: terms.get("surface", strings[i].lower()) for i in set(payload.surface)}
+    lemma_ids = [lemma_term[i] for i in lemma_col]
+    surface_ids = [surface_term[i] for i in payload.surface]
+    upos = [strings[i] for i in payload.upos]
+    offsets = [None if o < 0 else o for o in payload.start_char]
+
+    sentences = []
+    postings = []
+    starts = payload.sent_start
+    for sent in range(payload.n_sentences):
+        lo, hi = starts[sent], starts[sent + 1]
+        sentences.append((file_id, sent, _SEP.join(strings[i] for i in payload.surface[lo:hi])))
+        for t in range(lo, hi):
+            postings.append((lemma_ids[t], file_id, sent, t - lo, offsets[t], upos[t]))
+            postings.append((surface_ids[t], file_id, sent, t - lo, offsets[t], upos[t]))
+
+    conn.executemany("INSERT INTO sentences VALUES (?, ?, ?)", sentences)
+    # in primary key order: appends to the B-tree instead of random inserts
+    postings.sort()
+    conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?, ?, ?)", postings)
+
+
+def build_concordance(
+    index_path: Path,
+    *,
+    store: AnnotationStore,
+    content_hashes: Mapping[Path, str],
+    file_groups: Mapping[Path, Sequence[str]],
+) -> ConcordanceReport:
+    """
+    Build or update the inverted index at `index_path` from stored annotations.
+
+    Postings map lowercased lemmas and surfaces to (file, sentence, position,
+    offset, upos); the tokens of every sentence are kept for context. Files
+    whose annotation is unchanged since the last build are kept as they are,
+    files that are no longer inputs are dropped.
+    """
+    report = ConcordanceReport()
+    conn = _open(index_path)
+    try:
+        conn.execute("BEGIN")
+        existing = {
+            path: (file_id, key)
+            for file_id, path, key in conn.execute("SELECT id, path, annotation_key FROM files")
+        }
+        wanted = {str(p): p for p in content_hashes}
+
+        for path, (file_id, _key) in existing.items():
+            if path not in wanted:
+                _delete_file(conn, file_id)
+                report.files_removed += 1
+
+        terms = _TermIds(conn)
+        conn.execute("DELETE FROM file_groups")
+        for spath, path in wanted.items():
+            content_hash = content_hashes[path]
+            key = store.key(content_hash)
+            old = existing.get(spath)
+            if old is not None and old[1] == key:
+                file_id = old[0]
+                report.files_reused += 1
+            else:
+                payload = store.get(content_hash)
+                if old is not None:
+                    _delete_file(conn, old[0])
+                if payload is None:
+                    report.files_missing += 1
+                    continue
+                cur = conn.execute("INSERT INTO files (path, annotation_key) VALUES (?, ?)", (spath, key))
+                file_id = int(cur.lastrowid)
+                _index_payload(conn, terms, file_id, payload)
+                report.files_indexed += 1
+            conn.executemany(
+                "INSERT OR IGNORE INTO file_groups VALUES (?, ?)",
+                [(g, file_id) for g in file_groups.get(path, ())],
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return report
+
+
+def query_concordance(
+    index_path: Path,
+    term: str,
+    *,
+    kind: str = "lemma",
+    upos: Optional[str] = None,
+    group: Optional[str] = None,
+    context: int = 5,
+    limit: Optional[int] = 100,
+) -> List[KwicLine]:
+    """
+    Keyword-in-context lines for `term` (matched lowercased), with up to
+    `context` tokens of the same sentence on each side.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}: {kind!r}")
+    if not index_path.exists():
+        raise FileNotFoundError(f"concordance index not found: {index_path}")
+
+    sql = (
+        "SELECT f.path, p.sent, p.pos, p.offset, p.upos, s.tokens"
+        " FROM terms t"
+        " JOIN postings p ON p.term_id = t.id"
+        " JOIN files f ON f.id = p.file_id"
+        " JOIN sentences s ON s.file_id = p.file_id AND s.sent = p.sent"
+        " WHERE t.kind = ? AND t.term = ?"
+    )
+    args: list = [kind, term.strip().lower()]
+    if upos:
+        sql += " AND p.upos = ?"
+        args.append(upos.strip().upper())
+    if group is not None:
+        sql += " AND p.file_id IN (SELECT file_id FROM file_groups WHERE grp = ?)"
+        args.append(group)
+    sql += " ORDER BY f.path, p.sent, p.pos"
+    if limit is not None:
+        sql += " LIMIT ?"
+        args.append(int(limit))
+
+    conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(sql, args).fetchall()
+    finally:
+        conn.close()
+
+    out: List[KwicLine] = []
+    for path, sent, pos, offset, tag, tokens in rows:
+        toks = tokens.split(_SEP)
+        out.append(KwicLine(
+            path=path,
+            sentence=sent,
+            offset=offset,
+            upos=tag,
+            left=" ".join(toks[max(0, pos - context):pos]),
+            keyword=toks[pos],
+            right=" ".join(toks[pos + 1:pos + 1 + context]),
+        ))
+    return out
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="python -m count_corpus_vocabula.concordance",
+        description="Keyword-in-context lines from a concordance index (TSV: path, sentence, upos, left, keyword, right).",
+    )
+    ap.add_argument("index", type=Path, help="concordance.sqlite written by a run with concordance.enabled")
+    ap.add_argument("term")
+    ap.add_argument("--surface", action="store_true", help="match surface forms instead of lemmas")
+    ap.add_argument("--upos", default=None)
+    ap.add_argument("--group", default=None)
+    ap.add_argument("--context", type=int, default=5)
+    ap.add_argument("--limit", type=int, default=100, help="0 = no limit")
+    args = ap.parse_args(list(argv) if argv is not None else None)
+
+    lines = query_concordance(
+        args.index,
+        args.term,
+        kind="surface" if args.surface else "lemma",
+        upos=args.upos,
+        group=args.group,
+        context=args.context,
+        limit=args.limit or None,
+    )
+    for ln in lines:
+        sys.stdout.write(f"{ln.path}\t{ln.sentence}\t{ln.upos}\t{ln.left}\t{ln.keyword}\t{ln.right}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
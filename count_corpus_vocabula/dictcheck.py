@@ -3,10 +3,12 @@ import re
 import string
 import csv
 from pathlib import Path
-from typing import Iterable, Set, Tuple
+from typing import FrozenSet, Iterable, Tuple
 
 from nlpo_toolkit.nlp import load_vocab, normalize_token
 
+from .wordlist_index import load_wordlist_index
+
 _STRIP_RE = re.compile(
     rf"^[{re.escape(string.punctuation)}“”‘’«»…—–\-­]+|"
     rf"[{re.escape(string.punctuation)}“”‘’«»…—–\-­]+$"
@@ -20,6 +22,38 @@ def _dictcheck_key(s: str, *, normalize: bool) -> str:
         return ""
     return t
 
+def _dictcheck_vocab_keys(wordlist_path: Path, *, normalize: bool) -> Iterable[str]:
+    for w in load_vocab(wordlist_path):
+        k = _dictcheck_key(w, normalize=normalize)
+        if k:
+            yield k
+
+def _nlpo_toolkit_version() -> str:
+    # normalize_token lives in nlpo_toolkit; its version is part of the index key
+    try:
+        from importlib.metadata import version
+        return version("nlpo_toolkit")
+    except Exception:
+        return "unknown"
+
+def load_dictcheck_vocab(
+    wordlist_path: Path,
+    *,
+    normalize: bool = True,
+    index_dir: Path | None = None,
+) -> FrozenSet[str]:
+    """
+    Dictcheck keys of every wordlist entry. With index_dir, the keys are
+    computed once per (wordlist content, normalize flag) and loaded from a
+    precompiled index afterwards.
+    """
+    return load_wordlist_index(
+        wordlist_path,
+        index_dir=index_dir,
+        variant=f"dictcheck-normalize={int(normalize)}-nlpo={_nlpo_toolkit_version()}",
+        build_keys=lambda p: _dictcheck_vocab_keys(p, normalize=normalize),
+    )
+
 def load_lemma_normalize_map(path: Path) -> dict[str, str]:
     m: dict[str, str] = {}
     for line in path.read_text(encoding="utf-8").splitlines():
@@ -43,10 +77,12 @@ def split_frequency_csv(
     lemma_col: str = "lemma",
     count_col: str = "count",
     normalize: bool = True,
-    normalize_map_path: Path | None = None
+    normalize_map_path: Path | None = None,
+    index_dir: Path | None = None,
 ) -> Tuple[int, int]:
     """
     Split noun_frequency CSV into known/unknown by checking membership in a wordlist.
+    index_dir: keep a precompiled wordlist index there (see load_dictcheck_vocab).
 
     Returns: (known_rows, unknown_rows)
     """
@@ -54,12 +90,7 @@ def split_frequency_csv(
     if normalize_map_path is not None:
         lemma_map = load_lemma_normalize_map(normalize_map_path)
 
-    raw_vocab: Set[str] = load_vocab(wordlist_path)
-    vocab: Set[str] = set()
-    for w in raw_vocab:
-        k = _dictcheck_key(w, normalize=normalize)
-        if k:
-            vocab.add(k)
+    vocab = load_dictcheck_vocab(wordlist_path, normalize=normalize, index_dir=index_dir)
 
     known_rows: list[dict] = []
     unknown_rows: list[dict] = []
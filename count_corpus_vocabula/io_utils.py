@@ -1,6 +1,6 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List
 from collections import Counter
 import csv, glob, sys
 
@@ -19,6 +19,69 @@ def read_concat(paths: List[Path]) -> str:
             print(f"[WARN] failed to read {p}: {e}", file=sys.stderr)
     return "\n".join(chunks)
 
+def _split_long_line(line: str, max_chars: int) -> Iterator[str]:
+    # last resort for a single line longer than max_chars: cut at whitespace
+    while len(line) > max_chars:
+        cut = line.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        yield line[:cut]
+        line = line[cut:]
+    if line:
+        yield line
+
+
+def _iter_line_chunks(lines: Iterable[str], max_chars: int) -> Iterator[str]:
+    if max_chars <= 0:
+        raise ValueError("max_chars must be > 0")
+
+    buf: List[str] = []
+    size = 0
+    para_end = 0  # index into buf just after the last blank line
+
+    for line in lines:
+        if len(line) > max_chars:
+            if buf:
+                yield "".join(buf)
+                buf, size, para_end = [], 0, 0
+            yield from _split_long_line(line, max_chars)
+            continue
+
+        buf.append(line)
+        size += len(line)
+        if not line.strip():
+            para_end = len(buf)
+
+        if size >= max_chars:
+            cut = para_end or len(buf)
+            yield "".join(buf[:cut])
+            buf = buf[cut:]
+            size = sum(len(x) for x in buf)
+            para_end = 0
+
+    if buf:
+        yield "".join(buf)
+
+
+def iter_text_chunks(path: Path, *, max_chars: int = 200_000, encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Stream a text file as chunks of roughly max_chars characters.
+
+    Chunks end at a paragraph boundary (blank line) when one is available,
+    otherwise at a line boundary, so no sentence is cut in the middle unless
+    a single paragraph is longer than max_chars. Only about one chunk is held
+    in memory at a time.
+    """
+    with path.open("r", encoding=encoding) as f:
+        yield from _iter_line_chunks(f, max_chars)
+
+
+def split_text_chunks(text: str, *, max_chars: int = 200_000) -> Iterator[str]:
+    """
+    Same chunking as iter_text_chunks, for text that is already in memory.
+    """
+    return _iter_line_chunks(text.splitlines(keepends=True), max_chars)
+
 def save_counter_csv(path: Path, cnt: Counter):
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("w", encoding="utf-8", newline="") as f:
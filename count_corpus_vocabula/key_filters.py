@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Optional
+
+# classical numerals, plus the medieval final j (viij = 8)
+_ROMAN_RE = re.compile(r"m{0,4}(cm|cd|d?c{0,3})(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})", re.IGNORECASE)
+
+
+def is_roman_numeral(key: str) -> bool:
+    k = key.lower()
+    if k.endswith("j"):
+        k = k[:-1] + "i"
+    return bool(k) and _ROMAN_RE.fullmatch(k) is not None
+
+
+def load_key_list(path: Path) -> FrozenSet[str]:
+    """One key per line, lowercased; blank lines and # comments skipped."""
+    items = set()
+    for line in path.read_text(encoding="utf-8").splitlines():
+        s = line.strip()
+        if s and not s.startswith("#"):
+            items.add(s.lower())
+    return frozenset(items)
+
+
+@dataclass
+class KeyFilterReport:
+    removed_types: int = 0
+    removed_tokens: int = 0
+
+
+@dataclass
+class KeyFilter:
+    """
+    Filters applied to counted keys instead of tokens (filters.stage=post).
+
+    Each distinct key is judged once and the decision is memoized, so the
+    cost depends on the number of types, not tokens, and the same instance
+    can be applied to every group of a run.
+    """
+    min_token_length: int = 0
+    drop_roman_numerals: bool = False
+    roman_exceptions: FrozenSet[str] = frozenset()
+    exclude: FrozenSet[str] = frozenset()
+    report: KeyFilterReport = field(default_factory=KeyFilterReport)
+    _keep: Dict[str, bool] = field(default_factory=dict, repr=False)
+
+    @property
+    def active(self) -> bool:
+        return self.min_token_length > 0 or self.drop_roman_numerals or bool(self.exclude)
+
+    def keeps(self, key: str) -> bool:
+        keep = self._keep.get(key)
+        if keep is None:
+            low = key.lower()
+            keep = not (
+                len(key) < self.min_token_length
+                or low in self.exclude
+                or (self.drop_roman_numerals and low not in self.roman_exceptions and is_roman_numeral(low))
+            )
+            self._keep[key] = keep
+        return keep
+
+    def apply(self, counts: Counter) -> Counter:
+        if not self.active:
+            return counts
+        keeps = self.keeps
+        out = Counter()
+        for k, n in counts.items():
+            if keeps(k):
+                out[k] = n
+            else:
+                self.report.removed_types += 1
+                self.report.removed_tokens += n
+        return out
+
+
+def build_key_filter(
+    *,
+    min_token_length: int = 0,
+    drop_roman_numerals: bool = False,
+    roman_exceptions_file: Optional[Path] = None,
+    exclude_file: Optional[Path] = None,
+    exclude: Iterable[str] = (),
+) -> KeyFilter:
+    roman_exceptions: FrozenSet[str] = frozenset()
+    if drop_roman_numerals and roman_exceptions_file is not None and roman_exceptions_file.exists():
+        roman_exceptions = load_key_list(roman_exceptions_file)
+    ex = {str(x).strip().lower() for x in exclude if str(x).strip()}
+    if exclude_file is not None:
+        ex |= load_key_list(exclude_file)
+    return KeyFilter(
+        min_token_length=int(min_token_length),
+        drop_roman_numerals=bool(drop_roman_numerals),
+        roman_exceptions=roman_exceptions,
+        exclude=frozenset(ex),
+    )
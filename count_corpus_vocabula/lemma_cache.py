@@ -3,13 +3,26 @@ from __future__ import annotations
 import hashlib
 import json
 import os
+import sqlite3
+import struct
+import sys
 import tempfile
+import threading
 import time
-from dataclasses import dataclass
+import zlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields, replace
 from pathlib import Path
-from typing import Any, Callable, Mapping, Optional
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
 
-from collections import Counter
+from collections import Counter, OrderedDict, deque
+from itertools import islice
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover (Windows)
+    fcntl = None  # type: ignore[assignment]
 
 
 CACHE_VERSION = 4  # bump when payload schema/behavior changes
@@ -56,6 +69,47 @@ def atomic_write_text(path: Path, text: str) -> None:
     os.replace(str(tmp), str(path))
 
 
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """
+    Binary counterpart of atomic_write_text.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile("wb", delete=False, dir=str(path.parent)) as tf:
+        tf.write(data)
+        tf.flush()
+        os.fsync(tf.fileno())
+        tmp = Path(tf.name)
+    os.replace(str(tmp), str(path))
+
+
+def _connect_sqlite_wal(db_path: Path, *, timeout_sec: float) -> sqlite3.Connection:
+    """
+    Open a cache database in WAL mode (explicit BEGIN/COMMIT, usable across
+    threads). Switching a new database to WAL can fail with "database is
+    locked" without going through the busy timeout when several processes
+    create it at once, so that step is retried until timeout_sec.
+    """
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        str(db_path),
+        timeout=timeout_sec,
+        isolation_level=None,
+        check_same_thread=False,
+    )
+    deadline = time.monotonic() + timeout_sec
+    while True:
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            break
+        except sqlite3.OperationalError:
+            if time.monotonic() >= deadline:
+                conn.close()
+                raise
+            time.sleep(0.05)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
 def _safe_int(x: Any, default: int = 0) -> int:
     try:
         return int(x)
@@ -103,6 +157,8 @@ class ContentHashManifest:
         if self.key_mode == "relative" and self.project_root is None:
             raise ValueError("manifest key_mode='relative' requires project_root")
         self._data: dict[str, dict[str, Any]] = {}
+        # entries put since the last save_merged(), by path key
+        self._dirty: dict[str, dict[str, Any]] = {}
 
     def _meta(self) -> dict[str, Any]:
         return {
@@ -122,19 +178,20 @@ class ContentHashManifest:
             # fallback if outside project_root
             return str(p)
 
-    def load(self) -> None:
+    def _read_disk(self) -> dict[str, Any]:
         if not self.manifest_path.exists():
-            self._data = {"__meta__": self._meta()}
-            return
+            return {"__meta__": self._meta()}
         try:
             raw = json.loads(self.manifest_path.read_text(encoding="utf-8"))
             if not isinstance(raw, dict):
-                self._data = {"__meta__": self._meta()}
-                return
+                return {"__meta__": self._meta()}
             raw["__meta__"] = self._meta()
-            self._data = raw
+            return raw
         except Exception:
-            self._data = {"__meta__": self._meta()}
+            return {"__meta__": self._meta()}
+
+    def load(self) -> None:
+        self._data = self._read_disk()
 
     def save(self) -> None:
         atomic_write_text(
@@ -158,11 +215,265 @@ class ContentHashManifest:
 
     def put(self, path: Path, entry: ManifestEntry) -> None:
         key = self._path_key(path)
-        self._data[key] = {
+        raw = {
             "size": int(entry.size),
             "mtime_ns": int(entry.mtime_ns),
             "content_hash": str(entry.content_hash),
         }
+        self._data[key] = raw
+        self._dirty[key] = raw
+
+    @property
+    def dirty_count(self) -> int:
+        return len(self._dirty)
+
+    def take_dirty(self) -> dict[str, dict[str, Any]]:
+        """
+        Hand over the pending entries (e.g. from a worker process to the
+        process that owns the flush). They are no longer written by this
+        manifest.
+        """
+        out, self._dirty = self._dirty, {}
+        return out
+
+    def put_raw(self, entries: Mapping[str, Mapping[str, Any]]) -> None:
+        """Apply entries obtained from take_dirty() of another manifest."""
+        for key, raw in entries.items():
+            self._data[key] = dict(raw)
+            self._dirty[key] = dict(raw)
+
+    def content_hashes(self) -> set[str]:
+        """Content hashes of every entry on disk and pending."""
+        out = {
+            str(v["content_hash"])
+            for k, v in self._read_disk().items()
+            if k != "__meta__" and isinstance(v, dict) and "content_hash" in v
+        }
+        out.update(str(v["content_hash"]) for v in self._dirty.values())
+        return out
+
+    def save_merged(self, *, lock_timeout_sec: float = 300.0) -> None:
+        """
+        Write pending entries without losing entries written concurrently by
+        other processes: under a manifest lock, re-read the file, apply only
+        our own updates and write the result back.
+        """
+        if not self._dirty:
+            return
+        lock_path = self.manifest_path.with_name(self.manifest_path.name + ".lock")
+        with CacheLock(lock_path, timeout_sec=lock_timeout_sec):
+            merged = self._read_disk()
+            merged.update(self._dirty)
+            self._data = merged
+            self.save()
+        self._dirty = {}
+
+
+class SqliteContentHashManifest(ContentHashManifest):
+    """
+    ContentHashManifest stored in SQLite (WAL mode) instead of one JSON file.
+
+    Same get/put and key-mode semantics; lookups hit the primary key index and
+    pending entries are written with one bulk upsert, so neither cost grows
+    with the size of the whole manifest. SQLite's own locking makes concurrent
+    writers safe. On first open, entries of `migrate_from` (a JSON manifest)
+    are imported.
+    """
+
+    def __init__(
+        self,
+        manifest_path: Path,
+        *,
+        key_mode: str = "absolute",
+        project_root: Optional[Path] = None,
+        migrate_from: Optional[Path] = None,
+        timeout_sec: float = 300.0,
+    ):
+        super().__init__(manifest_path, key_mode=key_mode, project_root=project_root)
+        self.migrate_from = migrate_from
+        self.timeout_sec = timeout_sec
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = _connect_sqlite_wal(self.manifest_path, timeout_sec=self.timeout_sec)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " path_key TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " content_hash TEXT NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _upsert(self, conn: sqlite3.Connection, entries: Mapping[str, Mapping[str, Any]]) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO entries (path_key, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)",
+            [
+                (k, int(v["size"]), int(v["mtime_ns"]), str(v["content_hash"]))
+                for k, v in entries.items()
+            ],
+        )
+
+    def _migrate_json(self, conn: sqlite3.Connection) -> None:
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_from'").fetchone():
+            return
+        entries: dict[str, dict[str, Any]] = {}
+        if self.migrate_from is not None and self.migrate_from.exists():
+            legacy = ContentHashManifest(
+                self.migrate_from, key_mode=self.key_mode, project_root=self.project_root
+            )
+            for k, v in legacy._read_disk().items():
+                if k != "__meta__" and isinstance(v, dict) and {"size", "mtime_ns", "content_hash"} <= v.keys():
+                    entries[k] = v
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # entries already in the database win over the legacy file
+            conn.executemany(
+                "INSERT OR IGNORE INTO entries (path_key, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)",
+                [(k, int(v["size"]), int(v["mtime_ns"]), str(v["content_hash"])) for k, v in entries.items()],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from', ?)",
+                (str(self.migrate_from) if entries else "",),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def load(self) -> None:
+        with self._conn_lock:
+            conn = self._connect()
+            self._migrate_json(conn)
+            meta = self._meta()
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('manifest', ?)",
+                (json.dumps(meta, sort_keys=True),),
+            )
+        self._data = {"__meta__": meta}
+
+    def get(self, path: Path) -> Optional[ManifestEntry]:
+        key = self._path_key(path)
+        raw = self._data.get(key)
+        if isinstance(raw, dict):
+            return super().get(path)
+        with self._conn_lock:
+            row = self._connect().execute(
+                "SELECT size, mtime_ns, content_hash FROM entries WHERE path_key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return ManifestEntry(size=int(row[0]), mtime_ns=int(row[1]), content_hash=str(row[2]))
+
+    def get_many(self, paths: Iterable[Path]) -> dict[Path, ManifestEntry]:
+        """
+        Bulk lookup; paths without an entry are left out. Entries not yet
+        saved are taken from memory, the rest are read with one
+        `IN (...)` query per 500 keys.
+        """
+        out: dict[Path, ManifestEntry] = {}
+        pending: dict[str, list[Path]] = {}
+        for p in paths:
+            key = self._path_key(p)
+            if isinstance(self._data.get(key), dict):
+                ent = super().get(p)
+                if ent is not None:
+                    out[p] = ent
+            else:
+                pending.setdefault(key, []).append(p)
+        if not pending:
+            return out
+
+        keys = list(pending)
+        with self._conn_lock:
+            conn = self._connect()
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                for key, size, mtime_ns, content_hash in conn.execute(
+                    "SELECT path_key, size, mtime_ns, content_hash FROM entries"
+                    f" WHERE path_key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ):
+                    ent = ManifestEntry(size=int(size), mtime_ns=int(mtime_ns), content_hash=str(content_hash))
+                    for p in pending[key]:
+                        out[p] = ent
+        return out
+
+    def put_many(self, items: Iterable[tuple[Path, ManifestEntry]]) -> None:
+        """Queue many entries; written by the next save()."""
+        for path, entry in items:
+            self.put(path, entry)
+
+    def content_hashes(self) -> set[str]:
+        with self._conn_lock:
+            out = {r[0] for r in self._connect().execute("SELECT DISTINCT content_hash FROM entries")}
+        out.update(str(v["content_hash"]) for v in self._dirty.values())
+        return out
+
+    def save(self) -> None:
+        self.save_merged()
+
+    def save_merged(self, *, lock_timeout_sec: float = 300.0) -> None:
+        if not self._dirty:
+            return
+        with self._conn_lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._upsert(conn, self._dirty)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        # rows now live in the database; keep memory bounded
+        for k in self._dirty:
+            self._data.pop(k, None)
+        self._dirty = {}
+
+
+MANIFEST_BACKENDS = ("json", "sqlite")
+
+
+def open_manifest(
+    cache_dir: Path,
+    *,
+    backend: str = "json",
+    manifest_path: Optional[Path] = None,
+    key_mode: str = "absolute",
+    project_root: Optional[Path] = None,
+    timeout_sec: float = 300.0,
+) -> ContentHashManifest:
+    """
+    Create (not load) the manifest for a cache directory. The sqlite backend
+    imports `manifest.json` from the same directory on first use.
+    """
+    backend = (backend or "json").strip().lower()
+    if backend == "json":
+        return ContentHashManifest(
+            manifest_path or (cache_dir / "manifest.json"),
+            key_mode=key_mode,
+            project_root=project_root,
+        )
+    if backend == "sqlite":
+        return SqliteContentHashManifest(
+            manifest_path or (cache_dir / "manifest.sqlite"),
+            key_mode=key_mode,
+            project_root=project_root,
+            migrate_from=cache_dir / "manifest.json",
+            timeout_sec=timeout_sec,
+        )
+    raise ValueError(f"manifest backend must be one of {MANIFEST_BACKENDS}: {backend!r}")
 
 
 # ---------------------------------------------------------------------------
@@ -203,13 +514,181 @@ class LemmaCachePayload:
 
         return cls(lemmas=lemmas, ref_tags=ref_tags)
 
+    def merge_into(self, lemmas: Counter, ref_tags: Counter) -> None:
+        lemmas.update(self.lemmas)
+        ref_tags.update(self.ref_tags)
+
+
+# ---------------------------------------------------------------------------
+# Cache payload (binary)
+# ---------------------------------------------------------------------------
+#
+# header (little-endian): magic, format version, flags, CACHE_VERSION,
+#   number of lemmas, number of ref tags, byte length of the string table,
+#   array typecode of the counts
+# body (zlib-compressed as a whole when FLAG_ZLIB is set):
+#   string table: UTF-8 keys (lemmas, then ref tags) joined by NUL
+#   counts: one integer per key, same order, narrowest type that fits
+
+_BIN_MAGIC = b"CCVL"
+_BIN_FORMAT_VERSION = 1
+_BIN_FLAG_ZLIB = 1
+_BIN_HEADER = struct.Struct("<4sBBHIIIc")
+# (typecode, exclusive upper bound); negative counts fall back to "q"
+_BIN_COUNT_TYPES = tuple((code, 1 << (8 * array(code).itemsize)) for code in "BHI")
+
+
+def _count_typecode(values: list[int]) -> str:
+    if values and min(values) < 0:
+        return "q"
+    top = max(values, default=0)
+    for code, bound in _BIN_COUNT_TYPES:
+        if top < bound:
+            return code
+    return "q"
+
+
+def encode_payload_binary(payload: LemmaCachePayload, *, compress: bool = False) -> bytes:
+    keys = list(payload.lemmas.keys()) + list(payload.ref_tags.keys())
+    if any("\0" in k for k in keys):
+        raise ValueError("binary payload keys must not contain NUL")
+
+    blob = "\0".join(keys).encode("utf-8")
+    values = [int(v) for v in payload.lemmas.values()]
+    values.extend(int(v) for v in payload.ref_tags.values())
+    typecode = _count_typecode(values)
+    counts = array(typecode, values)
+    if sys.byteorder != "little":
+        counts.byteswap()
+
+    body = blob + counts.tobytes()
+    flags = 0
+    if compress:
+        body = zlib.compress(body, 6)
+        flags |= _BIN_FLAG_ZLIB
+
+    header = _BIN_HEADER.pack(
+        _BIN_MAGIC,
+        _BIN_FORMAT_VERSION,
+        flags,
+        CACHE_VERSION,
+        len(payload.lemmas),
+        len(payload.ref_tags),
+        len(blob),
+        typecode.encode("ascii"),
+    )
+    return header + body
+
+
+class PackedLemmaCachePayload:
+    """
+    Binary payload, decoded only when needed.
+
+    Construction just checks the header; `lemmas` / `ref_tags` build Counters
+    on first access, and merge_into() adds the packed counts straight into
+    existing Counters without creating per-file ones.
+    """
+
+    def __init__(self, data: bytes):
+        if len(data) < _BIN_HEADER.size:
+            raise ValueError("binary payload too short")
+        magic, fmt, flags, cache_ver, n_lemmas, n_ref, blob_len, typecode = _BIN_HEADER.unpack_from(data)
+        if magic != _BIN_MAGIC:
+            raise ValueError("not a binary lemma cache payload")
+        if fmt != _BIN_FORMAT_VERSION:
+            raise ValueError(f"binary payload format mismatch: {fmt} != {_BIN_FORMAT_VERSION}")
+        if cache_ver != CACHE_VERSION:
+            raise ValueError(f"cache version mismatch: {cache_ver} != {CACHE_VERSION}")
+
+        self._data = data
+        self._flags = flags
+        self._n_lemmas = n_lemmas
+        self._n_ref = n_ref
+        self._blob_len = blob_len
+        self._typecode = typecode.decode("ascii")
+        if self._typecode not in ("B", "H", "I", "q"):
+            raise ValueError(f"binary payload has unknown count type {self._typecode!r}")
+        self._decoded: Optional[tuple[list[str], list[int]]] = None
+        self._lemmas: Optional[Counter] = None
+        self._ref_tags: Optional[Counter] = None
+
+    def _decode(self) -> tuple[list[str], list[int]]:
+        if self._decoded is None:
+            body = memoryview(self._data)[_BIN_HEADER.size:]
+            if self._flags & _BIN_FLAG_ZLIB:
+                body = memoryview(zlib.decompress(body))
+            n = self._n_lemmas + self._n_ref
+            counts = array(self._typecode)
+            if len(body) != self._blob_len + counts.itemsize * n:
+                raise ValueError("binary payload size mismatch")
+
+            keys = str(body[: self._blob_len], "utf-8").split("\0") if n else []
+            counts.frombytes(body[self._blob_len:])
+            if sys.byteorder != "little":
+                counts.byteswap()
+            if len(keys) != n:
+                raise ValueError("binary payload string table mismatch")
+            self._decoded = (keys, counts.tolist())
+        return self._decoded
+
+    @property
+    def lemmas(self) -> Counter:
+        if self._lemmas is None:
+            keys, counts = self._decode()
+            n = self._n_lemmas
+            self._lemmas = Counter(dict(zip(keys[:n], counts[:n])))
+        return self._lemmas
+
+    @property
+    def ref_tags(self) -> Counter:
+        if self._ref_tags is None:
+            keys, counts = self._decode()
+            n = self._n_lemmas
+            self._ref_tags = Counter(dict(zip(keys[n:], counts[n:])))
+        return self._ref_tags
+
+    def merge_into(self, lemmas: Counter, ref_tags: Counter) -> None:
+        keys, counts = self._decode()
+        n = self._n_lemmas
+        for target, ks, vs in ((lemmas, keys[:n], counts[:n]), (ref_tags, keys[n:], counts[n:])):
+            if not target:
+                target.update(dict(zip(ks, vs)))
+                continue
+            get = target.get
+            for k, v in zip(ks, vs):
+                target[k] = get(k, 0) + v
+
+    def to_payload(self) -> LemmaCachePayload:
+        return LemmaCachePayload(lemmas=Counter(self.lemmas), ref_tags=Counter(self.ref_tags))
+
+
+CachePayload = Union[LemmaCachePayload, PackedLemmaCachePayload]
+
 
 def _make_cache_key(content_hash: str, config_hash: str) -> str:
     return _sha256_text(f"{content_hash}|{config_hash}|v{CACHE_VERSION}")
 
 
-def _cache_file_path(cache_dir: Path, cache_key: str) -> Path:
-    return cache_dir / "objects" / cache_key[:2] / f"{cache_key}.json"
+PAYLOAD_FORMATS = ("json", "binary")
+_PAYLOAD_SUFFIX = {"json": ".json", "binary": ".bin"}
+
+
+def _cache_file_path(cache_dir: Path, cache_key: str, payload_format: str = "json") -> Path:
+    return cache_dir / "objects" / cache_key[:2] / f"{cache_key}{_PAYLOAD_SUFFIX[payload_format]}"
+
+
+# annotation tier (annotation_cache.AnnotationStore); pruned and collected with the objects
+_ANNOTATION_SUFFIX = ".ann"
+
+# (directory, suffixes) of the file-per-object trees under a cache dir
+_FILE_TIERS = (
+    ("objects", frozenset(_PAYLOAD_SUFFIX.values())),
+    ("annotations", frozenset({_ANNOTATION_SUFFIX})),
+)
+
+
+def _annotation_file_path(cache_dir: Path, cache_key: str) -> Path:
+    return cache_dir / "annotations" / cache_key[:2] / f"{cache_key}{_ANNOTATION_SUFFIX}"
 
 
 def _lock_file_path(cache_dir: Path, cache_key: str) -> Path:
@@ -217,39 +696,162 @@ def _lock_file_path(cache_dir: Path, cache_key: str) -> Path:
 
 
 # ---------------------------------------------------------------------------
-# File lock (simple lockfile)
+# File lock (fcntl.flock; O_EXCL lockfile where fcntl is unavailable)
 # ---------------------------------------------------------------------------
 
 class CacheLockTimeout(RuntimeError):
     pass
 
 
-def _acquire_lock(lock_path: Path, *, timeout_sec: float = 300.0, poll_sec: float = 0.1) -> None:
-    lock_path.parent.mkdir(parents=True, exist_ok=True)
-    start = time.time()
-    pid = os.getpid()
+def _fd_is_current(fd: int, lock_path: Path) -> bool:
+    """False if the lock file was unlinked (released) after we opened it."""
+    try:
+        st = os.stat(str(lock_path))
+    except FileNotFoundError:
+        return False
+    fst = os.fstat(fd)
+    return (st.st_dev, st.st_ino) == (fst.st_dev, fst.st_ino)
 
-    while True:
+
+def _flock_wait(fd: int, timeout_sec: float) -> bool:
+    """
+    Take an exclusive flock on fd, blocking for at most timeout_sec.
+
+    flock() itself has no timeout, so a contended lock is waited for in a
+    helper thread (blocked in the kernel, no polling) while this thread waits
+    on an Event. If we give up first, the helper releases the lock as soon as
+    it gets it.
+    """
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        pass
+    if timeout_sec <= 0:
+        return False
+
+    waiter_fd = os.dup(fd)  # same open file description, so the same lock
+    done = threading.Event()
+    state_lock = threading.Lock()
+    state = {"acquired": False, "abandoned": False}
+
+    def wait() -> None:
         try:
-            fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            fcntl.flock(waiter_fd, fcntl.LOCK_EX)
+            with state_lock:
+                if state["abandoned"]:
+                    fcntl.flock(waiter_fd, fcntl.LOCK_UN)
+                else:
+                    state["acquired"] = True
+        except OSError:
+            pass
+        finally:
+            os.close(waiter_fd)
+            done.set()
+
+    threading.Thread(target=wait, name="cache-lock-wait", daemon=True).start()
+    done.wait(timeout_sec)
+    with state_lock:
+        if state["acquired"]:
+            return True
+        state["abandoned"] = True
+        return False
+
+
+class CacheLock:
+    """
+    Exclusive inter-process lock on a lock file.
+
+    With fcntl, waiters block in flock() instead of polling, and the kernel
+    drops the lock when the owner exits or crashes, so a leftover file never
+    blocks anyone. The file is unlinked on release (a waiter that then holds
+    the lock on the unlinked file notices and retries on the new one), so
+    lock files do not accumulate. `wait_sec` is how long acquire() waited.
+    """
+
+    def __init__(self, lock_path: Path, *, timeout_sec: float = 300.0, poll_sec: float = 0.1):
+        self.lock_path = lock_path
+        self.timeout_sec = timeout_sec
+        self.poll_sec = poll_sec
+        self.wait_sec = 0.0
+        self._fd: Optional[int] = None
+
+    def __enter__(self) -> "CacheLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
+
+    def acquire(self) -> None:
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        start = time.monotonic()
+        if fcntl is None:
+            self._acquire_excl(start)
+        else:
+            self._acquire_flock(start)
+        self.wait_sec = time.monotonic() - start
+
+    def _acquire_flock(self, start: float) -> None:
+        while True:
+            fd = os.open(str(self.lock_path), os.O_CREAT | os.O_RDWR, 0o644)
+            remaining = self.timeout_sec - (time.monotonic() - start)
+            if not _flock_wait(fd, remaining):
+                os.close(fd)
+                raise CacheLockTimeout(f"Timeout acquiring lock: {self.lock_path}")
+            if _fd_is_current(fd, self.lock_path):
+                os.ftruncate(fd, 0)
+                os.write(fd, f"pid={os.getpid()}\n".encode("utf-8"))
+                self._fd = fd
+                return
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _acquire_excl(self, start: float) -> None:  # pragma: no cover (no fcntl)
+        pid = os.getpid()
+        while True:
             try:
-                os.write(fd, f"pid={pid}\n".encode("utf-8"))
+                fd = os.open(str(self.lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                try:
+                    os.write(fd, f"pid={pid}\n".encode("utf-8"))
+                finally:
+                    os.close(fd)
+                return
+            except FileExistsError:
+                if (time.monotonic() - start) >= self.timeout_sec:
+                    raise CacheLockTimeout(f"Timeout acquiring lock: {self.lock_path}")
+                time.sleep(self.poll_sec)
+
+    def release(self) -> None:
+        # unlink while still holding the lock, so nobody can take it on this inode
+        try:
+            self.lock_path.unlink()
+        except OSError:
+            pass
+        if self._fd is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
             finally:
-                os.close(fd)
-            return
-        except FileExistsError:
-            if (time.time() - start) >= timeout_sec:
-                raise CacheLockTimeout(f"Timeout acquiring lock: {lock_path}")
-            time.sleep(poll_sec)
+                os.close(self._fd)
+                self._fd = None
 
 
-def _release_lock(lock_path: Path) -> None:
+def _lock_is_held(lock_path: Path) -> bool:
+    """Whether a live process holds the flock on lock_path (False without fcntl)."""
+    if fcntl is None:
+        return False
     try:
-        lock_path.unlink()
-    except FileNotFoundError:
-        pass
+        fd = os.open(str(lock_path), os.O_RDWR)
     except OSError:
-        pass
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return False
+    except BlockingIOError:
+        return True
+    finally:
+        os.close(fd)
 
 
 # ---------------------------------------------------------------------------
@@ -297,114 +899,1186 @@ def build_config_hash(
 
 
 # ---------------------------------------------------------------------------
-# Public API
+# Object stores
 # ---------------------------------------------------------------------------
 
-def get_or_compute_cached(
-    *,
-    path: Path,
+class FileObjectStore:
+    """
+    One file per object: objects/<xx>/<key>.json or .bin (the original layout).
+
+    Reads fall back to the other payload format; a JSON object read while the
+    binary format is configured is rewritten as binary (one-time migration).
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        *,
+        payload_format: str = "json",
+        payload_compress: bool = False,
+        verbose: bool = False,
+        stats: Optional["CacheStats"] = None,
+    ):
+        if payload_format not in PAYLOAD_FORMATS:
+            raise ValueError(f"payload format must be one of {PAYLOAD_FORMATS}: {payload_format!r}")
+        self.cache_dir = cache_dir
+        self.payload_format = payload_format
+        self.payload_compress = payload_compress
+        self.verbose = verbose
+        self.stats = stats if stats is not None else CacheStats()
+
+    def get(self, cache_key: str) -> Optional[tuple[CachePayload, str]]:
+        """Return (payload, location) or None."""
+        fallback = "json" if self.payload_format == "binary" else "binary"
+        for fmt in (self.payload_format, fallback):
+            cpath = _cache_file_path(self.cache_dir, cache_key, fmt)
+            try:
+                nbytes = cpath.stat().st_size
+            except OSError:
+                continue
+            try:
+                payload = _load_payload(cpath)
+            except Exception as e:
+                self.stats.add(broken_objects=1)
+                if self.verbose:
+                    print(f"[CACHE] broken cache ignored: {cpath} ({e})")
+                continue
+            self.stats.add(bytes_read=nbytes)
+            if fmt == "json" and self.payload_format == "binary":
+                assert isinstance(payload, LemmaCachePayload)
+                try:
+                    new_path = Path(self.put(cache_key, payload))
+                    if new_path != cpath:
+                        cpath.unlink()
+                        cpath = new_path
+                except OSError:
+                    pass
+            return payload, cpath.name
+        return None
+
+    def put(self, cache_key: str, payload: LemmaCachePayload) -> str:
+        # binary falls back to JSON for keys the binary format cannot hold
+        fmt, data = _encode_payload(payload, self.payload_format, compress=self.payload_compress)
+        cpath = _cache_file_path(self.cache_dir, cache_key, fmt)
+        atomic_write_bytes(cpath, data)
+        self.stats.add(bytes_written=len(data))
+        return str(cpath)
+
+    def contains_many(self, cache_keys: Iterable[str]) -> set[str]:
+        """The subset of cache_keys with an object file (either format)."""
+        return {
+            k
+            for k in cache_keys
+            if any(os.path.exists(_cache_file_path(self.cache_dir, k, fmt)) for fmt in PAYLOAD_FORMATS)
+        }
+
+    def nbytes(self, cache_key: str) -> Optional[int]:
+        """Stored size of an object, or None if it is not in the store."""
+        for fmt in PAYLOAD_FORMATS:
+            try:
+                return _cache_file_path(self.cache_dir, cache_key, fmt).stat().st_size
+            except OSError:
+                continue
+        return None
+
+    def flush(self) -> None:
+        pass  # every put is written immediately
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteObjectStore:
+    """
+    All objects in one SQLite database (objects.sqlite, WAL mode).
+
+    Objects are blobs keyed by cache key, so a large cache is one file
+    instead of millions of small ones. Writes are buffered and committed in
+    batches of `commit_every` (plus on flush()), in one transaction each.
+    On a miss, loose files of the file layout are still read and moved into
+    the database; compact() does that for the whole cache and then VACUUMs.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        *,
+        payload_format: str = "json",
+        payload_compress: bool = False,
+        verbose: bool = False,
+        commit_every: int = 256,
+        timeout_sec: float = 300.0,
+        db_path: Optional[Path] = None,
+        stats: Optional["CacheStats"] = None,
+    ):
+        self.stats = stats if stats is not None else CacheStats()
+        self.loose = FileObjectStore(
+            cache_dir,
+            payload_format=payload_format,
+            payload_compress=payload_compress,
+            verbose=verbose,
+            stats=self.stats,
+        )
+        self.cache_dir = cache_dir
+        self.db_path = db_path or (cache_dir / "objects.sqlite")
+        self.payload_format = payload_format
+        self.payload_compress = payload_compress
+        self.verbose = verbose
+        self.commit_every = max(1, int(commit_every))
+        self.timeout_sec = timeout_sec
+        self._pending: dict[str, tuple[str, bytes]] = {}
+        # put() may be called from hit-decoding threads (loose object migration)
+        self._pending_lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = _connect_sqlite_wal(self.db_path, timeout_sec=self.timeout_sec)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS objects ("
+                " key TEXT PRIMARY KEY,"
+                " format TEXT NOT NULL,"
+                " data BLOB NOT NULL,"
+                " created_at REAL NOT NULL"
+                ")"
+            )
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        self.flush()
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get(self, cache_key: str) -> Optional[tuple[CachePayload, str]]:
+        row = self._pending.get(cache_key)
+        if row is None:
+            with self._conn_lock:
+                row = self._connect().execute(
+                    "SELECT format, data FROM objects WHERE key = ?", (cache_key,)
+                ).fetchone()
+        if row is not None:
+            try:
+                payload = _decode_payload(row[0], bytes(row[1]))
+                self.stats.add(bytes_read=len(row[1]))
+                return payload, f"{self.db_path.name}:{cache_key}"
+            except Exception as e:
+                self.stats.add(broken_objects=1)
+                if self.verbose:
+                    print(f"[CACHE] broken cache ignored: {self.db_path.name}:{cache_key} ({e})")
+                return None
+
+        # not packed yet: a loose object from the file layout
+        found = self.loose.get(cache_key)
+        if found is None:
+            return None
+        payload = found[0]
+        if isinstance(payload, PackedLemmaCachePayload):
+            payload = payload.to_payload()
+        self.put(cache_key, payload)
+        self._remove_loose(cache_key)
+        return payload, f"{self.db_path.name}:{cache_key}"
+
+    def _remove_loose(self, cache_key: str) -> None:
+        for fmt in PAYLOAD_FORMATS:
+            try:
+                _cache_file_path(self.cache_dir, cache_key, fmt).unlink()
+            except OSError:
+                pass
+
+    def put(self, cache_key: str, payload: LemmaCachePayload) -> str:
+        row = _encode_payload(payload, self.payload_format, compress=self.payload_compress)
+        self.stats.add(bytes_written=len(row[1]))
+        with self._pending_lock:
+            self._pending[cache_key] = row
+            if len(self._pending) >= self.commit_every:
+                self.flush()
+        return f"{self.db_path.name}:{cache_key}"
+
+    def flush(self) -> None:
+        with self._pending_lock:
+            if not self._pending:
+                return
+            now = time.time()
+            rows = [(k, fmt, data, now) for k, (fmt, data) in self._pending.items()]
+            with self._conn_lock:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO objects (key, format, data, created_at) VALUES (?, ?, ?, ?)",
+                        rows,
+                    )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            self._pending = {}
+
+    def contains_many(self, cache_keys: Iterable[str]) -> set[str]:
+        """The subset of cache_keys present (pending, packed or loose)."""
+        keys = list(cache_keys)
+        found = {k for k in keys if k in self._pending}
+        rest = [k for k in keys if k not in found]
+        with self._conn_lock:
+            conn = self._connect()
+            for i in range(0, len(rest), 500):
+                batch = rest[i : i + 500]
+                found.update(
+                    r[0]
+                    for r in conn.execute(
+                        f"SELECT key FROM objects WHERE key IN ({','.join('?' * len(batch))})", batch
+                    )
+                )
+        found |= self.loose.contains_many(k for k in rest if k not in found)
+        return found
+
+    def nbytes(self, cache_key: str) -> Optional[int]:
+        """Stored size of an object, or None if it is not in the store."""
+        row = self._pending.get(cache_key)
+        if row is not None:
+            return len(row[1])
+        with self._conn_lock:
+            found = self._connect().execute(
+                "SELECT length(data) FROM objects WHERE key = ?", (cache_key,)
+            ).fetchone()
+        return None if found is None else int(found[0])
+
+    def compact(self) -> "CompactReport":
+        """
+        Move every loose object file into the database, then VACUUM so the
+        database is rewritten in key order without free pages.
+        """
+        packed = 0
+        objects_dir = self.cache_dir / "objects"
+        if objects_dir.exists():
+            for p in sorted(objects_dir.rglob("*")):
+                if p.suffix not in _PAYLOAD_SUFFIX.values() or not p.is_file():
+                    continue
+                try:
+                    payload = _load_payload(p)
+                except Exception:
+                    continue  # broken objects are left for prune_cache
+                if isinstance(payload, PackedLemmaCachePayload):
+                    payload = payload.to_payload()
+                self.put(p.stem, payload)
+                packed += 1
+            self.flush()
+            for p in list(objects_dir.rglob("*")):
+                if p.suffix in _PAYLOAD_SUFFIX.values() and p.is_file() and self._has(p.stem):
+                    p.unlink()
+
+        before = self.db_path.stat().st_size if self.db_path.exists() else 0
+        with self._conn_lock:
+            conn = self._connect()
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        after = self.db_path.stat().st_size
+        return CompactReport(packed_objects=packed, bytes_before=before, bytes_after=after)
+
+    def _has(self, cache_key: str) -> bool:
+        with self._conn_lock:
+            return self._connect().execute(
+                "SELECT 1 FROM objects WHERE key = ?", (cache_key,)
+            ).fetchone() is not None
+
+
+@dataclass(frozen=True)
+class CompactReport:
+    packed_objects: int
+    bytes_before: int
+    bytes_after: int
+
+
+OBJECT_STORES = ("files", "sqlite")
+
+
+def open_object_store(
     cache_dir: Path,
-    config_hash: str,
-    compute_fn: Callable[[], LemmaCachePayload],
-    use_manifest: bool = True,
-    manifest_path: Optional[Path] = None,
-    manifest_key_mode: str = "absolute",  # "absolute" or "relative"
-    manifest_project_root: Optional[Path] = None,
+    *,
+    backend: str = "files",
+    payload_format: str = "json",
+    payload_compress: bool = False,
     verbose: bool = False,
-    lock_timeout_sec: float = 300.0,
-) -> tuple[LemmaCachePayload, bool]:
+    commit_every: int = 256,
+    timeout_sec: float = 300.0,
+    stats: Optional["CacheStats"] = None,
+) -> Union[FileObjectStore, SqliteObjectStore]:
+    backend = (backend or "files").strip().lower()
+    if backend == "files":
+        return FileObjectStore(
+            cache_dir,
+            payload_format=payload_format,
+            payload_compress=payload_compress,
+            verbose=verbose,
+            stats=stats,
+        )
+    if backend == "sqlite":
+        return SqliteObjectStore(
+            cache_dir,
+            payload_format=payload_format,
+            payload_compress=payload_compress,
+            verbose=verbose,
+            commit_every=commit_every,
+            timeout_sec=timeout_sec,
+            stats=stats,
+        )
+    raise ValueError(f"object store must be one of {OBJECT_STORES}: {backend!r}")
+
+
+def compact_cache(cache_dir: Path) -> CompactReport:
+    """Pack loose objects of a cache directory into objects.sqlite and VACUUM it."""
+    store = SqliteObjectStore(cache_dir.resolve())
+    try:
+        return store.compact()
+    finally:
+        store.close()
+
+
+# ---------------------------------------------------------------------------
+# Access index (drives prune_cache(max_bytes=...))
+# ---------------------------------------------------------------------------
+
+class AccessIndex:
     """
-    Return (payload, cache_hit).
+    Last access time, stored size and config hash per object, in
+    access.sqlite (WAL mode).
 
-    - Cache key: sha256( content_hash + config_hash + CACHE_VERSION )
-    - Concurrency safe: lock only on miss compute/write (double-check after lock)
-    - Payload: JSON (portable)
+    Sessions record every hit and every new object; records are buffered
+    and written in one upsert per flush(), so a hit costs no I/O of its own.
+    prune_cache(max_bytes=...) evicts in last-access order from this index
+    instead of walking and stat-ing the object tree.
     """
-    path = path.resolve()
-    cache_dir = cache_dir.resolve()
-    cache_dir.mkdir(parents=True, exist_ok=True)
-
-    manifest: Optional[ContentHashManifest] = None
-    if use_manifest:
-        mp = manifest_path or (cache_dir / "manifest.json")
-        manifest = ContentHashManifest(
-            mp,
-            key_mode=manifest_key_mode,
-            project_root=manifest_project_root,
+
+    def __init__(self, cache_dir: Path, *, timeout_sec: float = 300.0):
+        self.cache_dir = cache_dir
+        self.db_path = cache_dir / "access.sqlite"
+        self.timeout_sec = timeout_sec
+        # key -> (last access, hits, size, config hash); None when unknown
+        self._pending: Dict[str, Tuple[float, int, Optional[int], Optional[str]]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = _connect_sqlite_wal(self.db_path, timeout_sec=self.timeout_sec)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS access ("
+                " key TEXT PRIMARY KEY,"
+                " size INTEGER,"
+                " last_access REAL NOT NULL,"
+                " hits INTEGER NOT NULL DEFAULT 0,"
+                " config_hash TEXT"
+                ") WITHOUT ROWID"
+            )
+            columns = {r[1] for r in conn.execute("PRAGMA table_info(access)")}
+            if "config_hash" not in columns:  # index created before config hashes were kept
+                conn.execute("ALTER TABLE access ADD COLUMN config_hash TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS access_lru ON access (last_access)")
+            self._conn = conn
+        return self._conn
+
+    def touch(
+        self,
+        cache_key: str,
+        *,
+        size: Optional[int] = None,
+        hit: bool = True,
+        config_hash: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            _ts, hits, old_size, old_config = self._pending.get(cache_key, (0.0, 0, None, None))
+            self._pending[cache_key] = (
+                time.time(),
+                hits + (1 if hit else 0),
+                old_size if size is None else size,
+                old_config if config_hash is None else config_hash,
+            )
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            rows = [(k, size, ts, hits, cfg) for k, (ts, hits, size, cfg) in self._pending.items()]
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO access (key, size, last_access, hits, config_hash) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT (key) DO UPDATE SET"
+                    " size = COALESCE(excluded.size, size),"
+                    " last_access = max(last_access, excluded.last_access),"
+                    " hits = hits + excluded.hits,"
+                    " config_hash = COALESCE(excluded.config_hash, config_hash)",
+                    rows,
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._pending = {}
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def scanned(self) -> bool:
+        with self._lock:
+            return self._connect().execute(
+                "SELECT 1 FROM meta WHERE key = 'scanned_at'"
+            ).fetchone() is not None
+
+    def scan(self) -> int:
+        """
+        Index objects written before access tracking existed (or by other
+        tools): one walk of objects/ and annotations/ and one pass over
+        objects.sqlite, using mtime / created_at as the last access. Returns
+        the number added.
+        """
+        found: Dict[str, Tuple[float, int]] = {}
+        for dirname, suffixes in _FILE_TIERS:
+            tier_dir = self.cache_dir / dirname
+            if not tier_dir.exists():
+                continue
+            for p in tier_dir.rglob("*"):
+                if p.suffix in suffixes:
+                    try:
+                        st = p.stat()
+                    except OSError:
+                        continue
+                    found[p.stem] = (st.st_mtime, st.st_size)
+        objects_db = self.cache_dir / "objects.sqlite"
+        if objects_db.exists():
+            src = sqlite3.connect(str(objects_db), timeout=self.timeout_sec)
+            try:
+                for key, created_at, size in src.execute(
+                    "SELECT key, created_at, length(data) FROM objects"
+                ):
+                    found[key] = (float(created_at), int(size))
+            finally:
+                src.close()
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = conn.total_changes
+                conn.executemany(
+                    "INSERT OR IGNORE INTO access (key, size, last_access, hits) VALUES (?, ?, ?, 0)",
+                    [(k, size, ts) for k, (ts, size) in found.items()],
+                )
+                added = conn.total_changes - before
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('scanned_at', ?)",
+                    (str(time.time()),),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def unsized_keys(self) -> list[str]:
+        with self._lock:
+            return [r[0] for r in self._connect().execute("SELECT key FROM access WHERE size IS NULL")]
+
+    def set_sizes(self, sizes: Mapping[str, Optional[int]]) -> None:
+        """Record sizes; keys whose size is None (object gone) are dropped."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "UPDATE access SET size = ? WHERE key = ?",
+                    [(n, k) for k, n in sizes.items() if n is not None],
+                )
+                conn.executemany(
+                    "DELETE FROM access WHERE key = ?",
+                    [(k,) for k, n in sizes.items() if n is None],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return int(self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM access").fetchone()[0])
+
+    def least_recent(self) -> Iterable[Tuple[str, int]]:
+        """(key, size) from least to most recently used."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT key, COALESCE(size, 0) FROM access ORDER BY last_access"
+            ).fetchall()
+        return rows
+
+    def config_hashes(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Recorded config hash per key (keys without one are left out)."""
+        out: Dict[str, str] = {}
+        keys = list(keys)
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                out.update(
+                    conn.execute(
+                        "SELECT key, config_hash FROM access WHERE config_hash IS NOT NULL"
+                        f" AND key IN ({','.join('?' * len(batch))})",
+                        batch,
+                    ).fetchall()
+                )
+        return out
+
+    def remove(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("DELETE FROM access WHERE key = ?", [(k,) for k in keys])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+
+# ---------------------------------------------------------------------------
+# Memory tier (in-process LRU of decoded payloads)
+# ---------------------------------------------------------------------------
+
+# rough per-entry cost of a decoded Counter item (dict slot, str and int objects)
+_ENTRY_BYTES = 120
+
+DEFAULT_MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def estimate_payload_bytes(payload: CachePayload) -> int:
+    """Approximate memory held by a payload once its Counters are decoded."""
+    if isinstance(payload, PackedLemmaCachePayload):
+        n = payload._n_lemmas + payload._n_ref
+        return len(payload._data) + payload._blob_len + n * _ENTRY_BYTES
+    n = len(payload.lemmas) + len(payload.ref_tags)
+    chars = sum(len(k) for k in payload.lemmas) + sum(len(k) for k in payload.ref_tags)
+    return chars + n * _ENTRY_BYTES
+
+
+class PayloadMemoryCache:
+    """
+    Bounded LRU of payloads, in front of the disk tier.
+
+    Keyed by (cache dir, cache key), so it can be shared by every session in
+    a process. The least recently used entries are evicted once the estimated
+    size exceeds max_bytes; a payload larger than max_bytes is not kept.
+    Payloads are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_CACHE_BYTES):
+        self.max_bytes = max(0, int(max_bytes))
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[CachePayload, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, cache_dir: Path, key: str) -> Optional[CachePayload]:
+        k = (str(cache_dir), key)
+        with self._lock:
+            entry = self._entries.get(k)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(k)
+            self.hits += 1
+            return entry[0]
+
+    def contains(self, cache_dir: Path, key: str) -> bool:
+        with self._lock:
+            return (str(cache_dir), key) in self._entries
+
+    def peek(self, cache_dir: Path, key: str) -> Optional[CachePayload]:
+        """Like get() but without touching counters or LRU order."""
+        with self._lock:
+            entry = self._entries.get((str(cache_dir), key))
+        return None if entry is None else entry[0]
+
+    def put(self, cache_dir: Path, key: str, payload: CachePayload) -> None:
+        size = estimate_payload_bytes(payload)
+        k = (str(cache_dir), key)
+        with self._lock:
+            old = self._entries.pop(k, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            if size > self.max_bytes:
+                return
+            self._entries[k] = (payload, size)
+            self.nbytes += size
+            self._evict()
+
+    def resize(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max(0, int(max_bytes))
+            self._evict()
+
+    def _evict(self) -> None:
+        while self.nbytes > self.max_bytes and self._entries:
+            _k, (_payload, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_SHARED_MEMORY_CACHE: Optional[PayloadMemoryCache] = None
+
+
+def shared_memory_cache(max_bytes: Optional[int] = None) -> PayloadMemoryCache:
+    """
+    The process-wide memory tier (created on first use). Passing max_bytes
+    resizes it, evicting entries if it shrinks.
+    """
+    global _SHARED_MEMORY_CACHE
+    if _SHARED_MEMORY_CACHE is None:
+        _SHARED_MEMORY_CACHE = PayloadMemoryCache(
+            DEFAULT_MEMORY_CACHE_BYTES if max_bytes is None else max_bytes
         )
-        manifest.load()
+    elif max_bytes is not None:
+        _SHARED_MEMORY_CACHE.resize(max_bytes)
+    return _SHARED_MEMORY_CACHE
 
-    st = path.stat()
 
-    # content hash (with manifest optimization)
-    if manifest is not None:
-        ent = manifest.get(path)
-        if ent and ent.size == st.st_size and ent.mtime_ns == st.st_mtime_ns:
-            content_hash = ent.content_hash
-            if verbose:
-                print(f"[CACHE] manifest hit: {path} -> {content_hash[:12]}…")
-        else:
-            content_hash = hash_file_content(path)
-            manifest.put(path, ManifestEntry(size=st.st_size, mtime_ns=st.st_mtime_ns, content_hash=content_hash))
-            manifest.save()
-            if verbose:
-                print(f"[CACHE] manifest miss: {path} -> computed {content_hash[:12]}…")
-    else:
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+_STATS_LOCK = threading.Lock()
+
+
+@dataclass
+class CacheStats:
+    """
+    Cache counters of a session; merge() sums the sessions of a whole run.
+
+    Every lookup is counted once in hits or misses. memory_hits and
+    hits_after_lock are the hits served by the memory tier and those found
+    only after waiting for another process's lock. Content hashes were
+    either computed (files_hashed, hash_bytes, hash_sec) or taken from the
+    manifest (manifest_reused). With the annotation tier, misses were either
+    recounted from stored annotations (annotation_hits) or sent to the
+    pipeline (annotation_misses).
+    """
+    hits: int = 0
+    misses: int = 0
+    memory_hits: int = 0
+    hits_after_lock: int = 0
+    broken_objects: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    lock_acquisitions: int = 0
+    lock_wait_sec: float = 0.0
+    files_hashed: int = 0
+    hash_bytes: int = 0
+    hash_sec: float = 0.0
+    manifest_reused: int = 0
+    annotation_hits: int = 0
+    annotation_misses: int = 0
+
+    def add(self, **deltas: float) -> None:
+        # stores are also used from hit-decoding threads
+        with _STATS_LOCK:
+            for name, n in deltas.items():
+                setattr(self, name, getattr(self, name) + n)
+
+    def merge(self, other: "CacheStats") -> None:
+        self.add(**{f.name: getattr(other, f.name) for f in fields(other)})
+
+    def take(self) -> "CacheStats":
+        """Return the counters so far and reset them (for per-task handoff)."""
+        with _STATS_LOCK:
+            out = replace(self)
+            for f in fields(self):
+                setattr(self, f.name, f.default)
+        return out
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def to_meta(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            f.name: (round(v, 6) if isinstance(v, float) else v)
+            for f in fields(self)
+            for v in (getattr(self, f.name),)
+        }
+        rate = self.hit_rate
+        out["hit_rate"] = round(rate, 4) if rate is not None else None
+        return out
+
+    def summary_line(self) -> str:
+        rate = self.hit_rate
+        return (
+            f"lemma_cache: hits={self.hits} misses={self.misses}"
+            f" hit_rate={'-' if rate is None else f'{rate:.1%}'}"
+            f" memory_hits={self.memory_hits} hits_after_lock={self.hits_after_lock}"
+            f" broken={self.broken_objects}"
+            f" read={_format_bytes(self.bytes_read)} written={_format_bytes(self.bytes_written)}"
+            f" lock_wait={self.lock_wait_sec:.2f}s"
+            f" hashed={self.files_hashed} ({_format_bytes(self.hash_bytes)}, {self.hash_sec:.2f}s)"
+            f" manifest_reused={self.manifest_reused}"
+            f" annotation_hits={self.annotation_hits} annotation_misses={self.annotation_misses}"
+        )
+
+
+def _format_bytes(n: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GiB"
+
+
+@dataclass
+class CachePlan:
+    """Cache key of every planned file, split into hits and misses (plan order)."""
+    keys: Dict[Path, str]
+    hits: List[Path]
+    misses: List[Path]
+
+
+class LemmaCacheSession:
+    """
+    A cache handle for a whole run.
+
+    The manifest is loaded once; new content hashes are kept in memory and
+    written back in batches (every `flush_every` new entries and on flush() /
+    leaving the `with` block) with save_merged(), so concurrent runs sharing a
+    cache keep each other's entries. Objects go through `self.store`
+    (object_store="files" or "sqlite"), which flush() commits as well;
+    an object computed on a miss is committed before its lock is released.
+    With a `memory_cache`, hits are served from memory when possible and
+    everything read or computed is added to it. Unless track_access=False,
+    uses are recorded in the AccessIndex that prune_cache(max_bytes=...)
+    evicts by.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        *,
+        config_hash: str,
+        use_manifest: bool = True,
+        manifest_path: Optional[Path] = None,
+        manifest_key_mode: str = "absolute",  # "absolute" or "relative"
+        manifest_project_root: Optional[Path] = None,
+        manifest_backend: str = "json",  # "json" or "sqlite"
+        verbose: bool = False,
+        lock_timeout_sec: float = 300.0,
+        flush_every: int = 1000,
+        payload_format: str = "json",  # "json" or "binary"
+        payload_compress: bool = False,
+        object_store: str = "files",  # "files" or "sqlite"
+        commit_every: int = 256,
+        memory_cache: Optional[PayloadMemoryCache] = None,
+        track_access: bool = True,
+    ):
+        self.cache_dir = cache_dir.resolve()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.config_hash = config_hash
+        self.verbose = verbose
+        self.lock_timeout_sec = lock_timeout_sec
+        self.flush_every = max(1, int(flush_every))
+        self.stats = CacheStats()
+        self.memory_cache = memory_cache
+        # cache keys computed by plan(), used once by get_or_compute()
+        self._planned_keys: Dict[Path, str] = {}
+        self.access: Optional[AccessIndex] = (
+            AccessIndex(self.cache_dir, timeout_sec=lock_timeout_sec) if track_access else None
+        )
+
+        self.manifest: Optional[ContentHashManifest] = None
+        if use_manifest:
+            self.manifest = open_manifest(
+                self.cache_dir,
+                backend=manifest_backend,
+                manifest_path=manifest_path,
+                key_mode=manifest_key_mode,
+                project_root=manifest_project_root,
+                timeout_sec=lock_timeout_sec,
+            )
+            self.manifest.load()
+
+        self.store = open_object_store(
+            self.cache_dir,
+            backend=object_store,
+            payload_format=payload_format,
+            payload_compress=payload_compress,
+            verbose=verbose,
+            commit_every=commit_every,
+            timeout_sec=lock_timeout_sec,
+            stats=self.stats,
+        )
+
+    def __enter__(self) -> "LemmaCacheSession":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.flush()
+
+    def flush(self) -> None:
+        self.store.flush()
+        if self.access is not None:
+            self.access.flush()
+        if self.manifest is not None:
+            self.manifest.save_merged(lock_timeout_sec=self.lock_timeout_sec)
+
+    def content_hash(self, path: Path) -> str:
+        """Content hash of `path`, from the manifest when size and mtime match."""
+        st = path.stat()
+        if self.manifest is not None:
+            ent = self.manifest.get(path)
+            if ent and ent.size == st.st_size and ent.mtime_ns == st.st_mtime_ns:
+                self.stats.add(manifest_reused=1)
+                if self.verbose:
+                    print(f"[CACHE] manifest hit: {path} -> {ent.content_hash[:12]}…")
+                return ent.content_hash
+
+        t0 = time.perf_counter()
         content_hash = hash_file_content(path)
+        self.stats.add(files_hashed=1, hash_bytes=st.st_size, hash_sec=time.perf_counter() - t0)
+        if self.manifest is None:
+            return content_hash
+        self.manifest.put(path, ManifestEntry(size=st.st_size, mtime_ns=st.st_mtime_ns, content_hash=content_hash))
+        if self.manifest.dirty_count >= self.flush_every:
+            self.flush()
+        if self.verbose:
+            print(f"[CACHE] manifest miss: {path} -> computed {content_hash[:12]}…")
+        return content_hash
+
+    def content_hashes(self, paths: Iterable[Path], *, workers: int = 8) -> Dict[Path, str]:
+        """
+        content_hash() for many files. Files the manifest does not cover are
+        hashed in a thread pool (hashlib releases the GIL on large reads), and
+        their manifest entries are added from this thread.
+        """
+        out: Dict[Path, str] = {}
+        todo: list[tuple[Path, os.stat_result]] = []
+        for path in paths:
+            path = path.resolve()
+            st = path.stat()
+            ent = self.manifest.get(path) if self.manifest is not None else None
+            if ent and ent.size == st.st_size and ent.mtime_ns == st.st_mtime_ns:
+                out[path] = ent.content_hash
+            else:
+                todo.append((path, st))
+        self.stats.add(manifest_reused=len(out))
+
+        if todo:
+            t0 = time.perf_counter()
+            if workers <= 1:
+                hashes = [hash_file_content(path) for path, _st in todo]
+            else:
+                with ThreadPoolExecutor(max_workers=int(workers)) as pool:
+                    hashes = list(pool.map(lambda item: hash_file_content(item[0]), todo))
+            self.stats.add(
+                files_hashed=len(todo),
+                hash_bytes=sum(st.st_size for _path, st in todo),
+                hash_sec=time.perf_counter() - t0,
+            )
+            for (path, st), content_hash in zip(todo, hashes):
+                out[path] = content_hash
+                if self.manifest is not None:
+                    self.manifest.put(
+                        path,
+                        ManifestEntry(size=st.st_size, mtime_ns=st.st_mtime_ns, content_hash=content_hash),
+                    )
+            if self.manifest is not None and self.manifest.dirty_count >= self.flush_every:
+                self.flush()
+        return out
+
+    def plan(self, paths: Iterable[Path], *, workers: int = 8) -> "CachePlan":
+        """
+        Decide hits and misses for a whole run up front: hash all files
+        (content_hashes), then check which objects exist with one bulk
+        lookup per store. get_or_compute() reuses the planned keys.
+        """
+        paths = list(dict.fromkeys(p.resolve() for p in paths))
+        hashes = self.content_hashes(paths, workers=workers)
+        keys = {p: _make_cache_key(hashes[p], self.config_hash) for p in paths}
+        self._planned_keys.update(keys)
+
+        present = self.store.contains_many(keys.values())
+        if self.memory_cache is not None:
+            present |= {k for k in keys.values() if self.memory_cache.contains(self.cache_dir, k)}
+        hits = [p for p in paths if keys[p] in present]
+        misses = [p for p in paths if keys[p] not in present]
+        return CachePlan(keys=keys, hits=hits, misses=misses)
+
+    def load_hits(self, plan: "CachePlan", *, workers: int = 8) -> Iterable[tuple[Path, CachePayload]]:
+        """
+        Yield (path, payload) for the planned hits, in plan order, reading
+        and decoding them in a thread pool when workers > 1. A hit whose
+        object has disappeared since planning is appended to plan.misses.
+        """
+        memory = self.memory_cache
+
+        def load(path: Path) -> tuple[Optional[CachePayload], str]:
+            key = plan.keys[path]
+            if memory is not None:
+                cached = memory.peek(self.cache_dir, key)
+                if cached is not None:
+                    return cached, "memory"
+            found = self.store.get(key)
+            if found is None:
+                return None, ""
+            payload = found[0]
+            if isinstance(payload, PackedLemmaCachePayload):
+                payload._decode()  # the expensive part, done off the main thread
+            return payload, found[1]
+
+        workers = int(workers)
+        if workers <= 1:
+            loaded = ((path, load(path)) for path in plan.hits)
+        else:
+            loaded = self._load_ahead(plan.hits, load, workers)
+        for path, (payload, location) in loaded:
+            key = plan.keys[path]
+            if payload is None:
+                plan.misses.append(path)
+                continue
+            if self.verbose:
+                print(f"[CACHE] hit: {path.name} -> {location}")
+            self.stats.add(hits=1)
+            if location == "memory":
+                self.stats.add(memory_hits=1)
+                memory.get(self.cache_dir, key)  # count the hit, refresh LRU order
+            elif memory is not None:
+                memory.put(self.cache_dir, key, payload)
+            self._record_access(key)
+            yield path, payload
+
+    @staticmethod
+    def _load_ahead(paths: List[Path], load: Callable[[Path], Any], workers: int) -> Iterable[tuple[Path, Any]]:
+        """(path, load(path)) in order, with a bounded number of loads running ahead."""
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # bounded read-ahead, so decoded payloads do not pile up in memory
+            pending: deque = deque()
+            todo = iter(paths)
+            for path in islice(todo, 2 * workers):
+                pending.append((path, pool.submit(load, path)))
+            while pending:
+                path, future = pending.popleft()
+                for nxt in islice(todo, 1):
+                    pending.append((nxt, pool.submit(load, nxt)))
+                yield path, future.result()
+
+    def _record_access(
+        self,
+        cache_key: str,
+        *,
+        size: Optional[int] = None,
+        hit: bool = True,
+        config_hash: Optional[str] = None,
+    ) -> None:
+        if self.access is None:
+            return
+        self.access.touch(cache_key, size=size, hit=hit, config_hash=config_hash or self.config_hash)
+        if self.access.pending_count >= self.flush_every:
+            self.access.flush()
 
-    cache_key = _make_cache_key(content_hash, config_hash)
-    cpath = _cache_file_path(cache_dir, cache_key)
+    def record_annotation_access(
+        self,
+        annotation_key: str,
+        *,
+        annotation_hash: str,
+        size: Optional[int] = None,
+        hit: bool = True,
+    ) -> None:
+        """Track an annotation tier object in the access index, so max_bytes pruning counts it."""
+        self._record_access(annotation_key, size=size, hit=hit, config_hash=annotation_hash)
+
+    def get_or_compute(
+        self,
+        path: Path,
+        compute_fn: Callable[[], LemmaCachePayload],
+    ) -> tuple[CachePayload, bool]:
+        """
+        Return (payload, cache_hit).
+
+        - Cache key: sha256( content_hash + config_hash + CACHE_VERSION )
+        - Concurrency safe: lock only on miss compute/write (double-check after lock)
+        - Payload: JSON (portable) or binary (payload_format="binary"); hits
+          in binary form are PackedLemmaCachePayload, decoded lazily
+        """
+        path = path.resolve()
+        cache_key = self._planned_keys.pop(path, None)
+        if cache_key is None:
+            cache_key = _make_cache_key(self.content_hash(path), self.config_hash)
+        verbose = self.verbose
+        memory = self.memory_cache
+
+        if memory is not None:
+            cached = memory.get(self.cache_dir, cache_key)
+            if cached is not None:
+                self.stats.add(hits=1, memory_hits=1)
+                self._record_access(cache_key)
+                if verbose:
+                    print(f"[CACHE] hit: {path.name} -> memory")
+                return cached, True
 
-    # Fast path: load without lock
-    if cpath.exists():
-        try:
-            payload = _load_payload_json(cpath)
+        # Fast path: load without lock
+        found = self.store.get(cache_key)
+        if found is not None:
             if verbose:
-                print(f"[CACHE] hit: {path.name} -> {cpath.name}")
-            return payload, True
-        except Exception as e:
+                print(f"[CACHE] hit: {path.name} -> {found[1]}")
+            self.stats.add(hits=1)
+            self._record_access(cache_key)
+            if memory is not None:
+                memory.put(self.cache_dir, cache_key, found[0])
+            return found[0], True
+
+        # Miss: lock compute/write
+        lock = CacheLock(_lock_file_path(self.cache_dir, cache_key), timeout_sec=self.lock_timeout_sec)
+        lock.acquire()
+        self.stats.add(lock_acquisitions=1, lock_wait_sec=lock.wait_sec)
+        try:
+            # double-check after lock
+            found = self.store.get(cache_key)
+            if found is not None:
+                if verbose:
+                    print(f"[CACHE] hit-after-lock: {path.name} -> {found[1]}")
+                self.stats.add(hits=1, hits_after_lock=1)
+                self._record_access(cache_key)
+                if memory is not None:
+                    memory.put(self.cache_dir, cache_key, found[0])
+                return found[0], True
+
+            payload = compute_fn()
+            self.stats.add(misses=1)
+            location = self.store.put(cache_key, payload)
+            # commit before the lock is released: a buffered sqlite write would
+            # otherwise be invisible to another process's double-check
+            self.store.flush()
             if verbose:
-                print(f"[CACHE] broken cache ignored: {cpath} ({e})")
+                print(f"[CACHE] miss: computed -> {location}")
+            if self.access is not None:
+                self._record_access(cache_key, size=self.store.nbytes(cache_key), hit=False)
+            if memory is not None:
+                memory.put(self.cache_dir, cache_key, payload)
+            return payload, False
+        finally:
+            lock.release()
 
-    # Miss: lock compute/write
-    lock_path = _lock_file_path(cache_dir, cache_key)
-    _acquire_lock(lock_path, timeout_sec=lock_timeout_sec)
-    try:
-        # double-check after lock
-        if cpath.exists():
-            try:
-                payload = _load_payload_json(cpath)
-                if verbose:
-                    print(f"[CACHE] hit-after-lock: {path.name} -> {cpath.name}")
-                return payload, True
-            except Exception as e:
-                if verbose:
-                    print(f"[CACHE] broken cache after lock ignored: {cpath} ({e})")
 
-        payload = compute_fn()
-        _save_payload_json(cpath, payload)
-        if verbose:
-            print(f"[CACHE] miss: computed -> {cpath.name}")
-        return payload, False
-    finally:
-        _release_lock(lock_path)
+def get_or_compute_cached(
+    *,
+    path: Path,
+    cache_dir: Path,
+    config_hash: str,
+    compute_fn: Callable[[], LemmaCachePayload],
+    use_manifest: bool = True,
+    manifest_path: Optional[Path] = None,
+    manifest_key_mode: str = "absolute",  # "absolute" or "relative"
+    manifest_project_root: Optional[Path] = None,
+    verbose: bool = False,
+    lock_timeout_sec: float = 300.0,
+    use_memory_cache: bool = False,
+    track_access: bool = False,
+) -> tuple[CachePayload, bool]:
+    """
+    Return (payload, cache_hit) for a single file.
+
+    One-shot wrapper around LemmaCacheSession; use a session directly when
+    looking up many files so the manifest is read and written only once.
+    With use_memory_cache=True, repeated lookups in the same process are
+    served from shared_memory_cache() without reading the object again.
+    With track_access=True the lookup is recorded in access.sqlite for
+    prune_cache(max_bytes=...); off by default, unlike for sessions.
+    """
+    with LemmaCacheSession(
+        cache_dir,
+        config_hash=config_hash,
+        use_manifest=use_manifest,
+        manifest_path=manifest_path,
+        manifest_key_mode=manifest_key_mode,
+        manifest_project_root=manifest_project_root,
+        verbose=verbose,
+        lock_timeout_sec=lock_timeout_sec,
+        memory_cache=shared_memory_cache() if use_memory_cache else None,
+        track_access=track_access,
+    ) as session:
+        return session.get_or_compute(path, compute_fn)
 
 
 # ---------------------------------------------------------------------------
 # Payload I/O (JSON)
 # ---------------------------------------------------------------------------
 
-def _save_payload_json(path: Path, payload: LemmaCachePayload) -> None:
+def _payload_json_text(payload: LemmaCachePayload) -> str:
     obj = {
         "format": "count_corpus_vocabula.lemma_cache",
         "cache_version": CACHE_VERSION,
         "payload": payload.to_json_obj(),
     }
-    atomic_write_text(path, json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _encode_payload(payload: LemmaCachePayload, payload_format: str, *, compress: bool = False) -> tuple[str, bytes]:
+    """(format, bytes) as stored; binary falls back to JSON for NUL keys."""
+    if payload_format == "binary":
+        try:
+            return "binary", encode_payload_binary(payload, compress=compress)
+        except ValueError:
+            pass
+    return "json", _payload_json_text(payload).encode("utf-8")
+
+
+def _decode_payload(payload_format: str, data: bytes) -> CachePayload:
+    if payload_format == "binary":
+        return PackedLemmaCachePayload(data)
+    return _payload_from_json_obj(json.loads(data.decode("utf-8")))
+
+
+def _load_payload(path: Path) -> CachePayload:
+    if path.suffix == _PAYLOAD_SUFFIX["binary"]:
+        return PackedLemmaCachePayload(path.read_bytes())
+    return _load_payload_json(path)
 
 
 def _load_payload_json(path: Path) -> LemmaCachePayload:
-    obj = json.loads(path.read_text(encoding="utf-8"))
+    return _payload_from_json_obj(json.loads(path.read_text(encoding="utf-8")))
+
+
+def _payload_from_json_obj(obj: Any) -> LemmaCachePayload:
     if not isinstance(obj, dict):
         raise ValueError("cache file is not a JSON object")
     ver = obj.get("cache_version")
@@ -426,6 +2100,86 @@ class PruneReport:
     removed_locks: int
     removed_empty_dirs: int
     bytes_freed: int
+    # with max_bytes: indexed size of the objects left in the cache
+    bytes_kept: int = 0
+
+
+def _object_sizes(cache_dir: Path, keys: Iterable[str]) -> Dict[str, Optional[int]]:
+    files = FileObjectStore(cache_dir)
+    db = cache_dir / "objects.sqlite"
+    conn = sqlite3.connect(str(db)) if db.exists() else None
+    try:
+        sizes: Dict[str, Optional[int]] = {}
+        for key in keys:
+            n = files.nbytes(key)
+            if n is None and conn is not None:
+                row = conn.execute("SELECT length(data) FROM objects WHERE key = ?", (key,)).fetchone()
+                n = None if row is None else int(row[0])
+            if n is None:
+                try:
+                    n = _annotation_file_path(cache_dir, key).stat().st_size
+                except OSError:
+                    pass
+            sizes[key] = n
+        return sizes
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def _evict_to_budget(cache_dir: Path, max_bytes: int, *, verbose: bool) -> tuple[int, int, int, int]:
+    """
+    Delete least recently used objects (annotations included) until the
+    indexed total is at most max_bytes. Returns (removed objects, bytes
+    freed, bytes kept, removed dirs).
+    """
+    index = AccessIndex(cache_dir)
+    try:
+        if not index.scanned():
+            index.scan()
+        unsized = index.unsized_keys()
+        if unsized:
+            index.set_sizes(_object_sizes(cache_dir, unsized))
+
+        total = index.total_bytes()
+        victims: list[str] = []
+        freed = 0
+        if total > max_bytes:
+            for key, size in index.least_recent():
+                if total - freed <= max_bytes:
+                    break
+                victims.append(key)
+                freed += size
+
+        removed_dirs = 0
+        db = cache_dir / "objects.sqlite"
+        if victims and db.exists():
+            conn = sqlite3.connect(str(db), timeout=300.0, isolation_level=None)
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany("DELETE FROM objects WHERE key = ?", [(k,) for k in victims])
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+        for key in victims:
+            paths = [_cache_file_path(cache_dir, key, fmt) for fmt in PAYLOAD_FORMATS]
+            paths.append(_annotation_file_path(cache_dir, key))
+            for cpath in paths:
+                try:
+                    cpath.unlink()
+                except OSError:
+                    continue
+                try:
+                    cpath.parent.rmdir()
+                    removed_dirs += 1
+                except OSError:
+                    pass  # not empty
+            if verbose:
+                print(f"[PRUNE] evicted least recently used object: {key}")
+        index.remove(victims)
+        return len(victims), freed, total - freed, removed_dirs
+    finally:
+        index.close()
 
 
 def prune_cache(
@@ -435,19 +2189,28 @@ def prune_cache(
     keep_files: int = 50_000,
     lock_ttl_sec: int = 3600,
     verbose: bool = False,
+    max_bytes: Optional[int] = None,
 ) -> PruneReport:
     """
     Best-effort cache cleanup.
 
-    - objects: keep at most keep_files newest (mtime), and delete anything older than keep_days
+    - objects (and annotations): keep at most keep_files newest (mtime), and delete anything older than keep_days
     - locks: delete lockfiles older than lock_ttl_sec (stale locks)
-    - remove empty subdirs under objects/locks (tidy)
+    - remove empty subdirs under objects/annotations/locks (tidy)
 
     Note:
       This uses file mtime as a proxy for recency. It is simple and robust.
+
+    With max_bytes, objects are instead evicted in least-recently-used order
+    (from the AccessIndex that sessions update on every hit) until at most
+    max_bytes remain; keep_days / keep_files are not used and the object
+    tree is not walked (apart from a one-time scan of caches that predate
+    the index). This covers objects.sqlite too; its file only shrinks after
+    compact_cache().
     """
     cache_dir = cache_dir.resolve()
     objects_dir = cache_dir / "objects"
+    annotations_dir = cache_dir / "annotations"
     locks_dir = cache_dir / "locks"
 
     now = time.time()
@@ -463,7 +2226,7 @@ def prune_cache(
         for p in locks_dir.rglob("*.lock"):
             try:
                 st = p.stat()
-                if (now - st.st_mtime) > lock_ttl_sec:
+                if (now - st.st_mtime) > lock_ttl_sec and not _lock_is_held(p):
                     bytes_freed += st.st_size
                     p.unlink(missing_ok=True)
                     removed_locks += 1
@@ -474,11 +2237,27 @@ def prune_cache(
             except OSError:
                 continue
 
+    if max_bytes is not None:
+        removed_objects, freed, kept, removed_empty_dirs = _evict_to_budget(
+            cache_dir, max(0, int(max_bytes)), verbose=verbose
+        )
+        return PruneReport(
+            removed_objects=removed_objects,
+            removed_locks=removed_locks,
+            removed_empty_dirs=removed_empty_dirs,
+            bytes_freed=bytes_freed + freed,
+            bytes_kept=kept,
+        )
+
     # --- objects: prune by age + max files ---
+    removed_keys: list[str] = []
     object_files: list[Path] = []
-    if objects_dir.exists():
-        for p in objects_dir.rglob("*.json"):
-            if p.is_file():
+    for dirname, suffixes in _FILE_TIERS:
+        tier_dir = cache_dir / dirname
+        if not tier_dir.exists():
+            continue
+        for p in tier_dir.rglob("*"):
+            if p.suffix in suffixes and p.is_file():
                 object_files.append(p)
 
     # sort newest first by mtime
@@ -510,13 +2289,22 @@ def prune_cache(
                 bytes_freed += st.st_size
                 p.unlink(missing_ok=True)
                 removed_objects += 1
+                removed_keys.append(p.stem)
                 if verbose:
                     print(f"[PRUNE] removed old object: {p}")
             except OSError:
                 pass
 
+    # keep the access index in step with what was deleted
+    if removed_keys and (cache_dir / "access.sqlite").exists():
+        index = AccessIndex(cache_dir)
+        try:
+            index.remove(removed_keys)
+        finally:
+            index.close()
+
     # --- tidy empty dirs (bottom-up) ---
-    for base in (objects_dir, locks_dir):
+    for base in (objects_dir, annotations_dir, locks_dir):
         if not base.exists():
             continue
         # walk deepest-first
@@ -534,4 +2322,185 @@ def prune_cache(
         removed_locks=removed_locks,
         removed_empty_dirs=removed_empty_dirs,
         bytes_freed=bytes_freed,
-    )
\ No newline at end of file
+    )
+
+# ---------------------------------------------------------------------------
+# Garbage collection (mark and sweep)
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class GcReport:
+    removed_objects: int
+    kept_objects: int
+    bytes_freed: int
+    # by the config hash recorded in the access index ("unknown" if none)
+    bytes_freed_by_config: Dict[str, int]
+    removed_by_config: Dict[str, int]
+
+
+def manifest_content_hashes(cache_dir: Path) -> set[str]:
+    """
+    Content hashes known to the manifest(s) of a cache directory.
+    Raises ValueError if the directory has no manifest.
+    """
+    cache_dir = cache_dir.resolve()
+    json_path = cache_dir / "manifest.json"
+    sqlite_path = cache_dir / "manifest.sqlite"
+    if not json_path.exists() and not sqlite_path.exists():
+        raise ValueError(f"no manifest in {cache_dir}; pass content_hashes explicitly")
+
+    out: set[str] = set()
+    if json_path.exists():
+        out |= ContentHashManifest(json_path).content_hashes()
+    if sqlite_path.exists():
+        manifest = SqliteContentHashManifest(sqlite_path)
+        try:
+            out |= manifest.content_hashes()
+        finally:
+            manifest.close()
+    return out
+
+
+def live_config_hashes_from_run_meta(paths: Iterable[Path]) -> set[str]:
+    """
+    `lemma_cache.config_hash` of each run_meta.json, plus its
+    `annotation_hash` when the annotation tier was on (runs without a cache
+    are skipped).
+    """
+    out: set[str] = set()
+    for p in paths:
+        meta = json.loads(Path(p).read_text(encoding="utf-8"))
+        lc_meta = meta.get("lemma_cache") or {}
+        for name in ("config_hash", "annotation_hash"):
+            if lc_meta.get(name):
+                out.add(str(lc_meta[name]))
+    return out
+
+
+def _read_config_hashes(db_path: Path, keys: Iterable[str]) -> Dict[str, str]:
+    """AccessIndex.config_hashes() on a read-only connection; {} without an index."""
+    if not db_path.exists():
+        return {}
+    out: Dict[str, str] = {}
+    keys = list(keys)
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        for i in range(0, len(keys), 500):
+            batch = keys[i : i + 500]
+            out.update(
+                conn.execute(
+                    "SELECT key, config_hash FROM access WHERE config_hash IS NOT NULL"
+                    f" AND key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+            )
+    except sqlite3.OperationalError:
+        return {}  # index from before config hashes were kept
+    finally:
+        conn.close()
+    return out
+
+
+def gc_cache(
+    cache_dir: Path,
+    *,
+    live_config_hashes: Iterable[str],
+    content_hashes: Optional[Iterable[str]] = None,
+    dry_run: bool = False,
+    verbose: bool = False,
+) -> GcReport:
+    """
+    Delete every object that no current configuration can reach.
+
+    Mark: the live keys are all (content hash, config hash) pairs of
+    `content_hashes` (default: the manifest) and `live_config_hashes` (e.g.
+    from live_config_hashes_from_run_meta(), which includes annotation
+    hashes), under the current CACHE_VERSION. Sweep: one streaming pass over
+    objects/, annotations/ and objects.sqlite deletes the rest, including
+    objects of older cache versions and of configs no longer in use. With
+    dry_run=True nothing is deleted and the report shows what would be.
+    """
+    cache_dir = cache_dir.resolve()
+    if content_hashes is None:
+        content_hashes = manifest_content_hashes(cache_dir)
+    config_hashes = set(live_config_hashes)
+    live = {_make_cache_key(c, h) for c in set(content_hashes) for h in config_hashes}
+
+    dead: Dict[str, int] = {}
+    kept = 0
+
+    for dirname, suffixes in _FILE_TIERS:
+        tier_root = str(cache_dir / dirname)
+        for root, _dirs, files in os.walk(tier_root):
+            for name in files:
+                stem, suffix = os.path.splitext(name)
+                if suffix not in suffixes:
+                    continue
+                if stem in live:
+                    kept += 1
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    size = os.stat(path).st_size
+                    if not dry_run:
+                        os.unlink(path)
+                except OSError:
+                    continue
+                dead[stem] = dead.get(stem, 0) + size
+                if verbose:
+                    print(f"[GC] {'would remove' if dry_run else 'removed'} unreachable object: {path}")
+            if not dry_run and root != tier_root:
+                try:
+                    os.rmdir(root)
+                except OSError:
+                    pass  # not empty
+
+    db = cache_dir / "objects.sqlite"
+    if db.exists():
+        conn = _connect_sqlite_wal(db, timeout_sec=300.0)
+        try:
+            db_dead: list[str] = []
+            for key, size in conn.execute("SELECT key, length(data) FROM objects"):
+                if key in live:
+                    kept += 1
+                else:
+                    db_dead.append(key)
+                    dead[key] = dead.get(key, 0) + int(size)
+            if db_dead and not dry_run:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany("DELETE FROM objects WHERE key = ?", [(k,) for k in db_dead])
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            if verbose and db_dead:
+                print(f"[GC] {'would remove' if dry_run else 'removed'} {len(db_dead)} unreachable objects from {db.name}")
+        finally:
+            conn.close()
+
+    freed_by_config: Dict[str, int] = {}
+    removed_by_config: Dict[str, int] = {}
+    if dead:
+        if dry_run:
+            # report only: read the index if there is one, never create it
+            owners = _read_config_hashes(cache_dir / "access.sqlite", dead)
+        else:
+            index = AccessIndex(cache_dir)
+            try:
+                owners = index.config_hashes(dead)
+                index.remove(dead)
+            finally:
+                index.close()
+        for key, size in dead.items():
+            owner = owners.get(key, "unknown")
+            freed_by_config[owner] = freed_by_config.get(owner, 0) + size
+            removed_by_config[owner] = removed_by_config.get(owner, 0) + 1
+
+    return GcReport(
+        removed_objects=len(dead),
+        kept_objects=kept,
+        bytes_freed=sum(dead.values()),
+        bytes_freed_by_config=freed_by_config,
+        removed_by_config=removed_by_config,
+    )
@@ -2,22 +2,44 @@
 from __future__ import annotations
 
 from collections import Counter
-from typing import List
+from typing import Any, List
 
+from .io_utils import split_text_chunks
 
-def build_pipeline(language: str, stanza_package: str, cpu_only: bool):
+
+def build_pipeline(
+    language: str,
+    stanza_package: str,
+    cpu_only: bool,
+    *,
+    pretokenized: bool = False,
+    **stanza_kwargs: Any,
+):
     """
     Production pipeline builder (Stanza via nlpo_toolkit).
     Returns (nlp, package).
+
+    pretokenized=True builds a pipeline that takes one sentence per line with
+    space-separated tokens, so tokenization done by the sentence splitter is
+    reused instead of being run a second time.
+
+    Extra keyword arguments (e.g. tokenize_batch_size, pos_batch_size,
+    lemma_batch_size) are passed through build_stanza_pipeline to
+    stanza.Pipeline.
     """
+    processors = "tokenize,pos,lemma"
+
+    if pretokenized:
+        stanza_kwargs["tokenize_pretokenized"] = True
+
     from nlpo_toolkit.nlp import build_stanza_pipeline  # type: ignore
 
-    processors = "tokenize,pos,lemma"
     nlp = build_stanza_pipeline(
         lang=language,
         processors=processors,
         package=stanza_package,
         use_gpu=(not cpu_only),
+        **stanza_kwargs,
     )
     return nlp, stanza_package
 
@@ -27,9 +49,46 @@ def build_sentence_splitter(language: str, stanza_package: str, cpu_only: bool):
     # but runner will accept any callable. Default is "not provided".
     raise RuntimeError("build_sentence_splitter is optional and should not be required in tests")
 
+class _PrecomputedNLP:
+    """
+    Hands an already annotated document to count_nouns_streaming, so counting,
+    filtering and ref-tag handling stay in nlpo_toolkit. Any further call
+    (should the chunking differ) goes to the real pipeline.
+    """
+
+    def __init__(self, doc: Any, nlp: Any):
+        self._doc = doc
+        self._nlp = nlp
+
+    def __call__(self, text: str) -> Any:
+        doc, self._doc = self._doc, None
+        if doc is not None:
+            return doc
+        return self._nlp(text)
+
+
+def bulk_annotate(nlp, texts: List[str]) -> List[Any]:
+    """
+    Annotate several texts in one pipeline call (stanza's bulk_process batches
+    across documents). Falls back to one call per text for other backends.
+    The runner also uses it to batch cache misses across files.
+    """
+    bulk = getattr(nlp, "bulk_process", None)
+    if not callable(bulk):
+        return [nlp(t) for t in texts]
+
+    import stanza  # type: ignore
+
+    return list(bulk([stanza.Document([], text=t) for t in texts]))
+
+
 def count_group(text: str, nlp, **kwargs) -> Counter:
     """
     Production counter: count noun lemmas using nlpo_toolkit.
+
+    batch_docs > 1 switches to batched inference: the text is cut into
+    paragraph-aligned chunks of chunk_chars and batch_docs chunks are
+    annotated per pipeline call.
     """
     from nlpo_toolkit.nlp import count_nouns_streaming  # type: ignore
 
@@ -63,6 +122,36 @@ def count_group(text: str, nlp, **kwargs) -> Counter:
             if str(x).strip()
         }
 
+    count_kwargs = dict(
+        use_lemma=use_lemma,
+        upos_targets=upos_targets,
+        ref_tag_detector=ref_tag_detector,
+        ref_tag_counter=ref_tag_counter,
+        min_token_length=min_token_length,
+        drop_roman_numerals=drop_roman_numerals,
+    )
+
+    # batched path; trace rows are numbered per streaming call, so keep the
+    # unbatched path when tracing
+    batch_docs = int(kwargs.get("batch_docs", 1))
+    if batch_docs > 1 and trace_tsv is None:
+        total = Counter()
+        chunks = [c for c in split_text_chunks(text, max_chars=chunk_chars) if c.strip()]
+        for start in range(0, len(chunks), batch_docs):
+            batch = chunks[start:start + batch_docs]
+            docs = bulk_annotate(nlp, batch)
+            for i, (chunk, doc) in enumerate(zip(batch, docs), start=start):
+                total.update(
+                    count_nouns_streaming(
+                        chunk,
+                        _PrecomputedNLP(doc, nlp),
+                        chunk_chars=len(chunk) + 1,
+                        label=f"{label}#{i}",
+                        **count_kwargs,
+                    )
+                )
+        return total
+
     return count_nouns_streaming(
         text,
         nlp,
@@ -1,6 +1,14 @@
 from __future__ import annotations
 import unicodedata, re
-from typing import Dict, Any
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Any, Tuple, Union
+
+_PAD_CHARS = "()[]{}“”‘’'\"«»"
+
+_RE_PAD = re.compile(r'([()\[\]{}“”‘’\'"«»])')
+_RE_SPACES = re.compile(r'[ \t]+')
+
 
 
 def strip_diacritics(text: str) -> str:
@@ -36,7 +44,233 @@ def normalize_text(text: str, cfg: Dict[str, Any]) -> str:
     if norm_cfg.get("strip_diacritics", False):
         text = strip_diacritics(text)
 
-    text = re.sub(r'([()\[\]{}“”‘’\'"«»])', r' \1 ', text)
-    text = re.sub(r'[ \t]+', ' ', text)
+    text = _RE_PAD.sub(r' \1 ', text)
+    text = _RE_SPACES.sub(' ', text)
+
+    return text
+
+
+# ---------------------------------------------------------------------------
+# Compiled normalizer
+# ---------------------------------------------------------------------------
+
+_ASCII_PAD = [c for c in _PAD_CHARS if c.isascii()]
+
+# runs of non-ASCII characters: the only places diacritics can occur
+_RE_NON_ASCII = re.compile(r'[^\x00-\x7f]+')
+
+# above this share of non-ASCII characters one translate over the whole text
+# beats translating each non-ASCII run separately
+_DENSE_NON_ASCII = 1 / 40
+
+# same result as _RE_SPACES.sub(' ', ...) but does not match single spaces
+_RE_SPACE_RUNS = re.compile(r' [ \t]+|\t[ \t]*')
+
+
+def _strip_pad_char(ch: str, strip: bool) -> str:
+    t = strip_diacritics(ch) if strip else ch
+    return "".join(f" {c} " if c in _PAD_CHARS else c for c in t)
+
+
+@lru_cache(maxsize=None)
+def _build_non_ascii_table(strip: bool) -> Tuple[Union[int, str], ...]:
+    """
+    str.translate table for non-ASCII characters: diacritic stripping plus
+    bracket/quote padding.
+
+    Per-character mapping gives exactly strip_diacritics() over the whole
+    text: NFD decomposes each code point on its own, and canonical reordering
+    only moves combining marks, which are dropped anyway. Hangul syllables
+    decompose algorithmically, so they are listed explicitly.
+
+    The table is a tuple indexed by code point (identity entries are ints),
+    which str.translate looks up about twice as fast as a dict. Code points
+    past its end raise IndexError, which translate treats as "unchanged".
+    """
+    candidates = [c for c in _PAD_CHARS if not c.isascii()]
+    if strip:
+        candidates += [
+            chr(cp)
+            for cp in range(0x80, 0x110000)
+            if unicodedata.combining(chr(cp))
+            or 0xAC00 <= cp <= 0xD7A3
+            or unicodedata.decomposition(chr(cp))[:1] not in ("", "<")
+        ]
+
+    table: Dict[int, str] = {}
+    for ch in candidates:
+        cp = ord(ch)
+        mapped = _strip_pad_char(ch, strip)
+        if mapped != ch:
+            table[cp] = mapped
+    return tuple(table.get(cp, cp) for cp in range(max(table) + 1))
+
+
+def _collapse_spaces(text: str) -> str:
+    if "\t" in text:
+        return _RE_SPACE_RUNS.sub(' ', text)
+    # only spaces: halving runs with str.replace is much cheaper than a regex
+    while "  " in text:
+        text = text.replace("  ", " ")
+    return text
+
+
+class CompiledNormalizer:
+    """
+    normalize_text compiled once from the `normalization` config.
+
+    The config is read once, and the two slow steps of normalize_text are
+    replaced: diacritic stripping becomes a precomputed str.translate table
+    that is applied only to runs of non-ASCII characters (ASCII text cannot
+    carry diacritics), and the bracket/whitespace regexes become str.replace
+    calls. All remaining passes run at C speed. Output is identical to
+    normalize_text(text, cfg).
+    """
+
+    def __init__(self, cfg: Dict[str, Any]):
+        norm_cfg = cfg.get("normalization", {}) or {}
+        self._norm_cfg = dict(norm_cfg)
+        self.unicode_nf = norm_cfg.get("unicode_nf", None) or None
+        self.casefold = bool(norm_cfg.get("casefold", False))
+        self.normalize_ligatures = bool(norm_cfg.get("normalize_ligatures", False))
+        self.map_u_v = bool(norm_cfg.get("map_u_v", False))
+        self.map_i_j = bool(norm_cfg.get("map_i_j", False))
+        self.strip_diacritics = bool(norm_cfg.get("strip_diacritics", False))
+        self._table = _build_non_ascii_table(self.strip_diacritics)
+
+    def __reduce__(self):
+        # rebuild from config (the table is cached per process) instead of
+        # pickling it, e.g. when sent to pool workers
+        return (CompiledNormalizer, ({"normalization": self._norm_cfg},))
+
+    def _translate_run(self, m: re.Match) -> str:
+        return m.group().translate(self._table)
+
+    def __call__(self, text: str) -> str:
+        nf = self.unicode_nf
+        if nf and not unicodedata.is_normalized(nf, text):
+            text = unicodedata.normalize(nf, text)
+
+        if self.casefold:
+            text = text.casefold()
+        if self.normalize_ligatures:
+            text = text.replace("æ", "ae").replace("œ", "oe")
+        if self.map_u_v:
+            text = text.replace("v", "u")
+        if self.map_i_j:
+            text = text.replace("j", "i")
+
+        # padding of ASCII brackets/quotes; non-ASCII ones are in the table.
+        # Must run before the table so characters produced by stripping are
+        # not padded twice.
+        for c in _ASCII_PAD:
+            if c in text:
+                text = text.replace(c, f" {c} ")
+
+        if not text.isascii():
+            # UTF-8 length - char length ~ number of non-ASCII characters
+            extra = len(text.encode("utf-8", "surrogatepass")) - len(text)
+            if extra > len(text) * _DENSE_NON_ASCII:
+                text = text.translate(self._table)
+            else:
+                text = _RE_NON_ASCII.sub(self._translate_run, text)
+
+        return _collapse_spaces(text)
+
+
+# ---------------------------------------------------------------------------
+# Type-level normalization (normalization.mode: type)
+# ---------------------------------------------------------------------------
+
+NORMALIZATION_MODES = ("text", "type")
+
+# orthographic settings that type mode applies to counted keys instead of text
+_ORTHOGRAPHIC_KEYS = ("casefold", "normalize_ligatures", "map_u_v", "map_i_j", "strip_diacritics")
+
+
+def resolve_normalization_mode(cfg: Dict[str, Any]) -> str:
+    norm_cfg = cfg.get("normalization", {}) or {}
+    mode = str(norm_cfg.get("mode", "text")).strip().lower()
+    if mode not in NORMALIZATION_MODES:
+        raise ValueError(f"normalization.mode must be one of {NORMALIZATION_MODES}: {mode!r}")
+    return mode
+
+
+def split_normalization(cfg: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Returns (text_cfg, key_cfg): the `normalization` settings applied to the
+    text before annotation, and those applied to counted keys afterwards.
+    In text mode everything is text-level and key_cfg is empty.
+    """
+    norm_cfg = dict(cfg.get("normalization", {}) or {})
+    norm_cfg.pop("mode", None)
+    if resolve_normalization_mode(cfg) == "text":
+        return norm_cfg, {}
+    key_cfg = {k: norm_cfg.pop(k) for k in _ORTHOGRAPHIC_KEYS if k in norm_cfg}
+    return norm_cfg, key_cfg
+
+
+class KeyNormalizer:
+    """
+    The orthographic steps of normalize_text (casefold, ligatures, u/v, i/j,
+    diacritics, in that order) applied to single keys. Results are memoized
+    per distinct key, so a run pays once per type rather than per character
+    of text. `merged` counts keys that collided with another one.
+    """
+
+    def __init__(self, key_cfg: Dict[str, Any]):
+        self.casefold = bool(key_cfg.get("casefold", False))
+        self.normalize_ligatures = bool(key_cfg.get("normalize_ligatures", False))
+        self.map_u_v = bool(key_cfg.get("map_u_v", False))
+        self.map_i_j = bool(key_cfg.get("map_i_j", False))
+        self.strip_diacritics = bool(key_cfg.get("strip_diacritics", False))
+        self._memo: Dict[str, str] = {}
+        self.merged = 0
+
+    @property
+    def active(self) -> bool:
+        return (
+            self.casefold
+            or self.normalize_ligatures
+            or self.map_u_v
+            or self.map_i_j
+            or self.strip_diacritics
+        )
+
+    @property
+    def types(self) -> int:
+        """Distinct keys normalized so far."""
+        return len(self._memo)
+
+    def __call__(self, key: str) -> str:
+        out = self._memo.get(key)
+        if out is None:
+            out = key
+            if self.casefold:
+                out = out.casefold()
+            if self.normalize_ligatures:
+                out = out.replace("æ", "ae").replace("œ", "oe")
+            if self.map_u_v:
+                out = out.replace("v", "u")
+            if self.map_i_j:
+                out = out.replace("j", "i")
+            if self.strip_diacritics and not out.isascii():
+                out = strip_diacritics(out)
+            self._memo[key] = out
+        return out
 
-    return text
\ No newline at end of file
+    def apply(self, counts: Counter) -> Counter:
+        """Normalize every key; counts of keys that become equal are summed."""
+        if not self.active:
+            return counts
+        out: Counter = Counter()
+        get = out.get
+        for k, n in counts.items():
+            nk = self(k)
+            prev = get(nk)
+            if prev is None:
+                out[nk] = n
+            else:
+                out[nk] = prev + n
+                self.merged += 1
+        return out
@@ -3,7 +3,7 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 from collections import Counter
 
@@ -62,18 +62,195 @@ def load_ref_tag_patterns(path: Path) -> List[RefTagPattern]:
     return out
 
 
-def strip_and_count_ref_tags(text: str, patterns: Iterable[RefTagPattern]) -> tuple[str, Counter]:
+# ---------------------------------------------------------------------------
+# Combined matcher
+# ---------------------------------------------------------------------------
+
+try:  # Python 3.11+
+    from re import _constants as _sre_constants, _parser as _sre_parse
+except ImportError:  # pragma: no cover
+    import sre_constants as _sre_constants  # type: ignore[no-redef]
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+_DEFAULT_FLAGS = re.compile("").flags
+
+
+def _literal_text(p: RefTagPattern) -> Optional[str]:
+    """Return the string a pattern matches if it is a pure literal, else None."""
+    if p.compiled.flags != _DEFAULT_FLAGS:
+        return None
+    try:
+        parsed = _sre_parse.parse(p.regex)
+    except Exception:
+        return None
+    chars = []
+    for op, av in parsed:
+        if op is not _sre_constants.LITERAL:
+            return None
+        chars.append(chr(av))
+    return "".join(chars) or None
+
+
+def _trie_regex(words: Iterable[str]) -> str:
     """
-    Remove ref tags from text and count them.
+    Regex for a set of literals, factored as a trie so the engine follows one
+    branch per input position instead of trying every word. Where one word
+    is a prefix of another the rest is optional and greedy, so at a given
+    position the longest word matches first.
+    """
+    trie: Dict[str, dict] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end of a word
 
-    Returns: (cleaned_text, tag_counter)
+    def build(node: Dict[str, dict]) -> str:
+        alts = [re.escape(ch) + build(node[ch]) for ch in sorted(node) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if "" in node:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+def _order_conflict(earlier: str, later: str) -> bool:
+    """
+    True if one scan for both literals could match `later` where one subn
+    per pattern would already have removed `earlier`: `later` would either
+    start first and overlap it, or start at the same place and be longer.
+    """
+    if later.startswith(earlier):
+        return True
+    for k in range(1, len(later)):
+        m = min(len(later) - k, len(earlier))
+        if later[k : k + m] == earlier[:m]:
+            return True
+    return False
+
+
+class RefTagMatcher:
+    """
+    Ref tag patterns compiled into as few scans of the text as possible,
+    with the same result as one `subn` per pattern in file order.
+
+    Consecutive pure literals are merged into one alternation (a trie,
+    longest match first) as long as none of them could take a match away
+    from a literal listed before it (see _order_conflict). A conflicting
+    literal starts the next alternation; real regexes and literals with
+    whitespace (which could match the space left by an earlier removal) run
+    on their own. The steps then run in file order, so an abbreviation list
+    costs one scan per conflict-free run instead of one per entry.
+    """
+
+    def __init__(self, patterns: Iterable[RefTagPattern]):
+        self.patterns: List[RefTagPattern] = list(patterns)
+        # (regex, name, literal -> name for merged literals)
+        self.steps: List[Tuple[re.Pattern, str, Optional[Dict[str, str]]]] = self._compile()
+
+    @property
+    def combined(self) -> Optional[List[re.Pattern]]:
+        """The merged alternations, or None if every pattern runs on its own."""
+        merged = [regex for regex, _name, names in self.steps if names is not None]
+        return merged or None
+
+    def _compile(self) -> List[Tuple[re.Pattern, str, Optional[Dict[str, str]]]]:
+        runs: List[Any] = []  # RefTagPattern, or a literal -> name dict
+        for p in self.patterns:
+            lit = _literal_text(p)
+            # whitespace could match the space left by an earlier removal
+            if lit is None or any(ch.isspace() for ch in lit):
+                runs.append(p)
+                continue
+            run = runs[-1] if runs and isinstance(runs[-1], dict) else None
+            if run is not None and lit in run:
+                continue  # an earlier identical literal always wins
+            if run is None or any(_order_conflict(w, lit) for w in run):
+                run = {}
+                runs.append(run)
+            run[lit] = p.name
+
+        steps: List[Tuple[re.Pattern, str, Optional[Dict[str, str]]]] = []
+        for run in runs:
+            if isinstance(run, RefTagPattern):
+                steps.append((run.compiled, run.name, None))
+            elif len(run) == 1:
+                (lit, name), = run.items()
+                steps.append((re.compile(re.escape(lit)), name, None))
+            else:
+                steps.append((re.compile(_trie_regex(run)), "", run))
+        return steps
+
+    def strip_and_count(self, text: str) -> Tuple[str, Counter]:
+        c: Counter = Counter()
+        for regex, name, names in self.steps:
+            if names is None:
+                text, n = regex.subn(" ", text)
+                if n:
+                    c[name] += int(n)
+                continue
+
+            def repl(m: re.Match, names: Dict[str, str] = names) -> str:
+                c[names[m.group()]] += 1
+                return " "
+
+            text = regex.sub(repl, text)
+        return text, c
+
+    def __reduce__(self):
+        return (RefTagMatcher, (self.patterns,))
+
+
+class RefTagDetector:
+    """
+    Token-level ref tag classifier for `ref_tag_detector=` in counting.
+
+    Built from the pure-literal patterns of a ref tags file (e.g. ``cap``,
+    ``metaphys\\.``): keys are lowercased with trailing dots removed, so a
+    token is classified by one dict lookup. Calling it returns the pattern
+    name, or "" for ordinary tokens. Patterns that are real regexes cannot be
+    decided per token and are kept in `residual_patterns` for text stripping.
+    """
+
+    def __init__(self, patterns: Iterable[RefTagPattern]):
+        self.names: Dict[str, str] = {}
+        self.residual_patterns: List[RefTagPattern] = []
+        for p in patterns:
+            lit = _literal_text(p)
+            key = _detector_key(lit) if lit is not None else ""
+            if not key or any(ch.isspace() for ch in key):
+                self.residual_patterns.append(p)
+                continue
+            self.names.setdefault(key, p.name)
+
+    def __call__(self, token: str) -> str:
+        return self.names.get(_detector_key(token), "")
+
+
+def _detector_key(s: str) -> str:
+    return s.strip().lower().rstrip(".")
+
+
+def compile_ref_tag_matcher(patterns: Iterable[RefTagPattern]) -> RefTagMatcher:
+    """Compile loaded ref tag patterns into a single-scan matcher."""
+    return RefTagMatcher(patterns)
+
+
+def strip_and_count_ref_tags(
+    text: str,
+    patterns: Union[RefTagMatcher, Iterable[RefTagPattern]],
+) -> tuple[str, Counter]:
     """
-    c = Counter()
-    cleaned = text
+    Remove ref tags from text and count them.
 
-    for p in patterns:
-        cleaned, n = p.compiled.subn(" ", cleaned)
-        if n:
-            c[p.name] += int(n)
+    `patterns` is either the list from `load_ref_tag_patterns` or a matcher
+    from `compile_ref_tag_matcher` (compile once when stripping many texts).
 
-    return cleaned, c
+    Returns: (cleaned_text, tag_counter)
+    """
+    if not isinstance(patterns, RefTagMatcher):
+        patterns = RefTagMatcher(patterns)
+    return patterns.strip_and_count(text)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from .lemma_cache import hash_file_content
+from .ref_tags import (
+    RefTagDetector,
+    RefTagMatcher,
+    compile_ref_tag_matcher,
+    load_ref_tag_patterns,
+)
+from .wordlist_index import load_wordlist_index
+
+
+@dataclass(frozen=True)
+class RefTagResources:
+    """Compiled ref tag file: regex matcher and/or token detector (mode=token)."""
+    matcher: Optional[RefTagMatcher]
+    detector: Optional[RefTagDetector]
+
+
+@dataclass
+class RunContext:
+    """
+    Resources shared by every group of a run, loaded once before the group
+    loop. `load_sec` records how long each one took; names in `memo_hits`
+    were reused from an earlier run in the same process.
+    """
+    ref_tags: Optional[RefTagResources] = None
+    wordlist: Optional[FrozenSet[str]] = None
+    trace_kwargs: Dict[str, Any] = field(default_factory=dict)
+    load_sec: Dict[str, float] = field(default_factory=dict)
+    memo_hits: List[str] = field(default_factory=list)
+
+    def to_meta(self) -> Dict[str, Any]:
+        return {
+            "load_sec": {k: round(v, 6) for k, v in self.load_sec.items()},
+            "memo_hits": list(self.memo_hits),
+        }
+
+
+# (resource kind, file content sha256, options) -> loaded resource
+_MEMO: Dict[Tuple[str, str, str], Any] = {}
+
+
+def clear_memo() -> None:
+    _MEMO.clear()
+
+
+def load_ref_tag_resources(path: Path, *, mode: str = "regex") -> RefTagResources:
+    patterns = load_ref_tag_patterns(path)
+    detector = None
+    if mode == "token":
+        detector = RefTagDetector(patterns)
+        patterns = detector.residual_patterns
+    matcher = compile_ref_tag_matcher(patterns) if patterns else None
+    return RefTagResources(matcher=matcher, detector=detector)
+
+
+def load_wordlist(path: Path, *, index_dir: Optional[Path] = None) -> FrozenSet[str]:
+    """
+    One entry per line, surrounding whitespace stripped, blank lines skipped.
+    With index_dir the parsed set comes from a precompiled on-disk index.
+    """
+    return load_wordlist_index(path, index_dir=index_dir)
+
+
+def build_trace_kwargs(trace_cfg: Dict[str, Any], *, out_dir: Path, script_dir: Path) -> Dict[str, Any]:
+    """count_group_fn kwargs for trace.* (empty when tracing is disabled)."""
+    if not bool(trace_cfg.get("enabled", False)):
+        return {}
+
+    trace_path = Path(str(trace_cfg.get("path", out_dir / "trace.tsv")))
+    if not trace_path.is_absolute():
+        trace_path = (script_dir / trace_path).resolve()
+
+    return {
+        "trace_tsv": trace_path,
+        "trace_max_rows": int(trace_cfg.get("max_rows", 0)),
+        "trace_only_keys": set(trace_cfg.get("only_keys", []) or []),
+        "trace_write_truncation_marker": bool(
+            trace_cfg.get("write_truncation_marker", True)
+        ),
+    }
+
+
+def _load(
+    ctx: RunContext,
+    name: str,
+    path: Path,
+    options: str,
+    loader: Callable[[], Any],
+    *,
+    memoize: bool,
+) -> Any:
+    t0 = time.perf_counter()
+    if memoize:
+        key = (name, hash_file_content(path), options)
+        if key in _MEMO:
+            value = _MEMO[key]
+            ctx.memo_hits.append(name)
+        else:
+            value = _MEMO[key] = loader()
+    else:
+        value = loader()
+    ctx.load_sec[name] = time.perf_counter() - t0
+    return value
+
+
+def load_run_context(
+    *,
+    ref_path: Optional[Path],
+    ref_mode: str,
+    wordlist_path: Optional[Path],
+    wordlist_index_dir: Optional[Path] = None,
+    trace_cfg: Dict[str, Any],
+    out_dir: Path,
+    script_dir: Path,
+    memoize: bool = False,
+) -> RunContext:
+    """
+    Load ref tag patterns, the dictcheck wordlist and trace options once.
+
+    With memoize=True, files are keyed by content hash and their parsed form
+    is kept for later runs in the same process; editing a file invalidates it.
+    """
+    ctx = RunContext()
+
+    if ref_path is not None:
+        ctx.ref_tags = _load(
+            ctx, "ref_tags", ref_path, ref_mode,
+            lambda: load_ref_tag_resources(ref_path, mode=ref_mode),
+            memoize=memoize,
+        )
+
+    if wordlist_path is not None:
+        ctx.wordlist = _load(
+            ctx, "wordlist", wordlist_path, "",
+            lambda: load_wordlist(wordlist_path, index_dir=wordlist_index_dir),
+            memoize=memoize,
+        )
+
+    t0 = time.perf_counter()
+    ctx.trace_kwargs = build_trace_kwargs(trace_cfg, out_dir=out_dir, script_dir=script_dir)
+    ctx.load_sec["trace"] = time.perf_counter() - t0
+
+    return ctx
@@ -2,12 +2,39 @@ from __future__ import annotations
 
 import hashlib
 import json
+import multiprocessing
+import sys
+import time
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-from .io_utils import expand_globs, read_concat
-from .normalizer import normalize_text
+from .annotation_cache import (
+    AnnotationStore,
+    RecordingNLP,
+    RecordingSplitter,
+    ReplayNLP,
+    ReplaySplitter,
+    SplitText,
+    build_annotation_hash,
+)
+from .concordance import build_concordance
+from .key_filters import KeyFilter, build_key_filter
+from .io_utils import expand_globs, iter_text_chunks, read_concat, split_text_chunks
+from .lemma_cache import (
+    MANIFEST_BACKENDS,
+    OBJECT_STORES,
+    PAYLOAD_FORMATS,
+    LemmaCachePayload,
+    CacheStats,
+    LemmaCacheSession,
+    build_config_hash,
+    hash_file_content,
+    shared_memory_cache,
+)
+from .normalizer import CompiledNormalizer, KeyNormalizer, resolve_normalization_mode, split_normalization
 from .outputs import (
     build_run_meta,
     collect_runtime_environment,
@@ -15,7 +42,8 @@ from .outputs import (
     write_run_meta,
 )
 from .preprocess import expand_cleaned_dir_placeholders, run_preprocess_if_needed
-from .ref_tags import load_ref_tag_patterns, strip_and_count_ref_tags
+from .ref_tags import RefTagDetector, RefTagMatcher, strip_and_count_ref_tags
+from .run_context import load_run_context
 
 
 def _resolve_analysis_unit(cfg: Dict[str, Any]) -> tuple[str, bool, tuple[str, str]]:
@@ -51,6 +79,19 @@ def _resolve_analysis_unit(cfg: Dict[str, Any]) -> tuple[str, bool, tuple[str, s
 
     return unit, use_lemma, header
 
+
+def _resolve_upos_targets(cfg: Dict[str, Any], filters_cfg: Dict[str, Any]) -> frozenset[str]:
+    """
+    UPOS tags to count: filters.upos_targets, else a top-level upos_targets,
+    else NOUN.
+    """
+    raw = filters_cfg.get("upos_targets", cfg.get("upos_targets", ["NOUN"]))
+    if isinstance(raw, str):
+        raw = [raw]
+    if not isinstance(raw, list) or not all(isinstance(x, str) and x.strip() for x in raw) or not raw:
+        raise ValueError("upos_targets must be a non-empty list[str]")
+    return frozenset(x.strip().upper() for x in raw)
+
 def _format_normalization_kv(norm: dict) -> str:
     if not isinstance(norm, dict) or not norm:
         return "(none)"
@@ -74,6 +115,722 @@ def _format_normalization_kv(norm: dict) -> str:
 
     return " ".join(parts)
 
+@dataclass(frozen=True)
+class _LemmaCacheSettings:
+    cache_dir: Path
+    use_manifest: bool
+    manifest_key_mode: str
+    manifest_project_root: Path
+    lock_timeout_sec: float
+    include_ref_tags_in_config_hash: bool
+    processors: str
+    verbose: bool
+    flush_every: int = 1000
+    manifest_backend: str = "json"
+    payload_format: str = "json"
+    payload_compress: bool = False
+    object_store: str = "files"
+    commit_every: int = 256
+    memory_cache_bytes: int = 0
+    # threads for hashing inputs and decoding hits while planning
+    plan_workers: int = 8
+    # keep per-token annotations so filter changes are recounted without NLP
+    annotation_tier: bool = False
+
+
+def _open_cache_session(settings: _LemmaCacheSettings, config_hash: str) -> LemmaCacheSession:
+    return LemmaCacheSession(
+        settings.cache_dir,
+        config_hash=config_hash,
+        use_manifest=settings.use_manifest,
+        manifest_key_mode=settings.manifest_key_mode,
+        manifest_project_root=settings.manifest_project_root,
+        manifest_backend=settings.manifest_backend,
+        verbose=settings.verbose,
+        lock_timeout_sec=settings.lock_timeout_sec,
+        flush_every=settings.flush_every,
+        payload_format=settings.payload_format,
+        payload_compress=settings.payload_compress,
+        object_store=settings.object_store,
+        commit_every=settings.commit_every,
+        memory_cache=(
+            shared_memory_cache(settings.memory_cache_bytes)
+            if settings.memory_cache_bytes > 0
+            else None
+        ),
+    )
+
+
+def _resolve_lemma_cache_settings(
+    cfg: Dict[str, Any], script_dir: Path
+) -> Optional[_LemmaCacheSettings]:
+    """
+    Read the optional `lemma_cache:` block. Returns None when caching is disabled.
+    """
+    lc_cfg = cfg.get("lemma_cache") or {}
+    if not isinstance(lc_cfg, dict):
+        raise ValueError("lemma_cache must be a mapping")
+    if not bool(lc_cfg.get("enabled", False)):
+        return None
+
+    manifest_backend = str(lc_cfg.get("manifest_backend", "json")).strip().lower()
+    if manifest_backend not in MANIFEST_BACKENDS:
+        raise ValueError(f"lemma_cache.manifest_backend must be one of {MANIFEST_BACKENDS}")
+    payload_format = str(lc_cfg.get("payload_format", "json")).strip().lower()
+    if payload_format not in PAYLOAD_FORMATS:
+        raise ValueError(f"lemma_cache.payload_format must be one of {PAYLOAD_FORMATS}")
+    object_store = str(lc_cfg.get("object_store", "files")).strip().lower()
+    if object_store not in OBJECT_STORES:
+        raise ValueError(f"lemma_cache.object_store must be one of {OBJECT_STORES}")
+
+    memory_cache_mb = float(lc_cfg.get("memory_cache_mb", 0))
+    if memory_cache_mb < 0:
+        raise ValueError("lemma_cache.memory_cache_mb must be >= 0")
+
+    cache_dir = Path(str(lc_cfg.get("dir", ".lemma_cache")))
+    if not cache_dir.is_absolute():
+        cache_dir = (script_dir / cache_dir).resolve()
+
+    return _LemmaCacheSettings(
+        cache_dir=cache_dir,
+        use_manifest=bool(lc_cfg.get("use_manifest", True)),
+        manifest_key_mode=str(lc_cfg.get("manifest_key_mode", "absolute")),
+        manifest_project_root=script_dir.resolve(),
+        lock_timeout_sec=float(lc_cfg.get("lock_timeout_sec", 300.0)),
+        include_ref_tags_in_config_hash=bool(lc_cfg.get("include_ref_tags_in_config_hash", True)),
+        processors=str(lc_cfg.get("processors", "tokenize,pos,lemma")),
+        verbose=bool(lc_cfg.get("verbose", False)),
+        flush_every=int(lc_cfg.get("manifest_flush_every", 1000)),
+        manifest_backend=manifest_backend,
+        payload_format=payload_format,
+        payload_compress=bool(lc_cfg.get("payload_compress", False)),
+        object_store=object_store,
+        commit_every=int(lc_cfg.get("commit_every", 256)),
+        memory_cache_bytes=int(memory_cache_mb * 1024 * 1024),
+        plan_workers=max(1, int(lc_cfg.get("plan_workers", 8))),
+        annotation_tier=bool(lc_cfg.get("annotation_tier", False)),
+    )
+
+
+def _package_version(dist: str) -> Optional[str]:
+    try:
+        from importlib.metadata import version
+
+        return version(dist)
+    except Exception:
+        return None
+
+
+def _lemma_cache_config_hash(
+    *,
+    settings: _LemmaCacheSettings,
+    normalization: Dict[str, Any],
+    language: str,
+    package: str,
+    use_lemma: bool,
+    ref_path: Optional[Path],
+    min_token_length: int,
+    drop_roman_numerals: bool,
+    roman_exceptions_file: Optional[Path],
+    use_sentence_splitter: bool,
+    reuse_tokens: bool = False,
+    ref_mode: str = "regex",
+    upos_targets: frozenset[str] = frozenset({"NOUN"}),
+) -> str:
+    """
+    Everything that changes the per-file counts goes into the hash, so a config
+    edit invalidates exactly the objects it affects.
+    """
+    roman_hash = None
+    if roman_exceptions_file is not None:
+        roman_hash = (
+            hash_file_content(roman_exceptions_file)
+            if roman_exceptions_file.exists()
+            else "MISSING"
+        )
+
+    return build_config_hash(
+        stanza_model=package,
+        lang=language,
+        processors=settings.processors,
+        use_lemma=use_lemma,
+        upos_targets=set(upos_targets),
+        ref_tags_file=ref_path,
+        include_ref_tags_in_config_hash=settings.include_ref_tags_in_config_hash,
+        extra={
+            "normalization": normalization,
+            "min_token_length": min_token_length,
+            "drop_roman_numerals": drop_roman_numerals,
+            "roman_exceptions_hash": roman_hash,
+            "sentence_splitter": use_sentence_splitter,
+            "reuse_tokens": reuse_tokens,
+            "ref_tags_mode": ref_mode,
+            "stanza_version": _package_version("stanza"),
+            "nlpo_toolkit_version": _package_version("nlpo_toolkit"),
+        },
+    )
+
+
+def _annotation_config_hash(
+    *,
+    settings: _LemmaCacheSettings,
+    normalization: Dict[str, Any],
+    language: str,
+    package: str,
+    ref_path: Optional[Path],
+    use_sentence_splitter: bool,
+    reuse_tokens: bool,
+    ref_mode: str,
+    chunking: Dict[str, Any],
+) -> str:
+    """
+    Settings of the annotation tier: only what changes the pipeline or the
+    text it is given. Filters and the analysis unit are applied afterwards.
+    """
+    return build_annotation_hash(
+        stanza_model=package,
+        lang=language,
+        processors=settings.processors,
+        ref_tags_file=ref_path,
+        include_ref_tags_in_config_hash=settings.include_ref_tags_in_config_hash,
+        extra={
+            "normalization": normalization,
+            "sentence_splitter": use_sentence_splitter,
+            "reuse_tokens": reuse_tokens,
+            "ref_tags_mode": ref_mode,
+            "chunking": chunking,
+            "stanza_version": _package_version("stanza"),
+            "nlpo_toolkit_version": _package_version("nlpo_toolkit"),
+        },
+    )
+
+
+def _sentence_tokens(sent: Any) -> str:
+    toks = getattr(sent, "tokens", None) or getattr(sent, "words", None)
+    if toks:
+        return " ".join(t.text for t in toks if getattr(t, "text", None))
+    return " ".join(str(getattr(sent, "text", "") or "").split())
+
+
+def _join_sentences(doc: Any, reuse_tokens: bool) -> str:
+    """Splitter result as text for the pipeline, one sentence per line."""
+    if isinstance(doc, SplitText):
+        return doc.text
+    sentences = getattr(doc, "sentences", [])
+    if reuse_tokens:
+        return "\n".join(_sentence_tokens(s) for s in sentences)
+    return "\n".join([s.text for s in sentences])
+
+
+def _prepare_text(
+    text: str,
+    *,
+    normalizer: Callable[[str], str],
+    splitter_nlp: Any,
+    ref_matcher: Optional[RefTagMatcher],
+    reuse_tokens: bool = False,
+) -> tuple[str, Counter]:
+    """
+    Sentence split (optional) -> normalization -> ref-tag stripping.
+    Returns (text_for_counting, ref_tag_counter).
+
+    With reuse_tokens the splitter's tokenization is kept: one sentence per
+    line, tokens separated by single spaces, ready for a pretokenized pipeline.
+    Normalization and ref-tag stripping then run before the split, so the
+    patterns see the original spacing and punctuation, as without reuse_tokens.
+    """
+    reuse = splitter_nlp is not None and reuse_tokens
+    if reuse:
+        text, ref_counter = _clean_text(text, normalizer=normalizer, ref_matcher=ref_matcher)
+
+    if splitter_nlp is not None:
+        joined = _join_sentences(splitter_nlp(text), reuse_tokens)
+        if not joined.strip():
+            joined = text
+    else:
+        joined = text
+
+    if not reuse:
+        joined, ref_counter = _clean_text(joined, normalizer=normalizer, ref_matcher=ref_matcher)
+    return joined, ref_counter
+
+
+def _clean_text(
+    text: str,
+    *,
+    normalizer: Callable[[str], str],
+    ref_matcher: Optional[RefTagMatcher],
+) -> tuple[str, Counter]:
+    # normalization (config-driven)
+    text = normalizer(text)
+
+    ref_counter = Counter()
+    if ref_matcher is not None:
+        text, ref_counter = strip_and_count_ref_tags(text, ref_matcher)
+
+    return text, ref_counter
+
+
+@dataclass
+class _CountContext:
+    """
+    Run-wide state needed to count a task. In parallel mode every worker holds
+    its own copy with its own pipelines.
+    """
+    normalizer: CompiledNormalizer
+    count_group_fn: Callable[..., Counter]
+    cache_settings: Optional[_LemmaCacheSettings]
+    cache_config_hash: str
+    # input.streaming: count files chunk by chunk instead of concatenating them
+    stream_chunk_chars: Optional[int] = None
+    # sentence_split.reuse_tokens: splitter tokens feed a pretokenized pipeline
+    reuse_tokens: bool = False
+    nlp: Any = None
+    splitter_nlp: Any = None
+    # per process, like the pipelines; opened by run() or _init_worker
+    cache_session: Optional[LemmaCacheSession] = None
+    # lemma_cache.annotation_tier: per-token annotations under the cache dir
+    annotation_store: Optional[AnnotationStore] = None
+    # (nlp, texts) -> docs in one pipeline call; batches cache misses across files
+    bulk_annotate_fn: Optional[Callable[[Any, List[str]], List[Any]]] = None
+
+
+@dataclass
+class _CountTask:
+    group: str
+    files: List[Path]
+    count_kwargs: Dict[str, Any]
+    ref_matcher: Optional[RefTagMatcher]
+    # ref_tags.mode=token: literal tags are classified per token while counting
+    ref_detector: Optional[RefTagDetector] = None
+
+
+@dataclass
+class _CountResult:
+    counts: Counter = field(default_factory=Counter)
+    ref_tags: Counter = field(default_factory=Counter)
+    # cache counters of the worker that ran the task (None when serial)
+    cache_stats: Optional[CacheStats] = None
+    # new manifest entries computed in a worker, flushed by the parent
+    manifest_updates: Dict[str, Any] = field(default_factory=dict)
+
+
+def _count_text(ctx: _CountContext, task: _CountTask, text: str, ref_tags: Counter, **kwargs: Any) -> Counter:
+    """
+    Call count_group_fn on prepared text. With a token-level detector, the
+    tags it finds are added to `ref_tags` by the counting function itself.
+    """
+    count_kwargs = dict(task.count_kwargs, **kwargs)
+    if task.ref_detector is not None:
+        count_kwargs["ref_tag_detector"] = task.ref_detector
+        count_kwargs["ref_tag_counter"] = ref_tags
+    return ctx.count_group_fn(text, ctx.nlp, **count_kwargs)
+
+
+def _count_file_streaming(ctx: _CountContext, task: _CountTask, path: Path) -> tuple[Counter, Counter]:
+    """
+    Count one file chunk by chunk: every stage (split, normalize, ref tags,
+    count) only ever sees one bounded, paragraph-aligned chunk.
+    """
+    assert ctx.stream_chunk_chars is not None
+    counts = Counter()
+    ref_tags = Counter()
+    for i, chunk in enumerate(iter_text_chunks(path, max_chars=ctx.stream_chunk_chars)):
+        text, chunk_refs = _prepare_text(
+            chunk,
+            normalizer=ctx.normalizer,
+            splitter_nlp=ctx.splitter_nlp,
+            ref_matcher=task.ref_matcher,
+            reuse_tokens=ctx.reuse_tokens,
+        )
+        ref_tags.update(chunk_refs)
+        counts.update(_count_text(ctx, task, text, ref_tags, label=f"{path.name}#{i}"))
+    return counts, ref_tags
+
+
+def _count_task(ctx: _CountContext, task: _CountTask) -> _CountResult:
+    res = _CountResult()
+
+    if ctx.cache_settings is None and ctx.stream_chunk_chars is not None:
+        for fpath in task.files:
+            # like read_concat: an unreadable file is reported and skipped as a whole
+            try:
+                counts, ref_tags = _count_file_streaming(ctx, task, fpath)
+            except (OSError, UnicodeError) as e:
+                print(f"[WARN] failed to read {fpath}: {e}", file=sys.stderr)
+                continue
+            res.counts.update(counts)
+            res.ref_tags.update(ref_tags)
+        return res
+
+    if ctx.cache_settings is None:
+        whole = read_concat(task.files)
+        joined, res.ref_tags = _prepare_text(
+            whole,
+            normalizer=ctx.normalizer,
+            splitter_nlp=ctx.splitter_nlp,
+            ref_matcher=task.ref_matcher,
+            reuse_tokens=ctx.reuse_tokens,
+        )
+        res.counts = _count_text(ctx, task, joined, res.ref_tags)
+        return res
+
+    # per-file counting through the content-addressed cache
+    session = ctx.cache_session
+    assert session is not None, "cache session not opened"
+    for files, file_ctx in _miss_windows(ctx, task):
+        for fpath in files:
+
+            def compute(fpath: Path = fpath, file_ctx: _CountContext = file_ctx) -> LemmaCachePayload:
+                if file_ctx.annotation_store is not None:
+                    return _count_file_annotated(file_ctx, task, fpath)
+                return _count_file(file_ctx, task, fpath)
+
+            payload, _hit = session.get_or_compute(fpath, compute)
+            payload.merge_into(res.counts, res.ref_tags)
+
+    return res
+
+
+class _Prefetched:
+    """
+    Serves calls from results computed ahead of time, by input text and in
+    call order; any other call goes to the wrapped pipeline (or splitter).
+    Like RecordingNLP, bulk_process is offered when the wrapped one has it.
+    """
+
+    def __init__(self, fn: Any, results: Dict[str, List[Any]]):
+        self._fn = fn
+        self._results = results
+        if callable(getattr(fn, "bulk_process", None)):
+            self.bulk_process = self._bulk_process
+
+    def _take(self, text: str) -> Any:
+        queue = self._results.get(text)
+        return queue.pop(0) if queue else None
+
+    def __call__(self, text: str) -> Any:
+        doc = self._take(text)
+        return doc if doc is not None else self._fn(text)
+
+    def _bulk_process(self, docs: Any) -> List[Any]:
+        docs = list(docs)
+        out = [self._take(str(getattr(src, "text", "") or "")) for src in docs]
+        rest = [src for src, doc in zip(docs, out) if doc is None]
+        computed = iter(self._fn.bulk_process(rest) if rest else ())
+        return [doc if doc is not None else next(computed) for doc in out]
+
+
+def _miss_windows(ctx: _CountContext, task: _CountTask) -> Iterator[tuple[List[Path], _CountContext]]:
+    """
+    Cross-file batching of cache misses. The files are prepared in windows
+    of at least batch_docs chunks (cut like count_group_fn cuts them) and the
+    chunks of a window are annotated together, batch_docs per
+    bulk_annotate_fn call, so many small files no longer mean many small
+    pipeline calls. Each window comes with a context whose pipeline and
+    splitter hand out these results first.
+
+    Yields (task.files, ctx) as is when there is nothing to batch across.
+    """
+    batch_docs = int(task.count_kwargs.get("batch_docs", 1))
+    if (
+        ctx.bulk_annotate_fn is None
+        or batch_docs <= 1
+        or len(task.files) <= 1
+        or ctx.stream_chunk_chars is not None
+        # count_group_fn does not batch while tracing
+        or task.count_kwargs.get("trace_tsv") is not None
+    ):
+        yield task.files, ctx
+        return
+
+    chunk_chars = int(task.count_kwargs.get("chunk_chars", 200_000))
+    session = ctx.cache_session
+    store = ctx.annotation_store
+    splitter = ctx.splitter_nlp
+
+    window: List[Path] = []
+    chunks: List[str] = []
+    splits: Dict[str, List[Any]] = {}
+
+    def split(text: str) -> Any:
+        doc = splitter(text)
+        splits.setdefault(text, []).append(doc)
+        return doc
+
+    def annotated() -> _CountContext:
+        docs: Dict[str, List[Any]] = {}
+        for start in range(0, len(chunks), batch_docs):
+            batch = chunks[start : start + batch_docs]
+            for chunk, doc in zip(batch, ctx.bulk_annotate_fn(ctx.nlp, batch)):
+                docs.setdefault(chunk, []).append(doc)
+        return replace(
+            ctx,
+            nlp=_Prefetched(ctx.nlp, docs),
+            splitter_nlp=_Prefetched(splitter, splits) if splitter is not None else None,
+        )
+
+    for fpath in task.files:
+        window.append(fpath)
+        # stored annotations are replayed, not annotated again
+        if store is not None and session is not None and store.contains(session.content_hash(fpath)):
+            continue
+        text, _refs = _prepare_text(
+            fpath.read_text(encoding="utf-8"),
+            normalizer=ctx.normalizer,
+            splitter_nlp=split if splitter is not None else None,
+            ref_matcher=task.ref_matcher,
+            reuse_tokens=ctx.reuse_tokens,
+        )
+        chunks.extend(c for c in split_text_chunks(text, max_chars=chunk_chars) if c.strip())
+        if len(chunks) >= batch_docs:
+            yield window, annotated()
+            window, chunks, splits = [], [], {}
+
+    if window:
+        yield window, annotated()
+
+
+def _count_file(ctx: _CountContext, task: _CountTask, fpath: Path) -> LemmaCachePayload:
+    if ctx.stream_chunk_chars is not None:
+        file_counts, file_refs = _count_file_streaming(ctx, task, fpath)
+        return LemmaCachePayload(lemmas=file_counts, ref_tags=file_refs)
+
+    text, file_refs = _prepare_text(
+        fpath.read_text(encoding="utf-8"),
+        normalizer=ctx.normalizer,
+        splitter_nlp=ctx.splitter_nlp,
+        ref_matcher=task.ref_matcher,
+        reuse_tokens=ctx.reuse_tokens,
+    )
+    file_counts = _count_text(ctx, task, text, file_refs, label=fpath.name)
+    return LemmaCachePayload(lemmas=Counter(file_counts), ref_tags=file_refs)
+
+
+def _count_file_annotated(ctx: _CountContext, task: _CountTask, fpath: Path) -> LemmaCachePayload:
+    """
+    Count one file through the annotation tier: stored annotations (and the
+    sentence splits) are replayed to count_group_fn in place of the pipeline
+    and the splitter, so only the filters run again. Without (usable)
+    annotations the file is counted through both and what they returned is
+    stored for next time.
+    """
+    session = ctx.cache_session
+    store = ctx.annotation_store
+    assert session is not None and store is not None
+    content_hash = session.content_hash(fpath)
+
+    def join(doc: Any) -> str:
+        return _join_sentences(doc, ctx.reuse_tokens)
+
+    key = store.key(content_hash)
+    stored = store.get(content_hash)
+    if stored is not None:
+        replay = ReplayNLP(stored, ctx.nlp)
+        split_replay = None
+        if ctx.splitter_nlp is not None:
+            split_replay = ReplaySplitter(stored, ctx.splitter_nlp, join)
+        payload = _count_file(replace(ctx, nlp=replay, splitter_nlp=split_replay), task, fpath)
+        if replay.complete and (split_replay is None or split_replay.complete):
+            session.stats.add(annotation_hits=1)
+            session.record_annotation_access(key, annotation_hash=store.annotation_hash)
+            return payload
+        if session.verbose:
+            print(f"[CACHE] annotation does not match the pipeline calls, re-annotating: {fpath}")
+
+    recorder = RecordingNLP(ctx.nlp)
+    splitter = None
+    if ctx.splitter_nlp is not None:
+        splitter = RecordingSplitter(ctx.splitter_nlp, recorder.payload, join)
+    payload = _count_file(replace(ctx, nlp=recorder, splitter_nlp=splitter), task, fpath)
+    nbytes = store.put(content_hash, recorder.payload)
+    session.stats.add(annotation_misses=1, bytes_written=nbytes)
+    session.record_annotation_access(key, annotation_hash=store.annotation_hash, size=nbytes, hit=False)
+    return payload
+
+
+# ---------------------------------------------------------------------------
+# Process pool (parallel: {workers: N})
+# ---------------------------------------------------------------------------
+
+_WORKER_CTX: Optional[_CountContext] = None
+
+
+def _init_worker(
+    ctx: _CountContext,
+    build_pipeline_fn: Callable[..., Tuple[Any, str]],
+    build_sentence_splitter_fn: Optional[Callable[..., Any]],
+    language: str,
+    stanza_package: str,
+    cpu_only: bool,
+    use_sentence_splitter: bool,
+    pipeline_kwargs: Dict[str, Any],
+) -> None:
+    """
+    Build one pipeline per worker process (models are loaded once, not per task).
+    """
+    global _WORKER_CTX
+    ctx.nlp, package = build_pipeline_fn(language, stanza_package, cpu_only, **pipeline_kwargs)
+    ctx.splitter_nlp = None
+    if use_sentence_splitter and build_sentence_splitter_fn is not None:
+        ctx.splitter_nlp = build_sentence_splitter_fn(
+            language,
+            stanza_package=package,
+            cpu_only=cpu_only,
+        )
+    if ctx.cache_settings is not None:
+        ctx.cache_session = _open_cache_session(ctx.cache_settings, ctx.cache_config_hash)
+    _WORKER_CTX = ctx
+
+
+def _run_worker_task(task: _CountTask) -> _CountResult:
+    assert _WORKER_CTX is not None, "worker not initialized"
+    res = _count_task(_WORKER_CTX, task)
+    session = _WORKER_CTX.cache_session
+    if session is not None:
+        # a worker has no exit hook: commit its objects before returning
+        session.store.flush()
+        if session.access is not None:
+            session.access.flush()
+        if session.manifest is not None:
+            res.manifest_updates = session.manifest.take_dirty()
+        res.cache_stats = session.stats.take()
+    return res
+
+
+def _build_splitter(
+    build_sentence_splitter_fn: Optional[Callable[..., Any]],
+    language: str,
+    package: str,
+    cpu_only: bool,
+) -> Any:
+    """The optional sentence splitter, or None if there is none or it fails to build."""
+    if build_sentence_splitter_fn is None:
+        return None
+    try:
+        return build_sentence_splitter_fn(language, stanza_package=package, cpu_only=cpu_only)
+    except Exception:
+        return None
+
+
+def _resolve_reuse_tokens(cfg: Dict[str, Any]) -> bool:
+    ss = cfg.get("sentence_split") or {}
+    if not isinstance(ss, dict):
+        raise ValueError("sentence_split must be a mapping")
+    return bool(ss.get("reuse_tokens", False))
+
+
+_STANZA_BATCH_KEYS = ("tokenize_batch_size", "pos_batch_size", "lemma_batch_size")
+
+
+def _resolve_batching(cfg: Dict[str, Any]) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Returns (pipeline_kwargs, count_kwargs) for batched Stanza inference.
+    Both are empty when the `batching:` block is absent.
+    """
+    b = cfg.get("batching") or {}
+    if not isinstance(b, dict):
+        raise ValueError("batching must be a mapping")
+
+    pipeline_kwargs: Dict[str, Any] = {}
+    for k in _STANZA_BATCH_KEYS:
+        if b.get(k) is not None:
+            pipeline_kwargs[k] = int(b[k])
+
+    count_kwargs: Dict[str, Any] = {}
+    if b.get("docs_per_batch") is not None:
+        count_kwargs["batch_docs"] = int(b["docs_per_batch"])
+    if b.get("chunk_chars") is not None:
+        count_kwargs["chunk_chars"] = int(b["chunk_chars"])
+
+    return pipeline_kwargs, count_kwargs
+
+
+def _resolve_streaming(cfg: Dict[str, Any]) -> Optional[int]:
+    """
+    Returns the chunk size for streaming input, or None when disabled.
+    """
+    inp = cfg.get("input") or {}
+    if not isinstance(inp, dict):
+        raise ValueError("input must be a mapping")
+    if not bool(inp.get("streaming", False)):
+        return None
+    chunk_chars = int(inp.get("chunk_chars", 200_000))
+    if chunk_chars <= 0:
+        raise ValueError("input.chunk_chars must be > 0")
+    return chunk_chars
+
+
+def _resolve_key_filter(filters_cfg: Dict[str, Any], script_dir: Path, *, stage: str) -> Optional[KeyFilter]:
+    """
+    Filters applied to the merged counts, or None when there are none.
+
+    With stage="post", min_token_length, drop_roman_numerals and the
+    exclusion list all run here instead of inside count_group_fn. With the
+    default stage="count", only filters.exclude_file does.
+    """
+    def path_of(key: str) -> Optional[Path]:
+        value = filters_cfg.get(key)
+        if not value:
+            return None
+        p = Path(str(value))
+        return p if p.is_absolute() else (script_dir / p).resolve()
+
+    exclude_file = path_of("exclude_file")
+    if exclude_file is not None and not exclude_file.exists():
+        raise FileNotFoundError(f"filters.exclude_file not found: {exclude_file}")
+
+    if stage == "count":
+        # the exclusion list only exists as a post-count filter
+        return build_key_filter(exclude_file=exclude_file) if exclude_file is not None else None
+
+    return build_key_filter(
+        min_token_length=int(filters_cfg.get("min_token_length", 0)),
+        drop_roman_numerals=bool(filters_cfg.get("drop_roman_numerals", False)),
+        roman_exceptions_file=path_of("roman_exceptions_file"),
+        exclude_file=exclude_file,
+    )
+
+
+def _resolve_concordance(
+    cfg: Dict[str, Any], out_dir: Path, cache_settings: Optional[_LemmaCacheSettings]
+) -> Optional[Path]:
+    """
+    Returns the index path of the `concordance:` block, or None when disabled.
+    The index is built from stored annotations, so the annotation tier is required.
+    """
+    conc = cfg.get("concordance") or {}
+    if not isinstance(conc, dict):
+        raise ValueError("concordance must be a mapping")
+    if not bool(conc.get("enabled", False)):
+        return None
+    if cache_settings is None or not cache_settings.annotation_tier:
+        raise ValueError(
+            "concordance.enabled=true requires lemma_cache.enabled=true and lemma_cache.annotation_tier=true"
+        )
+    path = Path(str(conc.get("path", "concordance.sqlite")))
+    if not path.is_absolute():
+        path = out_dir / path
+    return path
+
+
+def _resolve_parallel(cfg: Dict[str, Any]) -> tuple[int, str, Optional[str]]:
+    """
+    Returns (workers, unit, start_method). workers <= 1 means serial.
+    """
+    par = cfg.get("parallel") or {}
+    if not isinstance(par, dict):
+        raise ValueError("parallel must be a mapping")
+
+    workers = int(par.get("workers", 1))
+    unit = str(par.get("unit", "files")).strip().lower()
+    if unit not in {"files", "groups"}:
+        raise ValueError("parallel.unit must be 'files' or 'groups'")
+
+    start_method = par.get("start_method")
+    return workers, unit, (str(start_method) if start_method else None)
+
+
 def run(
     *,
     script_dir: Path,
@@ -84,6 +841,7 @@ def run(
     build_sentence_splitter_fn: Optional[Callable[..., Any]],
     count_group_fn: Callable[..., Counter],
     render_stanza_package_table_fn: Callable[..., List[str]],
+    bulk_annotate_fn: Optional[Callable[[Any, List[str]], List[Any]]] = None,
 ) -> int:
     """
     Core runner. Dependencies are injectable so tests can monkeypatch:
@@ -93,6 +851,7 @@ def run(
       - build_sentence_splitter_fn
       - count_group_fn
       - render_stanza_package_table_fn
+      - bulk_annotate_fn (optional; batches lemma cache misses across files)
     """
 
     if not config_path.exists():
@@ -117,31 +876,96 @@ def run(
     # analysis unit (lemma / surface)
     unit, use_lemma, csv_header = _resolve_analysis_unit(cfg)
 
-    # build NLP
-    nlp, package = build_pipeline_fn(language, stanza_package, cpu_only)
+    # normalization.mode=type: orthographic steps go to the counted keys
+    norm_mode = resolve_normalization_mode(cfg)
+    text_norm, key_norm = split_normalization(cfg)
+    key_normalizer = KeyNormalizer(key_norm) if key_norm else None
 
-    # sentence splitter is optional
-    splitter_nlp = None
-    if build_sentence_splitter_fn is not None:
-        try:
-            splitter_nlp = build_sentence_splitter_fn(
-                language,
-                stanza_package=package,
-                cpu_only=cpu_only,
-            )
-        except Exception:
-            splitter_nlp = None
+    # single pass: reuse the splitter's tokens instead of tokenizing twice
+    want_reuse_tokens = _resolve_reuse_tokens(cfg) and build_sentence_splitter_fn is not None
+    pipeline_kwargs, batch_count_kwargs = _resolve_batching(cfg)
+    if want_reuse_tokens:
+        pipeline_kwargs["pretokenized"] = True
+
+    # build NLP; with a process pool every worker builds its own pipeline
+    # and the parent keeps none (nor a copy to fork into the workers)
+    workers, parallel_unit, start_method = _resolve_parallel(cfg)
+    if workers > 1:
+        nlp, package = None, stanza_package
+    else:
+        nlp, package = build_pipeline_fn(language, stanza_package, cpu_only, **pipeline_kwargs)
+
+    # sentence splitter is optional; whether there is one goes into the cache
+    # keys, so with workers it is still built here once and then dropped
+    splitter_nlp = _build_splitter(build_sentence_splitter_fn, language, package, cpu_only)
+    use_sentence_splitter = splitter_nlp is not None
+    if workers > 1:
+        splitter_nlp = None
+
+    reuse_tokens = want_reuse_tokens and use_sentence_splitter
+    if want_reuse_tokens and not reuse_tokens:
+        # no splitter after all: the pipeline has to tokenize by itself
+        del pipeline_kwargs["pretokenized"]
+        if workers <= 1:
+            nlp, package = build_pipeline_fn(language, stanza_package, cpu_only, **pipeline_kwargs)
 
     # ref_tags setting is global (summary/meta needs it)
     ref_cfg = cfg.get("ref_tags") or {}
     ref_enabled = bool(ref_cfg.get("enabled", False))
+    # regex: strip tags from the text before NLP; token: classify literal tags
+    # per token while counting (regex-only entries are still stripped)
+    ref_mode = str(ref_cfg.get("mode", "regex")).strip().lower()
+    if ref_mode not in ("regex", "token"):
+        raise ValueError(f"ref_tags.mode must be 'regex' or 'token': {ref_mode!r}")
 
     filters_cfg = cfg.get("filters") or {}
-    min_token_length = int(filters_cfg.get("min_token_length", 0))
-    drop_roman_numerals = bool(filters_cfg.get("drop_roman_numerals", False))
-    roman_exceptions_file = filters_cfg.get("roman_exceptions_file")
-    if roman_exceptions_file:
-        roman_exceptions_file = (script_dir / Path(roman_exceptions_file)).resolve()
+    upos_targets = _resolve_upos_targets(cfg, filters_cfg)
+    filter_stage = str(filters_cfg.get("stage", "count")).strip().lower()
+    if filter_stage not in ("count", "post"):
+        raise ValueError(f"filters.stage must be 'count' or 'post': {filter_stage!r}")
+    key_filter = _resolve_key_filter(filters_cfg, script_dir, stage=filter_stage)
+    if filter_stage == "post":
+        # post stage: counts (and the cache) stay unfiltered
+        min_token_length, drop_roman_numerals, roman_exceptions_file = 0, False, None
+    else:
+        min_token_length = int(filters_cfg.get("min_token_length", 0))
+        drop_roman_numerals = bool(filters_cfg.get("drop_roman_numerals", False))
+        roman_exceptions_file = filters_cfg.get("roman_exceptions_file")
+        if roman_exceptions_file:
+            roman_exceptions_file = (script_dir / Path(roman_exceptions_file)).resolve()
+
+    ref_path: Optional[Path] = None
+    if ref_enabled:
+        ref_file = ref_cfg.get("patterns") or ref_cfg.get("ref_tags_file")
+        if not ref_file:
+            raise ValueError(
+                "ref_tags.patterns (or ref_tags.ref_tags_file) is required when ref_tags.enabled=true"
+            )
+
+        ref_path = Path(str(ref_file))
+        if not ref_path.is_absolute():
+            ref_path = (script_dir / ref_path).resolve()
+
+    # lemma cache (optional): per-file counts keyed by content hash + settings hash
+    cache_settings = _resolve_lemma_cache_settings(cfg, script_dir)
+    concordance_path = _resolve_concordance(cfg, out_dir, cache_settings)
+    cache_config_hash = ""
+    if cache_settings is not None:
+        cache_config_hash = _lemma_cache_config_hash(
+            settings=cache_settings,
+            normalization=text_norm,
+            language=language,
+            package=package,
+            use_lemma=use_lemma,
+            ref_path=ref_path,
+            min_token_length=min_token_length,
+            drop_roman_numerals=drop_roman_numerals,
+            roman_exceptions_file=roman_exceptions_file,
+            use_sentence_splitter=use_sentence_splitter,
+            reuse_tokens=reuse_tokens,
+            ref_mode=ref_mode,
+            upos_targets=upos_targets,
+        )
 
     # groups
     groups = cfg.get("groups") or {}
@@ -151,6 +975,46 @@ def run(
     group_counts: Dict[str, Counter] = {}
     group_ref_tags: Dict[str, Counter] = {}
     groups_files: Dict[str, List[str]] = {}
+    group_tasks: Dict[str, List[_CountTask]] = {}
+
+    trace_cfg = cfg.get("trace") or {}
+    if workers > 1 and bool(trace_cfg.get("enabled", False)):
+        raise ValueError("trace.enabled=true is not supported with parallel.workers > 1")
+
+    # dictcheck (optional)
+    dc = cfg.get("dictcheck") or {}
+    dictcheck_enabled = bool(dc.get("enabled", False))
+    wl_path: Optional[Path] = None
+    wl_index_dir: Optional[Path] = None
+    if dictcheck_enabled:
+        wordlist = dc.get("wordlist")
+        if not wordlist:
+            raise ValueError(
+                f"dictcheck.wordlist is required when dictcheck.enabled=true (analysis_unit={unit})"
+            )
+        wl_path = Path(str(wordlist))
+        if not wl_path.is_absolute():
+            wl_path = (script_dir / wl_path).resolve()
+        # precompiled wordlist index (optional), reused while the wordlist is unchanged
+        if dc.get("index_dir"):
+            wl_index_dir = Path(str(dc["index_dir"]))
+            if not wl_index_dir.is_absolute():
+                wl_index_dir = (script_dir / wl_index_dir).resolve()
+
+    # run-wide resources, loaded once for all groups
+    resources_cfg = cfg.get("resources") or {}
+    run_ctx = load_run_context(
+        ref_path=ref_path,
+        ref_mode=ref_mode,
+        wordlist_path=wl_path,
+        wordlist_index_dir=wl_index_dir,
+        trace_cfg=trace_cfg,
+        out_dir=out_dir,
+        script_dir=script_dir,
+        memoize=bool(resources_cfg.get("memoize", False)),
+    )
+    ref_matcher = run_ctx.ref_tags.matcher if run_ctx.ref_tags is not None else None
+    ref_detector = run_ctx.ref_tags.detector if run_ctx.ref_tags is not None else None
 
     for gname, gdef in groups.items():
         if not isinstance(gdef, dict):
@@ -166,87 +1030,198 @@ def run(
         files = expand_globs(patterns)  # List[Path]
         groups_files[gname] = [str(p) for p in files]
 
-        whole = read_concat(files)
+        count_kwargs: Dict[str, Any] = dict(
+            use_lemma=use_lemma,
+            upos_targets=set(upos_targets),
+            min_token_length=min_token_length,
+            drop_roman_numerals=drop_roman_numerals,
+            roman_exceptions_file=roman_exceptions_file,
+            **batch_count_kwargs,
+            **run_ctx.trace_kwargs,
+        )
 
-        if splitter_nlp is not None:
-            doc = splitter_nlp(whole)
-            joined = "\n".join([s.text for s in getattr(doc, "sentences", [])])
-            if not joined.strip():
-                joined = whole
+        if workers > 1 and parallel_unit == "files":
+            group_tasks[gname] = [
+                _CountTask(
+                    group=gname,
+                    files=[f],
+                    count_kwargs=count_kwargs,
+                    ref_matcher=ref_matcher,
+                    ref_detector=ref_detector,
+                )
+                for f in files
+            ]
         else:
-            joined = whole
+            group_tasks[gname] = [
+                _CountTask(
+                    group=gname,
+                    files=files,
+                    count_kwargs=count_kwargs,
+                    ref_matcher=ref_matcher,
+                    ref_detector=ref_detector,
+                )
+            ]
 
-        # normalization (config-driven)
-        joined = normalize_text(joined, cfg)
+    ctx = _CountContext(
+        normalizer=CompiledNormalizer({"normalization": text_norm}),
+        count_group_fn=count_group_fn,
+        cache_settings=cache_settings,
+        cache_config_hash=cache_config_hash,
+        stream_chunk_chars=_resolve_streaming(cfg),
+        reuse_tokens=reuse_tokens,
+        bulk_annotate_fn=bulk_annotate_fn,
+    )
+    if cache_settings is not None and cache_settings.annotation_tier:
+        annotation_hash = _annotation_config_hash(
+            settings=cache_settings,
+            normalization=text_norm,
+            language=language,
+            package=package,
+            ref_path=ref_path,
+            use_sentence_splitter=use_sentence_splitter,
+            reuse_tokens=reuse_tokens,
+            ref_mode=ref_mode,
+            chunking=dict(batch_count_kwargs, stream_chunk_chars=ctx.stream_chunk_chars),
+        )
+        ctx.annotation_store = AnnotationStore(
+            cache_settings.cache_dir,
+            annotation_hash=annotation_hash,
+            verbose=cache_settings.verbose,
+        )
+    all_tasks = [t for tasks in group_tasks.values() for t in tasks]
 
-        # ref_tags stripping/counting
-        ref_counter = Counter()
-        if ref_enabled:
-            ref_file = ref_cfg.get("patterns") or ref_cfg.get("ref_tags_file")
-            if not ref_file:
-                raise ValueError(
-                    "ref_tags.patterns (or ref_tags.ref_tags_file) is required when ref_tags.enabled=true"
-                )
+    # cache planning: hash every input up front, serve all hits here and send
+    # only the misses to NLP
+    group_results: Dict[str, _CountResult] = {gname: _CountResult() for gname in group_tasks}
+    cache_session: Optional[LemmaCacheSession] = None
+    cache_plan_sec = 0.0
+    file_groups: Dict[Path, List[str]] = {}
+    if cache_settings is not None:
+        t0 = time.perf_counter()
+        cache_session = _open_cache_session(cache_settings, cache_config_hash)
+        for task in all_tasks:
+            for f in task.files:
+                file_groups.setdefault(f.resolve(), []).append(task.group)
+        plan = cache_session.plan(file_groups, workers=cache_settings.plan_workers)
+        for fpath, payload in cache_session.load_hits(plan, workers=cache_settings.plan_workers):
+            for gname in file_groups[fpath]:
+                gres = group_results[gname]
+                payload.merge_into(gres.counts, gres.ref_tags)
+        # workers load the manifest when they start: write the new hashes first
+        cache_session.flush()
+
+        misses = set(plan.misses)
+        miss_tasks: List[_CountTask] = []
+        for task in all_tasks:
+            missed = [f for f in task.files if f.resolve() in misses]
+            # with workers, one task per missed file keeps every worker busy
+            for files in ([[f] for f in missed] if workers > 1 else [missed]):
+                if files:
+                    miss_tasks.append(
+                        _CountTask(
+                            group=task.group,
+                            files=files,
+                            count_kwargs=task.count_kwargs,
+                            ref_matcher=task.ref_matcher,
+                            ref_detector=task.ref_detector,
+                        )
+                    )
+        all_tasks = miss_tasks
+        cache_plan_sec = time.perf_counter() - t0
 
-            ref_path = Path(str(ref_file))
-            if not ref_path.is_absolute():
-                ref_path = (script_dir / ref_path).resolve()
+    if workers > 1 and all_tasks:
+        mp_ctx = multiprocessing.get_context(start_method) if start_method else None
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(all_tasks)),
+            mp_context=mp_ctx,
+            initializer=_init_worker,
+            initargs=(
+                ctx,
+                build_pipeline_fn,
+                build_sentence_splitter_fn,
+                language,
+                stanza_package,
+                cpu_only,
+                use_sentence_splitter,
+                pipeline_kwargs,
+            ),
+        ) as pool:
+            # map() yields in submission order, so merging below is deterministic
+            results = list(pool.map(_run_worker_task, all_tasks))
+    else:
+        ctx.nlp = nlp
+        ctx.splitter_nlp = splitter_nlp
+        ctx.cache_session = cache_session
+        results = [_count_task(ctx, t) for t in all_tasks]
+
+    # one manifest write for the whole run (workers hand their entries back)
+    if cache_session is not None:
+        for res in results:
+            if cache_session.manifest is not None:
+                cache_session.manifest.put_raw(res.manifest_updates)
+            if res.cache_stats is not None:
+                cache_session.stats.merge(res.cache_stats)
+        cache_session.flush()
+
+    # concordance index (optional), updated from the stored annotations
+    concordance_meta: Optional[Dict[str, Any]] = None
+    if concordance_path is not None:
+        assert cache_session is not None and ctx.annotation_store is not None
+        t0 = time.perf_counter()
+        report = build_concordance(
+            concordance_path,
+            store=ctx.annotation_store,
+            content_hashes=cache_session.content_hashes(file_groups, workers=cache_settings.plan_workers),
+            file_groups=file_groups,
+        )
+        if report.files_missing:
+            print(
+                f"[WARN] concordance: {report.files_missing} file(s) have no stored annotation"
+                " (counted before lemma_cache.annotation_tier was enabled) and are not indexed",
+                file=sys.stderr,
+            )
+        concordance_meta = {
+            "path": str(concordance_path),
+            **asdict(report),
+            "build_sec": round(time.perf_counter() - t0, 6),
+        }
 
-            ref_patterns = load_ref_tag_patterns(ref_path)
-            joined, ref_counter = strip_and_count_ref_tags(joined, ref_patterns)
-            group_ref_tags[gname] = ref_counter
+    for task, res in zip(all_tasks, results):
+        merged = group_results[task.group]
+        merged.counts.update(res.counts)
+        merged.ref_tags.update(res.ref_tags)
+
+    filter_sec = 0.0
+    key_norm_sec = 0.0
+    for gname, gres in group_results.items():
+        c = gres.counts
+        if key_normalizer is not None:
+            t0 = time.perf_counter()
+            c = key_normalizer.apply(c)
+            key_norm_sec += time.perf_counter() - t0
+        if key_filter is not None:
+            t0 = time.perf_counter()
+            c = key_filter.apply(c)
+            filter_sec += time.perf_counter() - t0
+        group_counts[gname] = c
+
+        if ref_enabled:
+            group_ref_tags[gname] = gres.ref_tags
 
             # ref_tags csv (per group)
             write_frequency_csv(
                 out_dir / f"ref_tags_{gname}.csv",
-                ref_counter,
+                gres.ref_tags,
                 header=("tag", "count"),
             )
-        
-        # ---- trace (optional) ----
-        trace_cfg = cfg.get("trace") or {}
-        trace_kwargs: Dict[str, Any] = {}
-
-        if bool(trace_cfg.get("enabled", False)):
-            trace_path = Path(str(trace_cfg.get("path", out_dir / "trace.tsv")))
-            if not trace_path.is_absolute():
-                trace_path = (script_dir / trace_path).resolve()
-
-            trace_kwargs = {
-                "trace_tsv": trace_path,
-                "trace_max_rows": int(trace_cfg.get("max_rows", 0)),
-                "trace_only_keys": set(trace_cfg.get("only_keys", []) or []),
-                "trace_write_truncation_marker": bool(
-                    trace_cfg.get("write_truncation_marker", True)
-                ),
-            }
-
-        c = count_group_fn(joined, nlp, use_lemma=use_lemma, min_token_length=min_token_length, drop_roman_numerals=drop_roman_numerals, roman_exceptions_file=roman_exceptions_file, **trace_kwargs)
-        group_counts[gname] = c
 
         # base csv
         base = f"noun_frequency_{gname}"
         write_frequency_csv(out_dir / f"{base}.csv", c, header=csv_header)
 
         # dictcheck
-        dc = cfg.get("dictcheck") or {}
-        wordlist = dc.get("wordlist")
-
-        if bool(dc.get("enabled", False)) and not wordlist:
-            raise ValueError(
-                f"dictcheck.wordlist is required when dictcheck.enabled=true (analysis_unit={unit})"
-            )
-
-        if bool(dc.get("enabled", False)):
-            wl_path = Path(str(wordlist))
-            if not wl_path.is_absolute():
-                wl_path = (script_dir / wl_path).resolve()
-
-            known = set(
-                x.strip()
-                for x in wl_path.read_text(encoding="utf-8").splitlines()
-                if x.strip()
-            )
+        if run_ctx.wordlist is not None:
+            known = run_ctx.wordlist
 
             known_c = Counter({w: n for (w, n) in c.items() if w in known})
             unknown_c = Counter({w: n for (w, n) in c.items() if w not in known})
@@ -278,6 +1253,9 @@ def run(
     summary_lines.extend(render_stanza_package_table_fn(nlp, stanza_package))
     summary_lines.append("")
 
+    if cache_session is not None:
+        summary_lines.append(cache_session.stats.summary_line())
+
     if ref_enabled:
         for gn, rc in group_ref_tags.items():
             summary_lines.append(
@@ -298,6 +1276,36 @@ def run(
     norm_canon = json.dumps(norm, ensure_ascii=False, sort_keys=True)
     meta["normalization"] = norm
     meta["normalization_hash_sha256"] = hashlib.sha256(norm_canon.encode("utf-8")).hexdigest()
+    meta["normalization_mode"] = norm_mode
+    if key_normalizer is not None:
+        meta["key_normalization"] = {
+            "types": key_normalizer.types,
+            "merged": key_normalizer.merged,
+            "sec": round(key_norm_sec, 6),
+        }
+
+    if cache_session is not None:
+        meta["lemma_cache"] = {
+            "dir": str(cache_settings.cache_dir),
+            "config_hash": cache_config_hash,
+            "annotation_hash": (
+                ctx.annotation_store.annotation_hash if ctx.annotation_store is not None else None
+            ),
+            **cache_session.stats.to_meta(),
+            "plan_sec": round(cache_plan_sec, 6),
+        }
+
+    if key_filter is not None:
+        meta["filters"] = {
+            "stage": filter_stage,
+            **asdict(key_filter.report),
+            "sec": round(filter_sec, 6),
+        }
+
+    if concordance_meta is not None:
+        meta["concordance"] = concordance_meta
+
+    meta["resources"] = run_ctx.to_meta()
 
     write_run_meta(meta, out_dir)
 
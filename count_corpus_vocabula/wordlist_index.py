@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Callable, FrozenSet, Iterable, Optional
+
+from .lemma_cache import atomic_write_bytes, hash_file_content
+
+# bump when the index file layout changes
+INDEX_VERSION = 2
+
+
+def read_wordlist_lines(path: Path) -> Iterable[str]:
+    """Plain wordlist entries: one per line, whitespace stripped, blanks skipped."""
+    for x in path.read_text(encoding="utf-8").splitlines():
+        x = x.strip()
+        if x:
+            yield x
+
+
+def _index_path(index_dir: Path, wordlist_hash: str, variant: str) -> Path:
+    safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in variant)
+    return index_dir / f"{wordlist_hash[:32]}.{safe}.json"
+
+
+def _read_index(path: Path, wordlist_hash: str, variant: str) -> Optional[FrozenSet[str]]:
+    try:
+        obj = json.loads(path.read_bytes().decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(obj, dict)
+        or obj.get("version") != INDEX_VERSION
+        or obj.get("wordlist_sha256") != wordlist_hash
+        or obj.get("variant") != variant
+        or not isinstance(obj.get("keys"), list)
+        or not all(isinstance(k, str) for k in obj["keys"])
+    ):
+        return None
+    return frozenset(obj["keys"])
+
+
+def load_wordlist_index(
+    wordlist_path: Path,
+    *,
+    index_dir: Optional[Path],
+    variant: str = "lines",
+    build_keys: Optional[Callable[[Path], Iterable[str]]] = None,
+) -> FrozenSet[str]:
+    """
+    Return the set of lookup keys for a wordlist, using a precompiled index.
+
+    `build_keys` turns the wordlist into keys (default: read_wordlist_lines)
+    and `variant` names that transformation, e.g. "dictcheck-normalize=1".
+    The index is a JSON list of keys under `index_dir` (data only, nothing is
+    executed on load), keyed by the wordlist content hash and the variant; it is rebuilt when either changes or the
+    file is unreadable. With index_dir=None the keys are built every time.
+    """
+    build = build_keys or read_wordlist_lines
+
+    if index_dir is None:
+        return frozenset(build(wordlist_path))
+
+    wordlist_hash = hash_file_content(wordlist_path)
+    path = _index_path(index_dir, wordlist_hash, variant)
+
+    keys = _read_index(path, wordlist_hash, variant)
+    if keys is not None:
+        return keys
+
+    keys = frozenset(build(wordlist_path))
+    atomic_write_bytes(
+        path,
+        json.dumps(
+            {
+                "version": INDEX_VERSION,
+                "wordlist_sha256": wordlist_hash,
+                "variant": variant,
+                "keys": sorted(keys),
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8"),
+    )
+    return keys
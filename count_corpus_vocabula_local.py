@@ -28,6 +28,7 @@ from count_corpus_vocabula.config import load_config  # noqa: F401
 # tests expect these names on THIS module (they monkeypatch them here)
 from count_corpus_vocabula.nlp_hooks import (  # noqa: F401
     build_pipeline,
+    bulk_annotate,
     build_sentence_splitter,
     count_group,
     render_stanza_package_table,
@@ -56,6 +57,7 @@ def main() -> int:
         build_sentence_splitter_fn=build_sentence_splitter,
         count_group_fn=count_group,
         render_stanza_package_table_fn=render_stanza_package_table,
+        bulk_annotate_fn=bulk_annotate,
     )
 
 
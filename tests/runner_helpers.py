@@ -0,0 +1,63 @@
+"""Shared helpers for tests that drive runner.run() with stand-in hooks."""
+
+from __future__ import annotations
+
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import count_corpus_vocabula.runner as runner_mod
+
+
+def run_with_config(
+    tmp_path: Path,
+    cfg: dict,
+    count_group_fn: Callable[..., Counter],
+    *,
+    nlp: Any = None,
+    build_pipeline_fn: Optional[Callable[..., Any]] = None,
+    build_sentence_splitter_fn: Optional[Callable[..., Any]] = None,
+    bulk_annotate_fn: Optional[Callable[..., Any]] = None,
+) -> int:
+    """
+    runner.run() with `cfg` as the loaded config and tmp_path as script_dir.
+
+    The pipeline is `nlp` (a bare object by default) with package "perseus",
+    unless a build_pipeline_fn is given; there is no sentence splitter unless
+    build_sentence_splitter_fn is given.
+    """
+    config_path = tmp_path / "cfg.yml"
+    config_path.write_text("dummy", encoding="utf-8")
+
+    if build_pipeline_fn is None:
+        pipeline = object() if nlp is None else nlp
+
+        def build_pipeline_fn(*args, **kwargs):
+            return pipeline, "perseus"
+
+    return runner_mod.run(
+        script_dir=tmp_path,
+        config_path=config_path,
+        load_config_fn=lambda _p: cfg,
+        clean_mod=object(),
+        build_pipeline_fn=build_pipeline_fn,
+        build_sentence_splitter_fn=build_sentence_splitter_fn,
+        count_group_fn=count_group_fn,
+        render_stanza_package_table_fn=lambda *a, **k: [],
+        bulk_annotate_fn=bulk_annotate_fn,
+    )
+
+
+def word_counter(calls: list) -> Callable[..., Counter]:
+    """A count_group_fn that records each text and counts its lowercased words."""
+
+    def count_group_fn(text, nlp, **kwargs):
+        calls.append(text)
+        return Counter(w.lower() for w in text.split())
+
+    return count_group_fn
+
+
+def read_run_meta(tmp_path: Path) -> dict:
+    return json.loads((tmp_path / "output" / "run_meta.json").read_text(encoding="utf-8"))
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+from count_corpus_vocabula.annotation_cache import (
+    AnnotationPayload,
+    AnnotationStore,
+    RecordingNLP,
+    RecordingSplitter,
+    ReplayNLP,
+    ReplaySplitter,
+    build_annotation_hash,
+    recount,
+)
+from count_corpus_vocabula.nlp_adapters import AdapterDoc, AdapterSentence, AdapterWord
+
+
+class _FakeNLP:
+    def __init__(self):
+        self.calls: list = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return AdapterDoc([AdapterSentence([AdapterWord(w, w.lower(), "NOUN") for w in text.split()])])
+
+
+def _hash() -> str:
+    return build_annotation_hash(stanza_model="perseus", lang="la", processors="tokenize,pos,lemma")
+
+
+def test_record_store_and_replay(tmp_path: Path) -> None:
+    nlp = _FakeNLP()
+    recorder = RecordingNLP(nlp)
+    recorder("Rosa rosam")
+    recorder("Puella")
+
+    store = AnnotationStore(tmp_path, annotation_hash=_hash())
+    assert store.get("c" * 64) is None
+    assert store.put("c" * 64, recorder.payload) > 0
+
+    stored = store.get("c" * 64)
+    assert stored is not None and stored.n_tokens == 3
+
+    replay = ReplayNLP(stored, nlp)
+    doc = replay("Rosa rosam")
+    assert [(w.text, w.lemma, w.upos) for w in doc.sentences[0].words] == [
+        ("Rosa", "rosa", "NOUN"),
+        ("rosam", "rosam", "NOUN"),
+    ]
+    replay("Puella")
+    assert replay.complete
+    assert nlp.calls == ["Rosa rosam", "Puella"]
+
+
+def test_replay_diverges_to_the_pipeline_on_other_text() -> None:
+    nlp = _FakeNLP()
+    recorder = RecordingNLP(nlp)
+    recorder("rosa")
+
+    replay = ReplayNLP(recorder.payload, nlp)
+    doc = replay("puella")
+    assert doc.sentences[0].words[0].lemma == "puella"
+    assert replay.diverged and not replay.complete
+    assert nlp.calls == ["rosa", "puella"]
+
+
+class _BulkNLP(_FakeNLP):
+    def __init__(self):
+        super().__init__()
+        self.bulk_calls: list = []
+
+    def bulk_process(self, docs):
+        self.bulk_calls.append([d.text for d in docs])
+        return [self(d.text) for d in docs]
+
+
+@dataclass
+class _Doc:
+    text: str
+
+
+def test_batched_record_and_replay() -> None:
+    nlp = _BulkNLP()
+    recorder = RecordingNLP(nlp)
+    recorder.bulk_process([_Doc("Rosa rosam"), _Doc("Puella")])
+
+    replay = ReplayNLP(recorder.payload, nlp)
+    docs = replay.bulk_process([_Doc("Rosa rosam"), _Doc("Puella")])
+    assert [[w.lemma for w in d.sentences[0].words] for d in docs] == [["rosa", "rosam"], ["puella"]]
+    assert replay.complete
+    assert nlp.bulk_calls == [["Rosa rosam", "Puella"]]
+
+    # the rest of a batch goes to the pipeline once a document differs
+    replay = ReplayNLP(recorder.payload, nlp)
+    docs = replay.bulk_process([_Doc("Rosa rosam"), _Doc("Roma"), _Doc("Puella")])
+    assert [d.sentences[0].words[0].lemma for d in docs] == ["rosa", "roma", "puella"]
+    assert replay.diverged
+    assert nlp.bulk_calls[-1] == ["Roma", "Puella"]
+
+    assert not hasattr(ReplayNLP(recorder.payload, _FakeNLP()), "bulk_process")
+
+
+def test_annotation_hash_tracks_pipeline_settings() -> None:
+    assert _hash() == _hash()
+    assert _hash() != build_annotation_hash(stanza_model="proiel", lang="la", processors="tokenize,pos,lemma")
+    assert _hash() != build_annotation_hash(
+        stanza_model="perseus", lang="la", processors="tokenize,pos,lemma", extra={"normalization": {"casefold": True}}
+    )
+
+
+def test_columnar_payload_roundtrip() -> None:
+    payload = AnnotationPayload()
+    payload.add_doc(1, [[("Rosa", "rosa", "NOUN", 0), ("est", None, "AUX", 5)], [("Roma", "Roma", "PROPN", None)]])
+    payload.add_doc(2, [[("rosam", "rosa", "NOUN", 0)]])
+
+    back = AnnotationPayload.from_bytes(payload.to_bytes())
+    assert (back.n_docs, back.n_sentences, back.n_tokens) == (2, 3, 4)
+    assert list(back.doc_crc) == [1, 2]
+    assert back.strings == payload.strings
+
+    doc = back.doc(0)
+    assert [[(w.text, w.lemma, w.upos, w.start_char) for w in s.words] for s in doc.sentences] == [
+        [("Rosa", "rosa", "NOUN", 0), ("est", None, "AUX", 5)],
+        [("Roma", "Roma", "PROPN", None)],
+    ]
+    assert back.type_counts() == Counter({("rosa", "NOUN"): 2, ("est", "AUX"): 1, ("Roma", "PROPN"): 1})
+
+    with pytest.raises(ValueError):
+        AnnotationPayload.from_bytes(payload.to_bytes(compress=False)[:-3])
+
+
+def test_splitter_record_and_replay() -> None:
+    calls: list = []
+
+    def splitter(text):
+        calls.append(text)
+        return text.split(". ")
+
+    join = "\n".join
+    payload = AnnotationPayload()
+    recorder = RecordingSplitter(splitter, payload, join)
+    assert recorder("Rosa est. Æneas venit").text == "Rosa est\nÆneas venit"
+
+    back = AnnotationPayload.from_bytes(payload.to_bytes())
+    assert back.splits == ["Rosa est\nÆneas venit"]
+
+    replay = ReplaySplitter(back, splitter, join)
+    assert replay("Rosa est. Æneas venit").text == "Rosa est\nÆneas venit"
+    assert replay.complete
+    assert len(calls) == 1
+
+    assert replay("Puella. Roma").text == "Puella\nRoma"
+    assert replay.diverged and not replay.complete
+    assert len(calls) == 2
+
+
+def test_recount_filters_by_upos_and_unit() -> None:
+    a = AnnotationPayload()
+    a.add_doc(0, [[("Rosa", "rosa", "NOUN", 0), ("Roma", "Roma", "PROPN", 5), ("LIBER", None, "NOUN", 10)]])
+    b = AnnotationPayload()
+    b.add_doc(0, [[("rosam", "rosa", "NOUN", 0)]])
+
+    assert recount([a, b]) == Counter({"rosa": 2, "liber": 1})
+    assert recount([a, b], upos_targets=["noun", "PROPN"]) == Counter({"rosa": 2, "roma": 1, "liber": 1})
+    assert recount([a, b], use_lemma=False) == Counter({"rosa": 1, "rosam": 1, "liber": 1})
+
+
+def test_recording_flattens_multiword_tokens() -> None:
+    @dataclass
+    class Token:
+        words: list
+
+    @dataclass
+    class Sentence:
+        tokens: list
+        words: list = None
+
+    class MwtNLP:
+        def __call__(self, text):
+            return AdapterDoc([Sentence(tokens=[Token([AdapterWord("rosam", "rosa", "NOUN"), AdapterWord("que", "que", "CCONJ")])])])
+
+    recorder = RecordingNLP(MwtNLP())
+    recorder("rosamque")
+    assert recorder.payload.type_counts() == Counter({("rosa", "NOUN"): 1, ("que", "CCONJ"): 1})
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from count_corpus_vocabula.concordance import main, query_concordance
+from count_corpus_vocabula.nlp_adapters import AdapterDoc, AdapterSentence, AdapterWord
+from runner_helpers import read_run_meta, run_with_config
+
+
+class _SentenceNLP:
+    """One sentence per line; 'Roma' is PROPN, everything else NOUN."""
+
+    def __init__(self):
+        self.calls: list = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return AdapterDoc([
+            AdapterSentence([
+                AdapterWord(w, w.lower().rstrip("m"), "PROPN" if w == "Roma" else "NOUN")
+                for w in line.split()
+            ])
+            for line in text.splitlines()
+            if line.strip()
+        ])
+
+
+def _count(text, nlp, *, upos_targets, use_lemma=True, **kwargs):
+    doc = nlp(text)
+    return Counter(w.lemma for s in doc.sentences for w in s.words if w.upos in upos_targets)
+
+
+def _run(tmp_path: Path, cfg: dict, nlp) -> dict:
+    assert run_with_config(tmp_path, cfg, _count, nlp=nlp) == 0
+    return read_run_meta(tmp_path)
+
+
+def _cfg(data: Path) -> dict:
+    return {
+        "out_dir": "output",
+        "groups": {
+            "a": {"files": [str(data / "a.txt")]},
+            "b": {"files": [str(data / "b.txt")]},
+        },
+        "lemma_cache": {"enabled": True, "annotation_tier": True},
+        "concordance": {"enabled": True},
+    }
+
+
+def test_concordance_built_during_run_and_queried(tmp_path: Path) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("puella rosam Roma videt\nrosa\n", encoding="utf-8")
+    (data / "b.txt").write_text("nauta rosam amat\n", encoding="utf-8")
+
+    nlp = _SentenceNLP()
+    meta = _run(tmp_path, _cfg(data), nlp)
+    assert meta["concordance"]["files_indexed"] == 2
+
+    index = tmp_path / "output" / "concordance.sqlite"
+    lines = query_concordance(index, "ROSA", context=1)
+    assert [(Path(ln.path).name, ln.sentence, ln.left, ln.keyword, ln.right) for ln in lines] == [
+        ("a.txt", 0, "puella", "rosam", "Roma"),
+        ("a.txt", 1, "", "rosa", ""),
+        ("b.txt", 0, "nauta", "rosam", "amat"),
+    ]
+    assert [ln.keyword for ln in query_concordance(index, "rosam", kind="surface")] == ["rosam", "rosam"]
+    assert len(query_concordance(index, "rosa", group="b")) == 1
+    assert query_concordance(index, "roma", upos="NOUN") == []
+    assert len(query_concordance(index, "roma", upos="propn")) == 1
+
+    # warm run: nothing is annotated or re-indexed
+    (data / "b.txt").write_text("nauta rosam\n", encoding="utf-8")
+    meta = _run(tmp_path, _cfg(data), nlp)
+    assert len(nlp.calls) == 3
+    assert meta["concordance"]["files_reused"] == 1
+    assert meta["concordance"]["files_indexed"] == 1
+    assert [ln.right for ln in query_concordance(index, "rosa", group="b")] == [""]
+
+
+def test_concordance_cli(tmp_path: Path, capsys) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("puella rosam videt\n", encoding="utf-8")
+    (data / "b.txt").write_text("", encoding="utf-8")
+    _run(tmp_path, _cfg(data), _SentenceNLP())
+
+    assert main([str(tmp_path / "output" / "concordance.sqlite"), "rosa", "--context", "1"]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert len(out) == 1
+    assert out[0].split("\t")[1:] == ["0", "NOUN", "puella", "rosam", "videt"]
+
+
+def test_concordance_requires_annotation_tier(tmp_path: Path) -> None:
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": []}},
+        "lemma_cache": {"enabled": True},
+        "concordance": {"enabled": True},
+    }
+    with pytest.raises(ValueError, match="annotation_tier"):
+        _run(tmp_path, cfg, _SentenceNLP())
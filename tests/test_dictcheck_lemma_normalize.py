@@ -35,3 +35,27 @@ def test_dictcheck_applies_lemma_normalize_map(tmp_path: Path):
     assert k == 1
     assert u == 0
 
+
+def test_dictcheck_index_dir_reuses_compiled_wordlist(tmp_path: Path):
+    wordlist = tmp_path / "latin_words.txt"
+    wordlist.write_text("materia\nrosa\n", encoding="utf-8")
+    freq = tmp_path / "noun_frequency.csv"
+    freq.write_text("word,frequency\nrosa,3\nmaterium,10\n", encoding="utf-8")
+    index_dir = tmp_path / "wordlist_index"
+
+    results = []
+    for _ in range(2):
+        results.append(
+            split_frequency_csv(
+                freq_csv=freq,
+                wordlist_path=wordlist,
+                out_known_csv=tmp_path / "known.csv",
+                out_unknown_csv=tmp_path / "unknown.csv",
+                lemma_col="word",
+                count_col="frequency",
+                index_dir=index_dir,
+            )
+        )
+
+    assert results == [(1, 1), (1, 1)]
+    assert len(list(index_dir.glob("*.json"))) == 1
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from count_corpus_vocabula.io_utils import iter_text_chunks
+
+
+def test_iter_text_chunks_roundtrips_and_is_bounded(tmp_path: Path) -> None:
+    paras = [f"Paragraphus {i} " + "verbum " * (i % 7 + 1) + "\n" for i in range(200)]
+    text = "\n".join(paras)
+    p = tmp_path / "t.txt"
+    p.write_text(text, encoding="utf-8")
+
+    chunks = list(iter_text_chunks(p, max_chars=300))
+
+    assert "".join(chunks) == text
+    assert len(chunks) > 1
+    assert all(len(c) < 2 * 300 for c in chunks)
+
+
+def test_iter_text_chunks_prefers_paragraph_boundaries(tmp_path: Path) -> None:
+    p = tmp_path / "t.txt"
+    p.write_text("a a a\nb b b\n\nc c c\nd d d\n", encoding="utf-8")
+
+    chunks = list(iter_text_chunks(p, max_chars=16))
+
+    assert chunks[0] == "a a a\nb b b\n\n"
+    assert "".join(chunks) == p.read_text(encoding="utf-8")
+
+
+def test_iter_text_chunks_splits_overlong_line(tmp_path: Path) -> None:
+    p = tmp_path / "t.txt"
+    p.write_text("rosa " * 100, encoding="utf-8")
+
+    chunks = list(iter_text_chunks(p, max_chars=50))
+
+    assert "".join(chunks) == "rosa " * 100
+    assert all(len(c) <= 50 for c in chunks)
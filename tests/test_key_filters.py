@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from count_corpus_vocabula.key_filters import build_key_filter, is_roman_numeral
+from runner_helpers import read_run_meta, run_with_config
+
+
+@pytest.mark.parametrize(
+    "key, expected",
+    [("xiv", True), ("MCMXC", True), ("viij", True), ("vi", True), ("rosa", False), ("iiii", False), ("", False)],
+)
+def test_is_roman_numeral(key: str, expected: bool) -> None:
+    assert is_roman_numeral(key) is expected
+
+
+def test_key_filter_applies_once_per_type(tmp_path: Path) -> None:
+    exceptions = tmp_path / "roman.txt"
+    exceptions.write_text("vi\n# comment\n", encoding="utf-8")
+    exclude = tmp_path / "exclude.txt"
+    exclude.write_text("Idest\n", encoding="utf-8")
+
+    f = build_key_filter(
+        min_token_length=2,
+        drop_roman_numerals=True,
+        roman_exceptions_file=exceptions,
+        exclude_file=exclude,
+    )
+    counts = Counter({"rosa": 3, "a": 2, "xiv": 1, "vi": 4, "idest": 5})
+    assert f.apply(counts) == Counter({"rosa": 3, "vi": 4})
+    assert (f.report.removed_types, f.report.removed_tokens) == (3, 8)
+    assert f.apply(Counter({"xiv": 2})) == Counter()
+
+
+def test_inactive_filter_returns_counts_unchanged() -> None:
+    counts = Counter({"a": 1})
+    assert build_key_filter().apply(counts) is counts
+
+
+def _run(tmp_path: Path, cfg: dict, calls: list) -> dict:
+    def count_group_fn(text, nlp, **kwargs):
+        calls.append(kwargs)
+        return Counter(w.lower() for w in text.split())
+
+    assert run_with_config(tmp_path, cfg, count_group_fn) == 0
+    return read_run_meta(tmp_path)
+
+
+def test_post_stage_filter_changes_hit_the_cache(tmp_path: Path) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("rosa a xiv rosa idest\n", encoding="utf-8")
+    (tmp_path / "exclude.txt").write_text("idest\n", encoding="utf-8")
+
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": [str(data / "*.txt")]}},
+        "lemma_cache": {"enabled": True},
+        "filters": {"stage": "post", "min_token_length": 2},
+    }
+    calls: list = []
+    _run(tmp_path, cfg, calls)
+    assert len(calls) == 1
+    assert calls[0]["min_token_length"] == 0 and calls[0]["drop_roman_numerals"] is False
+    csv = (tmp_path / "output" / "noun_frequency_g.csv").read_text(encoding="utf-8").splitlines()
+    assert csv[0] == "lemma,count" and sorted(csv[1:]) == ["idest,1", "rosa,2", "xiv,1"]
+
+    cfg["filters"] = {
+        "stage": "post",
+        "min_token_length": 2,
+        "drop_roman_numerals": True,
+        "exclude_file": "exclude.txt",
+    }
+    meta = _run(tmp_path, cfg, calls)
+    assert len(calls) == 1
+    assert meta["lemma_cache"]["hits"] == 1
+    assert meta["filters"]["removed_tokens"] == 3
+    csv = (tmp_path / "output" / "noun_frequency_g.csv").read_text(encoding="utf-8").splitlines()
+    assert csv == ["lemma,count", "rosa,2"]
+
+
+def test_count_stage_keeps_filters_in_count_group_fn(tmp_path: Path) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("rosa idest\n", encoding="utf-8")
+    (tmp_path / "exclude.txt").write_text("idest\n", encoding="utf-8")
+
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": [str(data / "*.txt")]}},
+        "filters": {"min_token_length": 3, "exclude_file": "exclude.txt"},
+    }
+    calls: list = []
+    meta = _run(tmp_path, cfg, calls)
+    assert calls[0]["min_token_length"] == 3
+    assert meta["filters"]["stage"] == "count"
+    csv = (tmp_path / "output" / "noun_frequency_g.csv").read_text(encoding="utf-8").splitlines()
+    assert csv == ["lemma,count", "rosa,1"]
+
+
+def test_filter_stage_must_be_known(tmp_path: Path) -> None:
+    cfg = {"out_dir": "output", "groups": {"g": {"files": []}}, "filters": {"stage": "later"}}
+    with pytest.raises(ValueError, match="filters.stage"):
+        _run(tmp_path, cfg, [])
@@ -318,7 +318,7 @@ def test_prune_cache_removes_old_objects_and_stale_locks(tmp_path: Path) -> None
 
 
 def test_lock_timeout(tmp_path: Path) -> None:
-    # This is a minimal sanity check: if a lock file already exists,
+    # This is a minimal sanity check: if another holder has the key's lock,
     # acquiring should time out quickly.
     src = tmp_path / "x.txt"
     _write_text(src, "x\n")
@@ -345,19 +345,740 @@ def test_lock_timeout(tmp_path: Path) -> None:
     content_hash = lc.hash_file_content(src)
     cache_key = lc._make_cache_key(content_hash, config_hash)  # type: ignore[attr-defined]
     lock_path = lc._lock_file_path(cache_dir, cache_key)       # type: ignore[attr-defined]
-    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    holder = lc.CacheLock(lock_path, timeout_sec=1.0)
+    holder.acquire()
+
+    def compute():
+        return lc.LemmaCachePayload(lemmas=Counter({"x": 1}), ref_tags=Counter())
+
+    try:
+        with pytest.raises(lc.CacheLockTimeout):
+            lc.get_or_compute_cached(
+                path=src,
+                cache_dir=cache_dir,
+                config_hash=config_hash,
+                compute_fn=compute,
+                use_manifest=False,
+                verbose=False,
+                lock_timeout_sec=0.2,
+            )
+    finally:
+        holder.release()
+
+
+needs_flock = pytest.mark.skipif(lc.fcntl is None, reason="fcntl not available")
+
+
+@needs_flock
+def test_stale_lockfile_does_not_block(tmp_path: Path) -> None:
+    # a lock file left behind by a crashed process is not a held lock
+    lock_path = tmp_path / "locks" / "ab" / "key.lock"
     _write_text(lock_path, "pid=99999\n")
 
+    with lc.CacheLock(lock_path, timeout_sec=0.2) as lock:
+        assert lock.wait_sec < 0.2
+    assert not lock_path.exists()
+
+
+@needs_flock
+def test_lock_waiter_blocks_until_release(tmp_path: Path) -> None:
+    import threading
+
+    lock_path = tmp_path / "k.lock"
+    holder = lc.CacheLock(lock_path)
+    holder.acquire()
+    threading.Timer(0.2, holder.release).start()
+
+    with lc.CacheLock(lock_path, timeout_sec=5.0) as waiter:
+        assert lc._lock_is_held(lock_path)
+    assert 0.1 < waiter.wait_sec < 5.0
+    assert not lc._lock_is_held(lock_path)
+
+
+@needs_flock
+def test_lock_released_when_owner_process_dies(tmp_path: Path) -> None:
+    import subprocess
+    import sys
+
+    lock_path = tmp_path / "k.lock"
+    code = (
+        "import sys, time\n"
+        "from pathlib import Path\n"
+        "import count_corpus_vocabula.lemma_cache as lc\n"
+        "lc.CacheLock(Path(sys.argv[1])).acquire()\n"
+        "print('held', flush=True)\n"
+        "time.sleep(60)\n"
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-c", code, str(lock_path)],
+        stdout=subprocess.PIPE,
+        text=True,
+        cwd=str(Path(__file__).resolve().parents[1]),
+    )
+    try:
+        assert proc.stdout.readline().strip() == "held"
+        assert lc._lock_is_held(lock_path)
+        with pytest.raises(lc.CacheLockTimeout):
+            lc.CacheLock(lock_path, timeout_sec=0.1).acquire()
+    finally:
+        proc.kill()
+        proc.wait()
+
+    # the kernel dropped the flock; the lock file itself is still there
+    assert lock_path.exists()
+    with lc.CacheLock(lock_path, timeout_sec=2.0):
+        pass
+
+
+def test_session_records_lock_wait(tmp_path: Path) -> None:
+    src = tmp_path / "x.txt"
+    _write_text(src, "x\n")
+    payload = lc.LemmaCachePayload(lemmas=Counter({"x": 1}), ref_tags=Counter())
+
+    with lc.LemmaCacheSession(
+        tmp_path / ".lemma_cache", config_hash=_config_hash(), use_manifest=False, verbose=False
+    ) as session:
+        session.get_or_compute(src, lambda: payload)
+        session.get_or_compute(src, lambda: payload)  # hit: no lock taken
+
+    assert session.stats.lock_acquisitions == 1
+    assert session.stats.lock_wait_sec >= 0.0
+
+
+@needs_flock
+def test_prune_cache_keeps_held_locks(tmp_path: Path) -> None:
+    cache_dir = tmp_path / ".lemma_cache"
+    lock_path = cache_dir / "locks" / "bb" / "deadbeef.lock"
+
+    with lc.CacheLock(lock_path):
+        _touch_mtime(lock_path, seconds_ago=10_000)
+        rep = lc.prune_cache(cache_dir, lock_ttl_sec=0, verbose=False)
+        assert rep.removed_locks == 0
+        assert lock_path.exists()
+
+
+def _config_hash() -> str:
+    return lc.build_config_hash(
+        stanza_model="perseus",
+        lang="la",
+        processors="tokenize,pos,lemma",
+        use_lemma=True,
+        upos_targets={"NOUN"},
+        extra={"stanza_version": "1", "nlpo_toolkit_version": "1"},
+    )
+
+
+def test_session_reads_and_writes_manifest_once(tmp_path: Path, monkeypatch) -> None:
+    srcs = []
+    for i in range(5):
+        p = tmp_path / f"f{i}.txt"
+        _write_text(p, f"text {i}\n")
+        srcs.append(p)
+    cache_dir = tmp_path / ".lemma_cache"
+
+    calls = {"load": 0, "save": 0}
+    real_load, real_save = lc.ContentHashManifest.load, lc.ContentHashManifest.save
+
+    def load(self):
+        calls["load"] += 1
+        real_load(self)
+
+    def save(self):
+        calls["save"] += 1
+        real_save(self)
+
+    monkeypatch.setattr(lc.ContentHashManifest, "load", load)
+    monkeypatch.setattr(lc.ContentHashManifest, "save", save)
+
+    with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash()) as session:
+        for p in srcs:
+            _payload, hit = session.get_or_compute(
+                p, lambda: lc.LemmaCachePayload(lemmas=Counter({"x": 1}), ref_tags=Counter())
+            )
+            assert hit is False
+        assert calls["save"] == 0
+
+    assert calls == {"load": 1, "save": 1}
+    manifest = lc.ContentHashManifest(cache_dir / "manifest.json")
+    real_load(manifest)
+    assert all(manifest.get(p) is not None for p in srcs)
+
+
+def test_session_flush_merges_concurrent_writers(tmp_path: Path) -> None:
+    a = tmp_path / "a.txt"
+    b = tmp_path / "b.txt"
+    _write_text(a, "a\n")
+    _write_text(b, "b\n")
+    cache_dir = tmp_path / ".lemma_cache"
+
+    # both sessions start from the same (empty) manifest
+    s1 = lc.LemmaCacheSession(cache_dir, config_hash=_config_hash())
+    s2 = lc.LemmaCacheSession(cache_dir, config_hash=_config_hash())
+    s1.content_hash(a)
+    s2.content_hash(b)
+    s1.flush()
+    s2.flush()
+
+    manifest = lc.ContentHashManifest(cache_dir / "manifest.json")
+    manifest.load()
+    assert manifest.get(a) is not None
+    assert manifest.get(b) is not None
+
+
+def test_session_flushes_every_n_entries(tmp_path: Path) -> None:
+    cache_dir = tmp_path / ".lemma_cache"
+    session = lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), flush_every=2)
+    for i in range(3):
+        p = tmp_path / f"f{i}.txt"
+        _write_text(p, f"{i}\n")
+        session.content_hash(p)
+
+    assert (cache_dir / "manifest.json").exists()
+    assert session.manifest is not None and session.manifest.dirty_count == 1
+
+
+def test_sqlite_manifest_roundtrip_relative_keys(tmp_path: Path) -> None:
+    src = tmp_path / "proj" / "data" / "a.txt"
+    _write_text(src, "a\n")
+    db = tmp_path / ".lemma_cache" / "manifest.sqlite"
+
+    m1 = lc.SqliteContentHashManifest(db, key_mode="relative", project_root=tmp_path / "proj")
+    m1.load()
+    assert m1.get(src) is None
+    m1.put_many([(src, lc.ManifestEntry(size=2, mtime_ns=5, content_hash="h"))])
+    assert m1.get(src) == lc.ManifestEntry(size=2, mtime_ns=5, content_hash="h")
+    m1.save()
+    m1.close()
+
+    import sqlite3
+
+    with sqlite3.connect(str(db)) as conn:
+        keys = [r[0] for r in conn.execute("SELECT path_key FROM entries")]
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert keys == [str(Path("data") / "a.txt")]
+    assert mode == "wal"
+
+    m2 = lc.SqliteContentHashManifest(db, key_mode="relative", project_root=tmp_path / "proj")
+    m2.load()
+    assert m2.get_many([src]) == {src: lc.ManifestEntry(size=2, mtime_ns=5, content_hash="h")}
+    m2.close()
+
+
+def test_sqlite_manifest_get_many_batches_and_sees_unsaved_entries(tmp_path: Path) -> None:
+    db = tmp_path / ".lemma_cache" / "manifest.sqlite"
+    paths = [tmp_path / f"f{i}.txt" for i in range(1200)]
+
+    m1 = lc.SqliteContentHashManifest(db)
+    m1.load()
+    m1.put_many((p, lc.ManifestEntry(size=i, mtime_ns=i, content_hash=f"h{i}")) for i, p in enumerate(paths[:1100]))
+    m1.save()
+    m1.close()
+
+    m2 = lc.SqliteContentHashManifest(db)
+    m2.load()
+    # unsaved entries win over the database
+    m2.put(paths[0], lc.ManifestEntry(size=0, mtime_ns=9, content_hash="new"))
+    m2.put(paths[1150], lc.ManifestEntry(size=1, mtime_ns=1, content_hash="dirty"))
+
+    got = m2.get_many(paths)
+    assert len(got) == 1101
+    assert got[paths[0]].content_hash == "new"
+    assert got[paths[1099]].content_hash == "h1099"
+    assert got[paths[1150]].content_hash == "dirty"
+    assert paths[1100] not in got
+    m2.close()
+
+
+def test_sqlite_manifest_migrates_json(tmp_path: Path) -> None:
+    src = tmp_path / "a.txt"
+    _write_text(src, "a\n")
+    cache_dir = tmp_path / ".lemma_cache"
+
+    legacy = lc.ContentHashManifest(cache_dir / "manifest.json")
+    legacy.load()
+    legacy.put(src, lc.ManifestEntry(size=1, mtime_ns=2, content_hash="legacy"))
+    legacy.save()
+
+    m = lc.open_manifest(cache_dir, backend="sqlite")
+    m.load()
+    assert m.get(src) == lc.ManifestEntry(size=1, mtime_ns=2, content_hash="legacy")
+
+    # migration runs once: later JSON edits are not re-imported
+    legacy.put(src, lc.ManifestEntry(size=1, mtime_ns=2, content_hash="newer"))
+    legacy.save()
+    m2 = lc.open_manifest(cache_dir, backend="sqlite")
+    m2.load()
+    assert m2.get(src).content_hash == "legacy"
+
+
+def test_sqlite_manifest_concurrent_writers(tmp_path: Path) -> None:
+    a = tmp_path / "a.txt"
+    b = tmp_path / "b.txt"
+    _write_text(a, "a\n")
+    _write_text(b, "b\n")
+    cache_dir = tmp_path / ".lemma_cache"
+
+    s1 = lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), manifest_backend="sqlite")
+    s2 = lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), manifest_backend="sqlite")
+    s1.content_hash(a)
+    s2.content_hash(b)
+    s1.flush()
+    s2.flush()
+
+    m = lc.open_manifest(cache_dir, backend="sqlite")
+    m.load()
+    assert m.get(a) is not None and m.get(b) is not None
+
+
+def test_open_manifest_rejects_unknown_backend(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="backend"):
+        lc.open_manifest(tmp_path, backend="yaml")
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_binary_payload_roundtrip(compress: bool) -> None:
+    payload = lc.LemmaCachePayload(
+        lemmas=Counter({"rosa": 3, "puella": 1, "æquitas": 2 ** 40}),
+        ref_tags=Counter({"cap": 2}),
+    )
+    packed = lc.PackedLemmaCachePayload(lc.encode_payload_binary(payload, compress=compress))
+
+    assert packed.lemmas == payload.lemmas
+    assert packed.ref_tags == payload.ref_tags
+
+    lemmas, refs = Counter({"rosa": 1, "deus": 1}), Counter()
+    packed.merge_into(lemmas, refs)
+    assert lemmas == Counter({"rosa": 4, "deus": 1, "puella": 1, "æquitas": 2 ** 40})
+    assert refs == Counter({"cap": 2})
+
+
+def test_binary_payload_rejects_other_cache_version(monkeypatch) -> None:
+    data = lc.encode_payload_binary(lc.LemmaCachePayload(lemmas=Counter({"a": 1}), ref_tags=Counter()))
+    monkeypatch.setattr(lc, "CACHE_VERSION", lc.CACHE_VERSION + 1)
+    with pytest.raises(ValueError, match="cache version"):
+        lc.PackedLemmaCachePayload(data)
+
+
+def test_session_binary_format_migrates_json_objects(tmp_path: Path) -> None:
+    src = tmp_path / "a.txt"
+    _write_text(src, "rosa\n")
+    cache_dir = tmp_path / ".lemma_cache"
+    payload0 = lc.LemmaCachePayload(lemmas=Counter({"rosa": 1}), ref_tags=Counter())
+
+    with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash()) as s:
+        s.get_or_compute(src, lambda: payload0)
+    assert [p.suffix for p in (cache_dir / "objects").rglob("*.*")] == [".json"]
+
+    def fail():
+        raise AssertionError("should be served from the JSON object")
+
+    with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), payload_format="binary") as s:
+        got, hit = s.get_or_compute(src, fail)
+        assert hit is True and got.lemmas == payload0.lemmas
+    assert [p.suffix for p in (cache_dir / "objects").rglob("*.*")] == [".bin"]
+
+    with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), payload_format="binary") as s:
+        got, hit = s.get_or_compute(src, fail)
+        assert hit is True and isinstance(got, lc.PackedLemmaCachePayload)
+        assert got.lemmas == payload0.lemmas
+
+
+def test_session_binary_format_keeps_json_for_nul_keys(tmp_path: Path) -> None:
+    src = tmp_path / "a.txt"
+    _write_text(src, "x\n")
+    cache_dir = tmp_path / ".lemma_cache"
+    payload0 = lc.LemmaCachePayload(lemmas=Counter({"a\0b": 1}), ref_tags=Counter())
+
+    with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), payload_format="binary") as s:
+        s.get_or_compute(src, lambda: payload0)
+        got, hit = s.get_or_compute(src, lambda: payload0)
+    assert hit is True and got.lemmas == payload0.lemmas
+    assert [p.suffix for p in (cache_dir / "objects").rglob("*.*")] == [".json"]
+
+
+@pytest.mark.parametrize("payload_format", ["json", "binary"])
+def test_sqlite_object_store_batches_commits(tmp_path: Path, payload_format: str) -> None:
+    cache_dir = tmp_path / ".lemma_cache"
+    store = lc.SqliteObjectStore(cache_dir, payload_format=payload_format, commit_every=3)
+    payload0 = lc.LemmaCachePayload(lemmas=Counter({"rosa": 2}), ref_tags=Counter({"cap": 1}))
+
+    for i in range(4):
+        store.put(f"{i:064x}", payload0)
+    # first three committed, the fourth still pending but visible
+    import sqlite3
+
+    with sqlite3.connect(str(cache_dir / "objects.sqlite")) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM objects").fetchone()[0] == 3
+    got, _loc = store.get(f"{3:064x}")
+    assert got.lemmas == payload0.lemmas
+    store.close()
+
+    reopened = lc.SqliteObjectStore(cache_dir, payload_format=payload_format)
+    for i in range(4):
+        got, _loc = reopened.get(f"{i:064x}")
+        assert got.lemmas == payload0.lemmas and got.ref_tags == payload0.ref_tags
+    assert reopened.get("f" * 64) is None
+    reopened.close()
+    assert not (cache_dir / "objects").exists()
+
+
+def test_session_sqlite_object_store_and_compaction(tmp_path: Path) -> None:
+    srcs = []
+    for i in range(3):
+        p = tmp_path / f"f{i}.txt"
+        _write_text(p, f"text {i}\n")
+        srcs.append(p)
+    cache_dir = tmp_path / ".lemma_cache"
+
     def compute():
         return lc.LemmaCachePayload(lemmas=Counter({"x": 1}), ref_tags=Counter())
 
-    with pytest.raises(lc.CacheLockTimeout):
-        lc.get_or_compute_cached(
-            path=src,
-            cache_dir=cache_dir,
-            config_hash=config_hash,
-            compute_fn=compute,
-            use_manifest=False,
-            verbose=False,
-            lock_timeout_sec=0.2,
+    # loose objects from the file layout
+    with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash()) as s:
+        for p in srcs[:2]:
+            s.get_or_compute(p, compute)
+    assert len(list((cache_dir / "objects").rglob("*.json"))) == 2
+
+    # sqlite store still serves them (moving them into the pack) and adds new ones
+    with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), object_store="sqlite") as s:
+        assert s.get_or_compute(srcs[0], compute)[1] is True
+        assert s.get_or_compute(srcs[2], compute)[1] is False
+    assert len(list((cache_dir / "objects").rglob("*.json"))) == 1
+
+    rep = lc.compact_cache(cache_dir)
+    assert rep.packed_objects == 1
+    assert not list((cache_dir / "objects").rglob("*.json"))
+
+    def fail():
+        raise AssertionError("all objects should be packed")
+
+    with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), object_store="sqlite") as s:
+        assert all(s.get_or_compute(p, fail)[1] for p in srcs)
+
+
+def test_session_sqlite_miss_is_visible_before_flush(tmp_path: Path) -> None:
+    src = tmp_path / "a.txt"
+    _write_text(src, "rosa\n")
+    cache_dir = tmp_path / ".lemma_cache"
+
+    def compute():
+        return lc.LemmaCachePayload(lemmas=Counter({"rosa": 1}), ref_tags=Counter())
+
+    def fail():
+        raise AssertionError("the first session's object should be committed")
+
+    with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), object_store="sqlite") as first:
+        assert first.get_or_compute(src, compute)[1] is False
+        # a second handle (another process in practice) sees it while `first` is still open
+        with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), object_store="sqlite") as second:
+            payload, hit = second.get_or_compute(src, fail)
+    assert hit is True and payload.lemmas == Counter({"rosa": 1})
+
+
+def _payload(n: int) -> lc.LemmaCachePayload:
+    return lc.LemmaCachePayload(lemmas=Counter({f"w{i}": 1 for i in range(n)}), ref_tags=Counter())
+
+
+def test_memory_cache_lru_evicts_by_size(tmp_path: Path) -> None:
+    one = lc.estimate_payload_bytes(_payload(10))
+    mem = lc.PayloadMemoryCache(max_bytes=2 * one + one // 2)
+
+    mem.put(tmp_path, "a", _payload(10))
+    mem.put(tmp_path, "b", _payload(10))
+    assert mem.get(tmp_path, "a") is not None  # "b" is now least recently used
+    mem.put(tmp_path, "c", _payload(10))
+
+    assert mem.get(tmp_path, "b") is None
+    assert mem.get(tmp_path, "a") is not None
+    assert mem.get(tmp_path, "c") is not None
+    assert mem.get(tmp_path / "other", "a") is None
+    assert mem.stats() == {
+        "entries": 2,
+        "bytes": 2 * one,
+        "max_bytes": 2 * one + one // 2,
+        "hits": 3,
+        "misses": 2,
+        "evictions": 1,
+    }
+
+    mem.put(tmp_path, "big", _payload(100))  # larger than the whole budget
+    assert mem.get(tmp_path, "big") is None
+    assert len(mem) == 2
+
+
+def test_session_memory_tier_skips_disk(tmp_path: Path, monkeypatch) -> None:
+    src = tmp_path / "x.txt"
+    _write_text(src, "x\n")
+    cache_dir = tmp_path / ".lemma_cache"
+    mem = lc.PayloadMemoryCache()
+
+    def open_session():
+        return lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), verbose=False, memory_cache=mem)
+
+    with open_session() as s1:
+        p1, hit1 = s1.get_or_compute(src, lambda: _payload(3))
+    assert hit1 is False
+
+    def no_disk(self, key):
+        raise AssertionError("disk tier read")
+
+    monkeypatch.setattr(lc.FileObjectStore, "get", no_disk)
+    with open_session() as s2:
+        p2, hit2 = s2.get_or_compute(src, lambda: _payload(0))
+    assert hit2 is True
+    assert p2 is p1
+    assert s2.stats.memory_hits == 1
+
+
+def test_get_or_compute_cached_uses_shared_memory_tier(tmp_path: Path) -> None:
+    src = tmp_path / "x.txt"
+    _write_text(src, "x\n")
+    kw = dict(path=src, cache_dir=tmp_path / ".lemma_cache", config_hash=_config_hash(), verbose=False)
+
+    mem = lc.shared_memory_cache()
+    hits0 = mem.hits
+    lc.get_or_compute_cached(compute_fn=lambda: _payload(3), use_memory_cache=True, **kw)
+    got, hit = lc.get_or_compute_cached(compute_fn=lambda: _payload(0), use_memory_cache=True, **kw)
+    assert hit is True and len(got.lemmas) == 3
+    assert mem.hits == hits0 + 1
+
+    # off by default
+    lc.get_or_compute_cached(compute_fn=lambda: _payload(0), **kw)
+    assert mem.hits == hits0 + 1
+
+
+
+def test_get_or_compute_cached_tracks_access_only_on_request(tmp_path: Path) -> None:
+    src = tmp_path / "x.txt"
+    _write_text(src, "x\n")
+    cache_dir = tmp_path / ".lemma_cache"
+    kw = dict(path=src, cache_dir=cache_dir, config_hash=_config_hash(), compute_fn=lambda: _payload(3))
+
+    lc.get_or_compute_cached(**kw)
+    lc.get_or_compute_cached(**kw)
+    assert not (cache_dir / "access.sqlite").exists()
+
+    _p, hit = lc.get_or_compute_cached(track_access=True, **kw)
+    assert hit is True
+    assert (cache_dir / "access.sqlite").exists()
+
+@pytest.mark.parametrize("object_store", ["files", "sqlite"])
+def test_prune_max_bytes_evicts_least_recently_used(tmp_path: Path, object_store: str) -> None:
+    cache_dir = tmp_path / ".lemma_cache"
+    srcs = []
+    for i in range(3):
+        p = tmp_path / f"f{i}.txt"
+        _write_text(p, f"text {i}\n")
+        srcs.append(p)
+
+    def open_session():
+        return lc.LemmaCacheSession(
+            cache_dir, config_hash=_config_hash(), verbose=False, object_store=object_store
+        )
+
+    with open_session() as s:
+        for p in srcs:
+            s.get_or_compute(p, lambda: _payload(20))
+    with open_session() as s:
+        s.get_or_compute(srcs[0], lambda: _payload(0))  # f0 is now the most recent
+
+    index = lc.AccessIndex(cache_dir.resolve())
+    total = index.total_bytes()
+    index.close()
+    assert total > 0
+
+    rep = lc.prune_cache(cache_dir, max_bytes=total - 1, verbose=False)
+    assert rep.removed_objects == 1
+    assert rep.bytes_kept + rep.bytes_freed == total
+
+    # f1 (least recently used) was evicted; f0 and f2 are still cached
+    with open_session() as s:
+        hits = [s.get_or_compute(p, lambda: _payload(20))[1] for p in srcs]
+    assert hits == [True, False, True]
+
+
+def test_prune_max_bytes_indexes_existing_cache(tmp_path: Path) -> None:
+    cache_dir = tmp_path / ".lemma_cache"
+    srcs = []
+    for i in range(4):
+        p = tmp_path / f"f{i}.txt"
+        _write_text(p, f"text {i}\n")
+        srcs.append(p)
+
+    # objects written without access tracking (e.g. by an older version)
+    with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), verbose=False, track_access=False) as s:
+        for p in srcs:
+            s.get_or_compute(p, lambda: _payload(5))
+    objs = sorted((cache_dir / "objects").rglob("*.json"))
+    for age, obj in enumerate(objs):
+        _touch_mtime(obj, seconds_ago=1000 * (age + 1))
+
+    size = objs[0].stat().st_size
+    rep = lc.prune_cache(cache_dir, max_bytes=2 * size, verbose=False)
+    assert rep.removed_objects == 2
+    assert rep.bytes_kept == 2 * size
+    # the two newest by mtime survive
+    assert sorted((cache_dir / "objects").rglob("*.json")) == sorted(objs[:2])
+
+
+def test_gc_cache_sweeps_unreachable_objects(tmp_path: Path, monkeypatch) -> None:
+    cache_dir = tmp_path / ".lemma_cache"
+    src = tmp_path / "a.txt"
+    _write_text(src, "a\n")
+    old_src = tmp_path / "old.txt"
+    _write_text(old_src, "old\n")
+
+    def fill(config_hash: str, object_store: str, path: Path) -> None:
+        with lc.LemmaCacheSession(
+            cache_dir, config_hash=config_hash, verbose=False, object_store=object_store
+        ) as s:
+            s.get_or_compute(path, lambda: _payload(5))
+
+    fill("live", "files", src)
+    fill("obsolete", "files", src)
+    fill("obsolete", "sqlite", old_src)
+    # an object written under an older CACHE_VERSION
+    monkeypatch.setattr(lc, "CACHE_VERSION", lc.CACHE_VERSION - 1)
+    fill("live", "files", src)
+    monkeypatch.undo()
+
+    # old.txt is edited: its previous content is no longer reachable either
+    _write_text(old_src, "new content\n")
+    os.utime(old_src, ns=(time.time_ns(), time.time_ns() + 10**9))
+    with lc.LemmaCacheSession(cache_dir, config_hash="live", verbose=False) as s:
+        s.content_hash(old_src)
+
+    dry = lc.gc_cache(cache_dir, live_config_hashes=["live"], dry_run=True)
+    assert dry.removed_objects == 3
+    assert dry.kept_objects == 1
+    assert len(list((cache_dir / "objects").rglob("*.json"))) == 3
+
+    rep = lc.gc_cache(cache_dir, live_config_hashes=["live"])
+    assert rep == dry
+    assert rep.removed_by_config == {"obsolete": 2, "live": 1}
+    assert sum(rep.bytes_freed_by_config.values()) == rep.bytes_freed > 0
+
+    with lc.LemmaCacheSession(cache_dir, config_hash="live", verbose=False, object_store="sqlite") as s:
+        assert s.get_or_compute(src, lambda: _payload(0))[1] is True
+    with lc.LemmaCacheSession(cache_dir, config_hash="obsolete", verbose=False, object_store="sqlite") as s:
+        assert s.get_or_compute(old_src, lambda: _payload(0))[1] is False
+
+
+def test_gc_cache_dry_run_does_not_create_access_index(tmp_path: Path) -> None:
+    cache_dir = tmp_path / ".lemma_cache"
+    src = tmp_path / "a.txt"
+    _write_text(src, "a\n")
+    with lc.LemmaCacheSession(cache_dir, config_hash="old", verbose=False, track_access=False) as s:
+        s.get_or_compute(src, lambda: _payload(1))
+
+    dry = lc.gc_cache(cache_dir, live_config_hashes=["live"], dry_run=True)
+    assert dry.removed_objects == 1
+    assert dry.removed_by_config == {"unknown": 1}
+    assert not (cache_dir / "access.sqlite").exists()
+
+
+def test_gc_cache_requires_manifest_or_content_hashes(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="no manifest"):
+        lc.gc_cache(tmp_path, live_config_hashes=["x"])
+
+
+@pytest.mark.parametrize("object_store", ["files", "sqlite"])
+def test_session_plan_splits_hits_and_misses(tmp_path: Path, monkeypatch, object_store: str) -> None:
+    cache_dir = tmp_path / ".lemma_cache"
+    srcs = []
+    for i in range(6):
+        p = tmp_path / f"f{i}.txt"
+        _write_text(p, f"text {i}\n")
+        srcs.append(p)
+
+    def open_session():
+        return lc.LemmaCacheSession(
+            cache_dir, config_hash=_config_hash(), verbose=False, object_store=object_store,
+            payload_format="binary",
         )
+
+    with open_session() as s:
+        for p in srcs[:4]:
+            s.get_or_compute(p, lambda: _payload(3))
+
+    hashed = []
+    real_hash = lc.hash_file_content
+    monkeypatch.setattr(lc, "hash_file_content", lambda p, *a: hashed.append(p) or real_hash(p, *a))
+
+    with open_session() as s:
+        plan = s.plan(srcs, workers=3)
+        assert hashed == srcs[4:]  # the manifest covers the cached files
+        assert plan.hits == srcs[:4]
+        assert plan.misses == srcs[4:]
+
+        loaded = list(s.load_hits(plan, workers=3))
+        assert [p for p, _ in loaded] == srcs[:4]
+        assert all(dict(payload.lemmas) == dict(_payload(3).lemmas) for _, payload in loaded)
+
+        hashed.clear()
+        payload, hit = s.get_or_compute(srcs[4], lambda: _payload(1))
+        assert hit is False and hashed == []  # planned key reused
+
+
+def test_session_load_hits_reports_vanished_objects_as_misses(tmp_path: Path) -> None:
+    cache_dir = tmp_path / ".lemma_cache"
+    src = tmp_path / "a.txt"
+    _write_text(src, "a\n")
+    with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), verbose=False) as s:
+        s.get_or_compute(src, lambda: _payload(1))
+
+    with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), verbose=False) as s:
+        plan = s.plan([src])
+        for obj in (cache_dir / "objects").rglob("*.json"):
+            obj.unlink()
+        assert list(s.load_hits(plan)) == []
+        assert plan.misses == [src]
+
+
+def test_session_stats(tmp_path: Path) -> None:
+    cache_dir = tmp_path / ".lemma_cache"
+    a = tmp_path / "a.txt"
+    b = tmp_path / "b.txt"
+    _write_text(a, "a\n")
+    _write_text(b, "b\n")
+
+    with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), verbose=False) as s1:
+        s1.get_or_compute(a, lambda: _payload(3))
+        s1.get_or_compute(b, lambda: _payload(3))
+    st = s1.stats
+    assert (st.hits, st.misses, st.files_hashed, st.manifest_reused) == (0, 2, 2, 0)
+    assert st.hash_bytes == 4
+    assert st.bytes_written > 0 and st.bytes_read == 0
+    assert st.lock_acquisitions == 2
+
+    # corrupt one object: it is reported as broken and recomputed
+    obj = sorted((cache_dir / "objects").rglob("*.json"))[0]
+    obj.write_text("{not json", encoding="utf-8")
+
+    with lc.LemmaCacheSession(cache_dir, config_hash=_config_hash(), verbose=False) as s2:
+        s2.get_or_compute(a, lambda: _payload(3))
+        s2.get_or_compute(b, lambda: _payload(3))
+    st = s2.stats
+    assert (st.hits, st.misses, st.manifest_reused, st.files_hashed) == (1, 1, 2, 0)
+    assert st.broken_objects == 2  # fast path and double-check after the lock
+    assert st.bytes_read > 0
+    assert st.hit_rate == 0.5
+
+    meta = st.to_meta()
+    assert meta["hit_rate"] == 0.5 and meta["misses"] == 1
+    line = st.summary_line()
+    assert line.startswith("lemma_cache: hits=1 misses=1 hit_rate=50.0%")
+    assert "broken=2" in line and "manifest_reused=2" in line
+
+
+def test_cache_stats_merge_and_take() -> None:
+    a = lc.CacheStats(hits=2, lock_wait_sec=0.5)
+    b = lc.CacheStats(hits=1, misses=3, bytes_read=10)
+    a.merge(b)
+    assert (a.hits, a.misses, a.bytes_read, a.lock_wait_sec) == (3, 3, 10, 0.5)
+
+    taken = a.take()
+    assert taken.hits == 3
+    assert a == lc.CacheStats()
+    assert a.hit_rate is None
+    assert "hit_rate=-" in a.summary_line()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+from count_corpus_vocabula.nlp_hooks import _PrecomputedNLP, build_pipeline, bulk_annotate
+from runner_helpers import run_with_config
+
+
+@dataclass
+class DummyWord:
+    upos: str
+    lemma: str
+    text: str
+    start_char: int = 0
+
+
+@dataclass
+class DummySentence:
+    words: list
+    text: str = ""
+
+    @property
+    def tokens(self):
+        return self.words
+
+
+@dataclass
+class DummyDoc:
+    sentences: list
+
+
+class WhitespaceNLP:
+    """Tags every whitespace token as NOUN; records how it was called."""
+
+    def __init__(self):
+        self.calls: list = []
+        self.bulk_calls: list = []
+
+    def __call__(self, text: str) -> DummyDoc:
+        self.calls.append(text)
+        words = [DummyWord(upos="NOUN", lemma=t.lower(), text=t) for t in text.split()]
+        return DummyDoc(sentences=[DummySentence(words=words, text=text)])
+
+
+def test_bulk_annotate_falls_back_to_one_call_per_text() -> None:
+    nlp = WhitespaceNLP()
+    docs = bulk_annotate(nlp, ["rosa", "puella"])
+    assert len(docs) == 2
+    assert nlp.calls == ["rosa", "puella"]
+
+
+def test_precomputed_nlp_returns_doc_once_then_delegates() -> None:
+    nlp = WhitespaceNLP()
+    doc = DummyDoc(sentences=[])
+    pre = _PrecomputedNLP(doc, nlp)
+    assert pre("anything") is doc
+    pre("rosa")
+    assert nlp.calls == ["rosa"]
+
+
+def test_build_pipeline_passes_options_through_nlpo_toolkit(monkeypatch) -> None:
+    import sys
+    import types
+
+    calls: list = []
+    fake = types.ModuleType("nlpo_toolkit.nlp")
+    fake.build_stanza_pipeline = lambda **kwargs: calls.append(kwargs) or "nlp"
+    monkeypatch.setitem(sys.modules, "nlpo_toolkit", types.ModuleType("nlpo_toolkit"))
+    monkeypatch.setitem(sys.modules, "nlpo_toolkit.nlp", fake)
+
+    assert build_pipeline("la", "perseus", True, pretokenized=True, pos_batch_size=500) == ("nlp", "perseus")
+    assert calls == [{
+        "lang": "la",
+        "processors": "tokenize,pos,lemma",
+        "package": "perseus",
+        "use_gpu": False,
+        "tokenize_pretokenized": True,
+        "pos_batch_size": 500,
+    }]
+
+
+def test_count_group_batched_matches_unbatched() -> None:
+    pytest.importorskip("nlpo_toolkit")
+    from count_corpus_vocabula.nlp_hooks import count_group
+
+    text = "\n\n".join(f"Rosa puella{i % 3} deus" for i in range(40))
+
+    plain = count_group(text, WhitespaceNLP(), chunk_chars=60)
+    batched = count_group(text, WhitespaceNLP(), chunk_chars=60, batch_docs=8)
+    assert batched == plain
+
+
+def test_runner_passes_batching_config(tmp_path: Path) -> None:
+    (tmp_path / "a.txt").write_text("rosa\n", encoding="utf-8")
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": [str(tmp_path / "a.txt")]}},
+        "batching": {"docs_per_batch": 16, "chunk_chars": 5000, "pos_batch_size": 3000, "lemma_batch_size": 500},
+    }
+    seen: dict = {}
+
+    def build_pipeline_fn(language, stanza_package, cpu_only, **kwargs):
+        seen["pipeline"] = kwargs
+        return object(), stanza_package
+
+    def count_group_fn(text, nlp, **kwargs):
+        seen["count"] = kwargs
+        return Counter()
+
+    rc = run_with_config(tmp_path, cfg, count_group_fn, build_pipeline_fn=build_pipeline_fn)
+    assert rc == 0
+    assert seen["pipeline"] == {"pos_batch_size": 3000, "lemma_batch_size": 500}
+    assert seen["count"]["batch_docs"] == 16
+    assert seen["count"]["chunk_chars"] == 5000
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import itertools
+import pickle
+
+import pytest
+
+from collections import Counter
+
+from count_corpus_vocabula.normalizer import (
+    CompiledNormalizer,
+    KeyNormalizer,
+    normalize_text,
+    split_normalization,
+)
+
+FLAGS = ["casefold", "normalize_ligatures", "map_u_v", "map_i_j", "strip_diacritics"]
+
+SAMPLES = [
+    "",
+    "Vita Iulius æternus, Cæsar (et) “Œdipus” jus\tviá  ḉ ǰ ß İ",
+    "a \t\t b  \t(  ́(ć\t [sic] {x} 'q' \"r\" «s» ‘t’",
+    "Ἀριστοτέλης φυσικὴ ἀκρόασις, 한국어, ﬁnis, Å Å",
+    "ASCII only text with v and j and (brackets)  and   spaces",
+    # every code point up to Greek Extended, incl. combining marks
+    "".join(chr(i) for i in range(0x2000)),
+]
+
+
+@pytest.mark.parametrize("flags", list(itertools.product([False, True], repeat=len(FLAGS))))
+@pytest.mark.parametrize("unicode_nf", [None, "NFC", "NFD"])
+def test_compiled_normalizer_matches_normalize_text(flags, unicode_nf) -> None:
+    cfg = {"normalization": dict(zip(FLAGS, flags), unicode_nf=unicode_nf)}
+    norm = CompiledNormalizer(cfg)
+    for text in SAMPLES:
+        assert norm(text) == normalize_text(text, cfg)
+
+
+def test_compiled_normalizer_dense_and_sparse_non_ascii_agree() -> None:
+    cfg = {"normalization": {"strip_diacritics": True, "unicode_nf": "NFC"}}
+    norm = CompiledNormalizer(cfg)
+    sparse = "dominus " * 500 + "dóminus"
+    dense = "dóminus ánima " * 50
+    assert norm(sparse) == normalize_text(sparse, cfg)
+    assert norm(dense) == normalize_text(dense, cfg)
+
+
+def test_compiled_normalizer_pickles_by_config() -> None:
+    cfg = {"normalization": {"map_u_v": True, "strip_diacritics": True}}
+    norm = pickle.loads(pickle.dumps(CompiledNormalizer(cfg)))
+    assert norm("Vía (x)") == normalize_text("Vía (x)", cfg)
+
+
+@pytest.mark.parametrize("flags", list(itertools.product([False, True], repeat=len(FLAGS))))
+def test_key_normalizer_matches_normalize_text_per_word(flags) -> None:
+    cfg = {"normalization": dict(zip(FLAGS, flags))}
+    norm = KeyNormalizer(cfg["normalization"])
+    for word in "Vita Iulius æternus Cæsar Œdipus jus viá ḉ ǰ dóminus Ἀριστοτέλης".split():
+        assert norm(word) == normalize_text(word, cfg)
+
+
+def test_key_normalizer_merges_colliding_keys() -> None:
+    norm = KeyNormalizer({"map_u_v": True, "strip_diacritics": True})
+    out = norm.apply(Counter({"uita": 2, "vita": 3, "vitá": 1, "rosa": 4}))
+    assert out == Counter({"uita": 6, "rosa": 4})
+    assert (norm.types, norm.merged) == (4, 2)
+
+
+def test_split_normalization() -> None:
+    cfg = {"normalization": {"mode": "type", "unicode_nf": "NFC", "map_u_v": True, "casefold": False}}
+    assert split_normalization(cfg) == ({"unicode_nf": "NFC"}, {"map_u_v": True, "casefold": False})
+    cfg["normalization"]["mode"] = "text"
+    assert split_normalization(cfg) == ({"unicode_nf": "NFC", "map_u_v": True, "casefold": False}, {})
+    with pytest.raises(ValueError, match="normalization.mode"):
+        split_normalization({"normalization": {"mode": "chars"}})
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import re
 from collections import Counter
 from pathlib import Path
 
 import pytest
 
 from count_corpus_vocabula.ref_tags import (
+    RefTagDetector,
+    compile_ref_tag_matcher,
     load_ref_tag_patterns,
     strip_and_count_ref_tags,
     RefTagPattern,
@@ -100,4 +103,135 @@ def test_strip_and_count_no_match(tmp_path: Path):
     cleaned, counter = strip_and_count_ref_tags(text, patterns)
 
     assert cleaned == text
-    assert counter == Counter()
\ No newline at end of file
+    assert counter == Counter()
+
+# ---------------------------------------------------------------------------
+# compile_ref_tag_matcher
+# ---------------------------------------------------------------------------
+
+def _write_tags(tmp_path: Path, body: str) -> list[RefTagPattern]:
+    p = tmp_path / "ref_tags.txt"
+    p.write_text(body, encoding="utf-8")
+    return load_ref_tag_patterns(p)
+
+
+def _sequential(text: str, patterns) -> tuple[str, Counter]:
+    c = Counter()
+    for p in patterns:
+        text, n = p.compiled.subn(" ", text)
+        if n:
+            c[p.name] += n
+    return text, c
+
+
+def test_matcher_matches_sequential_counts(tmp_path: Path):
+    patterns = _write_tags(
+        tmp_path,
+        "metaphys\tmetaphys\\.\n"
+        "physic\tphysic\\.\n"
+        "cap\tcap\\.\n"
+        "lib\tlib\\.\n",
+    )
+    matcher = compile_ref_tag_matcher(patterns)
+    assert matcher.combined is not None
+
+    text = "Rosa metaphys. 3 et physic. cap. 12 lib. cap. puella"
+    assert matcher.strip_and_count(text) == _sequential(text, patterns)
+    assert strip_and_count_ref_tags(text, matcher) == _sequential(text, patterns)
+
+
+def test_matcher_overlapping_regexes_match_sequential(tmp_path: Path):
+    # "num" runs first and eats the 12 that "cite" would have matched
+    patterns = _write_tags(tmp_path, "num\t\\d+\ncite\tcap\\. \\d+\n")
+    matcher = compile_ref_tag_matcher(patterns)
+    assert matcher.combined is None
+
+    text = "vide cap. 12 et 7"
+    cleaned, counter = matcher.strip_and_count(text)
+    assert counter == Counter({"num": 2})
+    assert (cleaned, counter) == _sequential(text, patterns)
+
+
+def test_matcher_overlapping_literals_match_sequential(tmp_path: Path):
+    # "bc" listed first removes the overlap before "ab" is tried
+    patterns = _write_tags(tmp_path, "second\tbc\nfirst\tab\n")
+    matcher = compile_ref_tag_matcher(patterns)
+    assert matcher.combined is None
+    assert matcher.strip_and_count("abc") == _sequential("abc", patterns)
+    assert matcher.strip_and_count("abc")[1] == Counter({"second": 1})
+
+
+def test_shipped_ref_tags_are_combined(tmp_path: Path):
+    patterns = load_ref_tag_patterns(Path(__file__).resolve().parents[1] / "config" / "ref_tags.txt")
+    matcher = compile_ref_tag_matcher(patterns)
+    assert matcher.combined is not None
+    assert len(matcher.steps) < len(patterns)
+
+    text = "Metaphys. lib. 3 cap. 12 physic. art. caphysic libart metaphysica"
+    assert matcher.strip_and_count(text) == _sequential(text, patterns)
+
+
+def test_matcher_matches_sequential_on_random_literals(tmp_path: Path):
+    import random
+
+    rng = random.Random(7)
+    for _ in range(300):
+        words = ["".join(rng.choice("abc.") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(2, 6))]
+        patterns = _write_tags(tmp_path, "".join(f"t{i}\t{re.escape(w)}\n" for i, w in enumerate(words)))
+        text = "".join(rng.choice("abc. ") for _ in range(40))
+        assert compile_ref_tag_matcher(patterns).strip_and_count(text) == _sequential(text, patterns), words
+
+
+def test_matcher_literal_prefix_keeps_file_order(tmp_path: Path):
+    # "cap" listed before "capit": at the same position the first one wins,
+    # exactly as with one subn per pattern.
+    patterns = _write_tags(tmp_path, "short\tcap\nlong\tcapit\\.\n")
+    matcher = compile_ref_tag_matcher(patterns)
+
+    cleaned, counter = matcher.strip_and_count("capit. cap")
+    assert counter == Counter({"short": 2})
+    assert (cleaned, counter) == _sequential("capit. cap", patterns)
+
+
+def test_matcher_shared_name_is_summed(tmp_path: Path):
+    patterns = _write_tags(tmp_path, "bib\tgen\\.\nbib\texod\\.\n")
+    cleaned, counter = strip_and_count_ref_tags("gen. et exod. gen.", patterns)
+    assert counter == Counter({"bib": 3})
+    assert "gen." not in cleaned and "exod." not in cleaned
+
+
+def test_matcher_falls_back_for_backreferences(tmp_path: Path):
+    patterns = _write_tags(tmp_path, "dup\t(\\w)\\1\\.\ncap\tcap\\.\n")
+    matcher = compile_ref_tag_matcher(patterns)
+    assert matcher.combined is None
+
+    text = "aa. cap. ab."
+    assert matcher.strip_and_count(text) == _sequential(text, patterns)
+
+
+def test_matcher_is_picklable(tmp_path: Path):
+    import pickle
+
+    patterns = _write_tags(tmp_path, "cap\tcap\\.\nnum\t\\d+\n")
+    matcher = pickle.loads(pickle.dumps(compile_ref_tag_matcher(patterns)))
+    assert matcher.strip_and_count("cap. 7")[1] == Counter({"cap": 1, "num": 1})
+
+
+# ---------------------------------------------------------------------------
+# RefTagDetector
+# ---------------------------------------------------------------------------
+
+def test_detector_classifies_literal_tokens(tmp_path: Path):
+    patterns = _write_tags(tmp_path, "cap\tcap\nlib\tlib\\.\nnum\t\\d+\n")
+    detector = RefTagDetector(patterns)
+
+    assert detector("cap") == "cap"
+    assert detector("Cap.") == "cap"
+    assert detector("lib") == "lib"
+    assert detector("capitulum") == ""
+    assert [p.name for p in detector.residual_patterns] == ["num"]
+
+
+def test_detector_first_name_wins(tmp_path: Path):
+    patterns = _write_tags(tmp_path, "a\tcap\nb\tcap\\.\n")
+    assert RefTagDetector(patterns)("cap.") == "a"
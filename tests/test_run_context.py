@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+
+import count_corpus_vocabula.run_context as ctx_mod
+import count_corpus_vocabula.runner as runner_mod
+from runner_helpers import run_with_config
+
+
+def _files(tmp_path: Path) -> tuple[Path, Path]:
+    wl = tmp_path / "words.txt"
+    wl.write_text("rosa\n  puella \n\n", encoding="utf-8")
+    ref = tmp_path / "ref_tags.txt"
+    ref.write_text("cap\tcap\\.\nnum\t\\d+\n", encoding="utf-8")
+    return wl, ref
+
+
+def _load(tmp_path: Path, wl: Path, ref: Path, **kw):
+    return ctx_mod.load_run_context(
+        ref_path=ref,
+        ref_mode="regex",
+        wordlist_path=wl,
+        trace_cfg={"enabled": True, "path": "trace.tsv"},
+        out_dir=tmp_path / "output",
+        script_dir=tmp_path,
+        **kw,
+    )
+
+
+def test_load_run_context_loads_all_resources(tmp_path: Path) -> None:
+    wl, ref = _files(tmp_path)
+    ctx = _load(tmp_path, wl, ref)
+
+    assert ctx.wordlist == frozenset({"rosa", "puella"})
+    assert ctx.ref_tags is not None and ctx.ref_tags.detector is None
+    assert ctx.ref_tags.matcher.strip_and_count("cap. 7")[1] == Counter({"cap": 1, "num": 1})
+    assert ctx.trace_kwargs["trace_tsv"] == (tmp_path / "trace.tsv").resolve()
+    assert set(ctx.to_meta()["load_sec"]) == {"ref_tags", "wordlist", "trace"}
+    assert ctx.memo_hits == []
+
+
+def test_memoize_reuses_until_file_changes(tmp_path: Path, monkeypatch) -> None:
+    ctx_mod.clear_memo()
+    wl, ref = _files(tmp_path)
+
+    calls = []
+    real = ctx_mod.load_wordlist
+    monkeypatch.setattr(ctx_mod, "load_wordlist", lambda p, **k: calls.append(p) or real(p, **k))
+
+    _load(tmp_path, wl, ref, memoize=True)
+    second = _load(tmp_path, wl, ref, memoize=True)
+    assert len(calls) == 1
+    assert second.memo_hits == ["ref_tags", "wordlist"]
+
+    wl.write_text("deus\n", encoding="utf-8")
+    third = _load(tmp_path, wl, ref, memoize=True)
+    assert len(calls) == 2
+    assert third.wordlist == frozenset({"deus"})
+    ctx_mod.clear_memo()
+
+
+def test_runner_loads_wordlist_once_for_all_groups(tmp_path: Path, monkeypatch) -> None:
+    wl, _ref = _files(tmp_path)
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.txt").write_text("rosa\n", encoding="utf-8")
+
+    cfg = {
+        "out_dir": "output",
+        "dictcheck": {"enabled": True, "wordlist": str(wl), "index_dir": "idx"},
+        "groups": {n: {"files": [str(tmp_path / f"{n}.txt")]} for n in ("a", "b", "c")},
+    }
+
+    calls = []
+    real = ctx_mod.load_wordlist
+    monkeypatch.setattr(ctx_mod, "load_wordlist", lambda p, **k: calls.append(p) or real(p, **k))
+    metas = []
+    monkeypatch.setattr(runner_mod, "write_run_meta", lambda meta, out_dir: metas.append(meta))
+
+    rc = run_with_config(tmp_path, cfg, lambda *a, **k: Counter({"rosa": 1, "deus": 1}))
+    assert rc == 0
+    assert len(calls) == 1
+    assert "wordlist" in metas[0]["resources"]["load_sec"]
+    known = (tmp_path / "output" / "noun_frequency_c.known.csv").read_text(encoding="utf-8")
+    assert "rosa" in known and "deus" not in known
+    assert len(list((tmp_path / "idx").glob("*.json"))) == 1
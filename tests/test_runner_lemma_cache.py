@@ -0,0 +1,440 @@
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+import count_corpus_vocabula.lemma_cache as lc
+from count_corpus_vocabula.io_utils import split_text_chunks
+from count_corpus_vocabula.nlp_adapters import AdapterDoc, AdapterSentence, AdapterWord
+from runner_helpers import read_run_meta, run_with_config, word_counter
+
+
+def test_lemma_cache_only_recounts_changed_files(tmp_path: Path) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("rosa rosa\n", encoding="utf-8")
+    (data / "b.txt").write_text("puella\n", encoding="utf-8")
+
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": [str(data / "*.txt")]}},
+        "lemma_cache": {"enabled": True, "dir": ".lemma_cache", "manifest_key_mode": "relative"},
+    }
+
+    calls: list = []
+    assert run_with_config(tmp_path, cfg, word_counter(calls)) == 0
+    assert len(calls) == 2
+
+    csv_lines = (tmp_path / "output" / "noun_frequency_g.csv").read_text(encoding="utf-8").splitlines()
+    assert csv_lines == ["lemma,count", "rosa,2", "puella,1"]
+
+    # warm run: nothing is recounted
+    calls.clear()
+    assert run_with_config(tmp_path, cfg, word_counter(calls)) == 0
+    assert calls == []
+
+    meta = read_run_meta(tmp_path)
+    assert meta["lemma_cache"]["hits"] == 2
+    assert meta["lemma_cache"]["misses"] == 0
+    assert meta["lemma_cache"]["lock_wait_sec"] >= 0.0
+    assert meta["lemma_cache"]["hit_rate"] == 1.0
+    assert meta["lemma_cache"]["manifest_reused"] == 2
+    assert meta["lemma_cache"]["files_hashed"] == 0
+    summary = (tmp_path / "output" / "summary.txt").read_text(encoding="utf-8")
+    assert "lemma_cache: hits=2 misses=0 hit_rate=100.0%" in summary
+
+    # one file changes: only that file is recounted
+    (data / "b.txt").write_text("puella puella rosa\n", encoding="utf-8")
+    calls.clear()
+    assert run_with_config(tmp_path, cfg, word_counter(calls)) == 0
+    assert len(calls) == 1
+
+    csv_lines = (tmp_path / "output" / "noun_frequency_g.csv").read_text(encoding="utf-8").splitlines()
+    assert csv_lines == ["lemma,count", "rosa,3", "puella,2"]
+
+
+def test_lemma_cache_invalidated_by_analysis_unit(tmp_path: Path) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("rosa\n", encoding="utf-8")
+
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": [str(data / "*.txt")]}},
+        "lemma_cache": {"enabled": True},
+    }
+
+    calls: list = []
+    assert run_with_config(tmp_path, cfg, word_counter(calls)) == 0
+    assert run_with_config(tmp_path, dict(cfg, analysis_unit="surface"), word_counter(calls)) == 0
+    assert len(calls) == 2
+
+
+
+def test_lemma_cache_sqlite_manifest_backend(tmp_path: Path) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("rosa\n", encoding="utf-8")
+
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": [str(data / "*.txt")]}},
+        "lemma_cache": {"enabled": True, "manifest_backend": "sqlite"},
+    }
+
+    calls: list = []
+    assert run_with_config(tmp_path, cfg, word_counter(calls)) == 0
+    assert run_with_config(tmp_path, cfg, word_counter(calls)) == 0
+    assert len(calls) == 1
+    assert (tmp_path / ".lemma_cache" / "manifest.sqlite").exists()
+    assert not (tmp_path / ".lemma_cache" / "manifest.json").exists()
+
+
+def test_lemma_cache_binary_payloads(tmp_path: Path) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("rosa rosa\n", encoding="utf-8")
+    (data / "b.txt").write_text("puella rosa\n", encoding="utf-8")
+
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": [str(data / "*.txt")]}},
+        "lemma_cache": {"enabled": True, "payload_format": "binary", "payload_compress": True},
+    }
+
+    calls: list = []
+    assert run_with_config(tmp_path, cfg, word_counter(calls)) == 0
+    cold = (tmp_path / "output" / "noun_frequency_g.csv").read_text(encoding="utf-8")
+    assert run_with_config(tmp_path, cfg, word_counter(calls)) == 0
+    warm = (tmp_path / "output" / "noun_frequency_g.csv").read_text(encoding="utf-8")
+
+    assert len(calls) == 2
+    assert cold == warm
+    assert len(list((tmp_path / ".lemma_cache" / "objects").rglob("*.bin"))) == 2
+
+
+def test_lemma_cache_memory_tier(tmp_path: Path, monkeypatch) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("rosa rosa\n", encoding="utf-8")
+    (data / "b.txt").write_text("puella\n", encoding="utf-8")
+
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": [str(data / "*.txt")]}},
+        "lemma_cache": {"enabled": True, "dir": ".lemma_cache", "memory_cache_mb": 1},
+    }
+
+    calls: list = []
+    assert run_with_config(tmp_path, cfg, word_counter(calls)) == 0
+
+    # second run in the same process: hits never reach the object store
+    def no_disk(self, key):
+        raise AssertionError("disk tier read")
+
+    monkeypatch.setattr(lc.FileObjectStore, "get", no_disk)
+    calls.clear()
+    assert run_with_config(tmp_path, cfg, word_counter(calls)) == 0
+    assert calls == []
+
+    meta = read_run_meta(tmp_path)
+    assert meta["lemma_cache"]["hits"] == 2
+    assert meta["lemma_cache"]["memory_hits"] == 2
+    csv_lines = (tmp_path / "output" / "noun_frequency_g.csv").read_text(encoding="utf-8").splitlines()
+    assert csv_lines == ["lemma,count", "rosa,2", "puella,1"]
+
+
+def test_lemma_cache_gc_keeps_objects_of_current_run(tmp_path: Path) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("rosa rosa\n", encoding="utf-8")
+    (data / "b.txt").write_text("puella\n", encoding="utf-8")
+
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": [str(data / "*.txt")]}},
+        "lemma_cache": {"enabled": True, "dir": ".lemma_cache"},
+    }
+    assert run_with_config(tmp_path, cfg, word_counter([])) == 0
+    cfg["analysis_unit"] = "surface"  # the lemma config above is no longer in use
+    assert run_with_config(tmp_path, cfg, word_counter([])) == 0
+
+    live = lc.live_config_hashes_from_run_meta([tmp_path / "output" / "run_meta.json"])
+    rep = lc.gc_cache(tmp_path / ".lemma_cache", live_config_hashes=live)
+    assert (rep.removed_objects, rep.kept_objects) == (2, 2)
+
+
+class _TaggingNLP:
+    """Capitalized words are PROPN, the rest NOUN; lemma is the lowercased word."""
+
+    def __init__(self):
+        self.calls: list = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return self.tag(text)
+
+    @staticmethod
+    def tag(text):
+        words = [
+            AdapterWord(w, w.lower(), "PROPN" if w[:1].isupper() else "NOUN")
+            for w in text.split()
+        ]
+        return AdapterDoc([AdapterSentence(words)])
+
+
+def _upos_counter(text, nlp, *, upos_targets, use_lemma=True, **kwargs):
+    doc = nlp(text)
+    return Counter(
+        (w.lemma if use_lemma else w.text)
+        for s in doc.sentences
+        for w in s.words
+        if w.upos in upos_targets
+    )
+
+
+
+class _BulkTaggingNLP(_TaggingNLP):
+    """_TaggingNLP with a bulk call that records its batch sizes."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches: list = []
+
+    def bulk_process(self, texts):
+        self.batches.append(len(texts))
+        return [self.tag(t) for t in texts]
+
+
+def _chunked_upos_counter(text, nlp, *, chunk_chars=200_000, **kwargs):
+    # pipeline calls cut like nlp_hooks.count_group cuts them
+    total = Counter()
+    for chunk in split_text_chunks(text, max_chars=chunk_chars):
+        if chunk.strip():
+            total.update(_upos_counter(chunk, nlp, **kwargs))
+    return total
+
+
+@pytest.mark.parametrize("annotation_tier", [False, True])
+def test_cache_misses_are_batched_across_files(tmp_path: Path, annotation_tier: bool) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    for i, text in enumerate(["rosa puella", "Roma rosa", "nauta", "puella puella", "Marcus rosa"]):
+        (data / f"{i}.txt").write_text(text + "\n", encoding="utf-8")
+
+    def cfg(out_dir: str, **extra) -> dict:
+        return {
+            "out_dir": out_dir,
+            "groups": {"g": {"files": [str(data / "*.txt")]}},
+            "lemma_cache": {"enabled": True, "dir": f".cache_{out_dir}", "annotation_tier": annotation_tier},
+            "batching": {"docs_per_batch": 2, "chunk_chars": 1000},
+            **extra,
+        }
+
+    def bulk(nlp, texts):
+        return nlp.bulk_process(texts)
+
+    split_calls: list = []
+
+    def splitter(text):
+        split_calls.append(text)
+        return SimpleNamespace(sentences=[SimpleNamespace(text=line) for line in text.splitlines()])
+
+    def run(cfg: dict, nlp, **kw) -> int:
+        return run_with_config(
+            tmp_path, cfg, _chunked_upos_counter, nlp=nlp, build_sentence_splitter_fn=lambda *a, **k: splitter, **kw
+        )
+
+    baseline = _BulkTaggingNLP()
+    assert run(cfg("unbatched"), baseline) == 0
+    assert len(baseline.calls) == 5 and baseline.batches == []
+
+    split_calls.clear()
+    nlp = _BulkTaggingNLP()
+    assert run(cfg("batched"), nlp, bulk_annotate_fn=bulk) == 0
+    assert nlp.calls == []
+    assert nlp.batches == [2, 2, 1]
+    # the texts prepared for the batches are not split a second time
+    assert len(split_calls) == 5
+    csv = (tmp_path / "batched" / "noun_frequency_g.csv").read_text(encoding="utf-8")
+    assert csv == (tmp_path / "unbatched" / "noun_frequency_g.csv").read_text(encoding="utf-8")
+
+    # warm run: only hits, nothing to annotate
+    assert run(cfg("batched"), nlp, bulk_annotate_fn=bulk) == 0
+    assert nlp.batches == [2, 2, 1]
+
+    if annotation_tier:
+        # the annotations recorded from the batches replay on a count-tier miss
+        changed = cfg("batched", filters={"upos_targets": ["NOUN", "PROPN"]})
+        assert run(changed, nlp, bulk_annotate_fn=bulk) == 0
+        assert nlp.calls == [] and nlp.batches == [2, 2, 1]
+        assert len(split_calls) == 5
+
+
+def test_annotation_tier_recounts_filter_changes_without_nlp(tmp_path: Path) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("Roma rosa rosa\n", encoding="utf-8")
+    (data / "b.txt").write_text("puella Marcus\n", encoding="utf-8")
+
+    nlp = _TaggingNLP()
+
+    def run(cfg: dict) -> dict:
+        assert run_with_config(tmp_path, cfg, _upos_counter, nlp=nlp) == 0
+        return read_run_meta(tmp_path)
+
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": [str(data / "*.txt")]}},
+        "lemma_cache": {"enabled": True, "annotation_tier": True},
+    }
+    meta = run(cfg)
+    assert len(nlp.calls) == 2
+    assert meta["lemma_cache"]["annotation_misses"] == 2
+    csv_lines = (tmp_path / "output" / "noun_frequency_g.csv").read_text(encoding="utf-8").splitlines()
+    assert csv_lines == ["lemma,count", "rosa,2", "puella,1"]
+
+    # a filter change misses the count tier but not the annotation tier
+    meta = run(dict(cfg, filters={"upos_targets": ["NOUN", "PROPN"]}))
+    assert len(nlp.calls) == 2
+    assert meta["lemma_cache"]["misses"] == 2
+    assert meta["lemma_cache"]["annotation_hits"] == 2
+    csv_lines = (tmp_path / "output" / "noun_frequency_g.csv").read_text(encoding="utf-8").splitlines()
+    assert csv_lines[:2] == ["lemma,count", "rosa,2"]
+    assert sorted(csv_lines[2:]) == ["marcus,1", "puella,1", "roma,1"]
+
+    # so does the analysis unit
+    run(dict(cfg, analysis_unit="surface"))
+    assert len(nlp.calls) == 2
+
+    # a normalization change alters the pipeline input: annotate again
+    run(dict(cfg, normalization={"casefold": True}))
+    assert len(nlp.calls) == 4
+
+
+def test_annotation_tier_replays_sentence_splits(tmp_path: Path) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("Roma rosa. Rosa puella.\n", encoding="utf-8")
+
+    nlp = _TaggingNLP()
+    split_calls: list = []
+
+    def splitter(text):
+        split_calls.append(text)
+        sentences = [s.strip() for s in text.split(".") if s.strip()]
+        return AdapterDoc([AdapterSentence([AdapterWord(w, w, "X") for w in s.split()]) for s in sentences])
+
+    def run(cfg: dict) -> dict:
+        assert run_with_config(
+            tmp_path, cfg, _upos_counter, nlp=nlp, build_sentence_splitter_fn=lambda *a, **k: splitter
+        ) == 0
+        return read_run_meta(tmp_path)
+
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": [str(data / "*.txt")]}},
+        "lemma_cache": {"enabled": True, "annotation_tier": True},
+        "sentence_split": {"reuse_tokens": True},
+    }
+    run(cfg)
+    assert len(split_calls) == 1
+    assert nlp.calls == ["Roma rosa\nRosa puella"]
+
+    meta = run(dict(cfg, filters={"upos_targets": ["NOUN", "PROPN"]}))
+    assert meta["lemma_cache"]["annotation_hits"] == 1
+    assert len(split_calls) == 1
+    assert len(nlp.calls) == 1
+    csv_lines = (tmp_path / "output" / "noun_frequency_g.csv").read_text(encoding="utf-8").splitlines()
+    assert sorted(csv_lines[1:]) == ["puella,1", "roma,1", "rosa,2"]
+
+
+def test_annotation_tier_is_collected_and_pruned(tmp_path: Path) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("Roma rosa rosa\n", encoding="utf-8")
+    (data / "b.txt").write_text("puella Marcus\n", encoding="utf-8")
+    cache_dir = tmp_path / ".lemma_cache"
+
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": [str(data / "*.txt")]}},
+        "lemma_cache": {"enabled": True, "annotation_tier": True},
+    }
+    assert run_with_config(tmp_path, cfg, _upos_counter, nlp=_TaggingNLP()) == 0
+    # new annotation hash: the annotations above are no longer in use
+    assert run_with_config(tmp_path, dict(cfg, normalization={"casefold": True}), _upos_counter, nlp=_TaggingNLP()) == 0
+    assert len(list((cache_dir / "annotations").rglob("*.ann"))) == 4
+
+    live = lc.live_config_hashes_from_run_meta([tmp_path / "output" / "run_meta.json"])
+    rep = lc.gc_cache(cache_dir, live_config_hashes=live)
+    assert (rep.removed_objects, rep.kept_objects) == (4, 4)
+    assert len(list((cache_dir / "annotations").rglob("*.ann"))) == 2
+
+    rep = lc.prune_cache(cache_dir, max_bytes=0)
+    assert rep.removed_objects == 4
+    assert not list((cache_dir / "annotations").rglob("*.ann"))
+
+
+def test_upos_targets_must_be_a_list(tmp_path: Path) -> None:
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": []}},
+        "filters": {"upos_targets": []},
+    }
+    with pytest.raises(ValueError, match="upos_targets"):
+        run_with_config(tmp_path, cfg, word_counter([]))
+
+
+def test_top_level_upos_targets(tmp_path: Path) -> None:
+    seen: list = []
+
+    def count_group_fn(text, nlp, **kwargs):
+        seen.append(kwargs["upos_targets"])
+        return Counter()
+
+    (tmp_path / "a.txt").write_text("rosa\n", encoding="utf-8")
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": [str(tmp_path / "a.txt")]}},
+        "upos_targets": ["NOUN", "propn"],
+    }
+    assert run_with_config(tmp_path, cfg, count_group_fn) == 0
+    assert run_with_config(tmp_path, dict(cfg, filters={"upos_targets": ["VERB"]}), count_group_fn) == 0
+    assert seen == [{"NOUN", "PROPN"}, {"VERB"}]
+
+
+def test_type_level_normalization_reuses_cached_counts(tmp_path: Path) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("vita uita Vita\n", encoding="utf-8")
+
+    cfg = {
+        "out_dir": "output",
+        "groups": {"g": {"files": [str(data / "*.txt")]}},
+        "lemma_cache": {"enabled": True},
+        "normalization": {"mode": "type", "map_u_v": False},
+    }
+    calls: list = []
+    assert run_with_config(tmp_path, cfg, word_counter(calls)) == 0
+    csv_lines = (tmp_path / "output" / "noun_frequency_g.csv").read_text(encoding="utf-8").splitlines()
+    assert csv_lines == ["lemma,count", "vita,2", "uita,1"]
+
+    # an orthographic change is applied to the cached keys, not the text
+    cfg["normalization"] = {"mode": "type", "map_u_v": True}
+    assert run_with_config(tmp_path, cfg, word_counter(calls)) == 0
+    assert len(calls) == 1
+    csv_lines = (tmp_path / "output" / "noun_frequency_g.csv").read_text(encoding="utf-8").splitlines()
+    assert csv_lines == ["lemma,count", "uita,3"]
+
+    meta = read_run_meta(tmp_path)
+    assert meta["normalization_mode"] == "type"
+    assert meta["key_normalization"]["merged"] == 1
+
+    # text mode normalizes before counting, so it needs its own objects
+    cfg["normalization"] = {"map_u_v": True}
+    assert run_with_config(tmp_path, cfg, word_counter(calls)) == 0
+    assert len(calls) == 2
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import os
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+import count_corpus_vocabula.runner as runner_mod
+from runner_helpers import read_run_meta, run_with_config
+
+
+# Module-level hooks: the process pool pickles them by reference.
+def build_pipeline_fn(language, stanza_package, cpu_only):
+    return {"pid": os.getpid()}, stanza_package
+
+
+def count_group_fn(text, nlp, **kwargs):
+    assert isinstance(nlp, dict)  # built inside the worker
+    return Counter(w.lower() for w in text.split())
+
+
+def _run(tmp_path: Path, cfg: dict) -> int:
+    return run_with_config(tmp_path, cfg, count_group_fn, build_pipeline_fn=build_pipeline_fn)
+
+
+def _make_corpus(tmp_path: Path) -> dict:
+    for d, texts in {"g1": ["rosa puella", "rosa"], "g2": ["deus", "deus angelus", "Rosa"]}.items():
+        (tmp_path / d).mkdir()
+        for i, t in enumerate(texts):
+            (tmp_path / d / f"{i}.txt").write_text(t + "\n", encoding="utf-8")
+    return {
+        "g1": {"files": [str(tmp_path / "g1" / "*.txt")]},
+        "g2": {"files": [str(tmp_path / "g2" / "*.txt")]},
+    }
+
+
+@pytest.mark.parametrize("unit", ["files", "groups"])
+def test_parallel_matches_serial(tmp_path: Path, unit: str) -> None:
+    groups = _make_corpus(tmp_path)
+
+    assert _run(tmp_path, {"out_dir": "serial", "groups": groups}) == 0
+    assert _run(
+        tmp_path,
+        {"out_dir": "parallel", "groups": groups, "parallel": {"workers": 2, "unit": unit}},
+    ) == 0
+
+    for name in ("noun_frequency_g1.csv", "noun_frequency_g2.csv"):
+        serial = (tmp_path / "serial" / name).read_text(encoding="utf-8")
+        parallel = (tmp_path / "parallel" / name).read_text(encoding="utf-8")
+        assert serial == parallel
+
+    assert (tmp_path / "parallel" / "noun_frequency_g2.csv").read_text(encoding="utf-8").splitlines() == [
+        "lemma,count",
+        "deus,2",
+        "angelus,1",
+        "rosa,1",
+    ]
+
+
+def test_parallel_rejects_trace(tmp_path: Path) -> None:
+    groups = _make_corpus(tmp_path)
+    with pytest.raises(ValueError, match="parallel"):
+        _run(
+            tmp_path,
+            {"out_dir": "o", "groups": groups, "parallel": {"workers": 2}, "trace": {"enabled": True}},
+        )
+
+
+def test_parallel_workers_hand_manifest_entries_to_parent(tmp_path: Path) -> None:
+    import json
+
+    groups = _make_corpus(tmp_path)
+    cfg = {
+        "out_dir": "output",
+        "groups": groups,
+        "parallel": {"workers": 2, "unit": "files"},
+        "lemma_cache": {"enabled": True, "manifest_key_mode": "relative"},
+    }
+    assert _run(tmp_path, cfg) == 0
+
+    manifest = json.loads((tmp_path / ".lemma_cache" / "manifest.json").read_text(encoding="utf-8"))
+    assert len([k for k in manifest if k != "__meta__"]) == 5
+
+    # counters of the worker sessions are merged into run_meta.json
+    meta = read_run_meta(tmp_path)
+    assert meta["lemma_cache"]["misses"] == 5
+    assert meta["lemma_cache"]["lock_acquisitions"] == 5
+    assert meta["lemma_cache"]["bytes_written"] > 0
+
+
+def test_parallel_workers_commit_sqlite_objects(tmp_path: Path) -> None:
+    groups = _make_corpus(tmp_path)
+    cfg = {
+        "out_dir": "output",
+        "groups": groups,
+        "parallel": {"workers": 2, "unit": "files"},
+        "lemma_cache": {"enabled": True, "object_store": "sqlite", "commit_every": 100},
+    }
+    assert _run(tmp_path, cfg) == 0
+
+    import sqlite3
+
+    with sqlite3.connect(str(tmp_path / ".lemma_cache" / "objects.sqlite")) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM objects").fetchone()[0] == 5
+
+
+def test_parallel_warm_run_sends_only_misses_to_workers(tmp_path: Path, monkeypatch) -> None:
+    groups = _make_corpus(tmp_path)
+    cfg = {
+        "out_dir": "output",
+        "groups": groups,
+        "parallel": {"workers": 2, "unit": "groups"},
+        "lemma_cache": {"enabled": True},
+    }
+    assert _run(tmp_path, cfg) == 0
+    cold = (tmp_path / "output" / "noun_frequency_g2.csv").read_text(encoding="utf-8")
+
+    # all hits: no process pool at all
+    def no_pool(*a, **k):
+        raise AssertionError("process pool started on a warm run")
+
+    monkeypatch.setattr(runner_mod, "ProcessPoolExecutor", no_pool)
+    assert _run(tmp_path, cfg) == 0
+    monkeypatch.undo()
+    assert (tmp_path / "output" / "noun_frequency_g2.csv").read_text(encoding="utf-8") == cold
+
+    # one changed file: a single task, although unit=groups
+    (tmp_path / "g2" / "0.txt").write_text("deus deus\n", encoding="utf-8")
+    submitted = []
+    real_pool = runner_mod.ProcessPoolExecutor
+
+    class RecordingPool(real_pool):
+        def map(self, fn, tasks):
+            tasks = list(tasks)
+            submitted.extend(tasks)
+            return super().map(fn, tasks)
+
+    monkeypatch.setattr(runner_mod, "ProcessPoolExecutor", RecordingPool)
+    assert _run(tmp_path, cfg) == 0
+    assert [(t.group, [f.name for f in t.files]) for t in submitted] == [("g2", ["0.txt"])]
+
+    meta = read_run_meta(tmp_path)
+    assert (meta["lemma_cache"]["hits"], meta["lemma_cache"]["misses"]) == (4, 1)
+    assert "deus,3" in (tmp_path / "output" / "noun_frequency_g2.csv").read_text(encoding="utf-8")
+
+
+_BUILT_PIDS: list = []
+
+
+def build_pipeline_recording_fn(language, stanza_package, cpu_only):
+    _BUILT_PIDS.append(os.getpid())
+    return build_pipeline_fn(language, stanza_package, cpu_only)
+
+
+def test_parallel_parent_builds_no_pipeline(tmp_path: Path) -> None:
+    groups = _make_corpus(tmp_path)
+    tables: list = []
+    config_path = tmp_path / "cfg.yml"
+    config_path.write_text("dummy", encoding="utf-8")
+    _BUILT_PIDS.clear()
+
+    assert runner_mod.run(
+        script_dir=tmp_path,
+        config_path=config_path,
+        load_config_fn=lambda _p: {"out_dir": "o", "groups": groups, "parallel": {"workers": 2}},
+        clean_mod=object(),
+        build_pipeline_fn=build_pipeline_recording_fn,
+        build_sentence_splitter_fn=None,
+        count_group_fn=count_group_fn,
+        render_stanza_package_table_fn=lambda nlp, pkg: tables.append((nlp, pkg)) or [],
+    ) == 0
+
+    # workers append to their own copy of the list
+    assert _BUILT_PIDS == []
+    assert tables == [(None, "perseus")]
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import csv
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from runner_helpers import run_with_config
+
+
+def _run(tmp_path: Path, cfg: dict, seen: dict) -> int:
+    def count_group_fn(text, nlp, **kwargs):
+        # minimal stand-in for count_nouns_streaming's detector handling
+        seen["text"] = text
+        detector = kwargs.get("ref_tag_detector")
+        counter = kwargs.get("ref_tag_counter")
+        out = Counter()
+        for tok in text.split():
+            tag = detector(tok) if detector is not None else ""
+            if tag:
+                counter[tag] += 1
+            else:
+                out[tok.strip(".")] += 1
+        return out
+
+    return run_with_config(tmp_path, cfg, count_group_fn)
+
+
+def _cfg(tmp_path: Path, mode: str) -> dict:
+    (tmp_path / "a.txt").write_text("rosa cap. 3 metaphysica lib. 12\n", encoding="utf-8")
+    (tmp_path / "ref_tags.txt").write_text(
+        "cap\tcap\nlib\tlib\\.\nmetaphys\tmetaphys\nnum\t\\b\\d+\\b\n", encoding="utf-8"
+    )
+    return {
+        "out_dir": "output",
+        "ref_tags": {"enabled": True, "patterns": "ref_tags.txt", "mode": mode},
+        "groups": {"g": {"files": [str(tmp_path / "a.txt")]}},
+    }
+
+
+def _ref_csv(tmp_path: Path) -> dict:
+    with (tmp_path / "output" / "ref_tags_g.csv").open(encoding="utf-8") as f:
+        return {row[0]: int(row[1]) for row in list(csv.reader(f))[1:]}
+
+
+def test_token_mode_classifies_literals_per_token(tmp_path: Path) -> None:
+    seen: dict = {}
+    assert _run(tmp_path, _cfg(tmp_path, "token"), seen) == 0
+
+    # regex-only entries are still stripped from the text; literals are not
+    assert "3" not in seen["text"].split()
+    assert "cap." in seen["text"]
+    # whole-token lookup leaves words that merely contain a tag alone
+    assert "metaphysica" in seen["text"]
+
+    assert _ref_csv(tmp_path) == {"cap": 1, "lib": 1, "num": 2}
+
+
+def test_regex_mode_is_default_behavior(tmp_path: Path) -> None:
+    seen: dict = {}
+    assert _run(tmp_path, _cfg(tmp_path, "regex"), seen) == 0
+
+    assert "cap" not in seen["text"]
+    assert _ref_csv(tmp_path) == {"cap": 1, "lib": 1, "metaphys": 1, "num": 2}
+
+
+def test_invalid_mode_raises(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="ref_tags.mode"):
+        _run(tmp_path, _cfg(tmp_path, "trie"), {})
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import csv
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from runner_helpers import run_with_config
+
+
+@dataclass
+class DummyToken:
+    text: str
+
+
+@dataclass
+class DummySentence:
+    text: str
+    tokens: list
+
+
+class DummySplitter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text: str):
+        self.calls += 1
+        return type("Doc", (), {"sentences": [
+            DummySentence("Puella rosam amat.", [DummyToken(t) for t in ["Puella", "rosam", "amat", "."]]),
+            DummySentence("Rosa pulchra est.", [DummyToken(t) for t in ["Rosa", "pulchra", "est", "."]]),
+        ]})()
+
+
+class TokenizingSplitter:
+    """Splits after '. ' before a capital and separates punctuation into tokens."""
+
+    def __call__(self, text: str):
+        sentences = []
+        for sent in re.split(r"(?<=\.)\s+(?=[A-Z])", text.strip()):
+            tokens = [DummyToken(t) for t in re.findall(r"\w+|[^\w\s]", sent)]
+            sentences.append(DummySentence(sent, tokens))
+        return type("Doc", (), {"sentences": sentences})()
+
+
+def _run(tmp_path: Path, cfg: dict, seen: dict, splitter: DummySplitter) -> int:
+    def build_pipeline_fn(language, stanza_package, cpu_only, **kwargs):
+        seen["pipeline_kwargs"] = kwargs
+        return object(), stanza_package
+
+    def count_group_fn(text, nlp, **kwargs):
+        seen["text"] = text
+        return Counter({"rosa": 1})
+
+    return run_with_config(
+        tmp_path,
+        cfg,
+        count_group_fn,
+        build_pipeline_fn=build_pipeline_fn,
+        build_sentence_splitter_fn=lambda *a, **k: splitter,
+    )
+
+
+def _cfg(tmp_path: Path, **extra) -> dict:
+    (tmp_path / "a.txt").write_text("Puella rosam amat. Rosa pulchra est.\n", encoding="utf-8")
+    return {"out_dir": "output", "groups": {"g": {"files": [str(tmp_path / "a.txt")]}}, **extra}
+
+
+def test_reuse_tokens_feeds_pretokenized_pipeline(tmp_path: Path) -> None:
+    seen: dict = {}
+    splitter = DummySplitter()
+    cfg = _cfg(tmp_path, sentence_split={"reuse_tokens": True})
+
+    assert _run(tmp_path, cfg, seen, splitter) == 0
+
+    assert seen["pipeline_kwargs"] == {"pretokenized": True}
+    assert seen["text"] == "Puella rosam amat .\nRosa pulchra est ."
+    assert splitter.calls == 1
+
+
+def test_default_keeps_sentence_text(tmp_path: Path) -> None:
+    seen: dict = {}
+    cfg = _cfg(tmp_path)
+
+    assert _run(tmp_path, cfg, seen, DummySplitter()) == 0
+
+    assert seen["pipeline_kwargs"] == {}
+    assert seen["text"] == "Puella rosam amat.\nRosa pulchra est."
+
+
+def test_splitter_uses_resolved_package(tmp_path: Path) -> None:
+    seen: dict = {}
+    splitter_kwargs: list = []
+
+    def build_splitter(language, **kwargs):
+        splitter_kwargs.append(kwargs)
+        return DummySplitter()
+
+    assert run_with_config(
+        tmp_path,
+        _cfg(tmp_path),
+        lambda text, nlp, **k: Counter(),
+        build_pipeline_fn=lambda *a, **k: (object(), "resolved"),
+        build_sentence_splitter_fn=build_splitter,
+    ) == 0
+    assert splitter_kwargs == [{"stanza_package": "resolved", "cpu_only": True}]
+
+
+def test_reuse_tokens_without_splitter_keeps_pipeline_tokenizer(tmp_path: Path) -> None:
+    built: list = []
+
+    def build_pipeline_fn(language, stanza_package, cpu_only, **kwargs):
+        built.append(kwargs)
+        return object(), stanza_package
+
+    def build_splitter(*a, **k):
+        raise RuntimeError("no splitter")
+
+    assert run_with_config(
+        tmp_path,
+        _cfg(tmp_path, sentence_split={"reuse_tokens": True}),
+        lambda text, nlp, **k: Counter(),
+        build_pipeline_fn=build_pipeline_fn,
+        build_sentence_splitter_fn=build_splitter,
+    ) == 0
+    assert built[-1] == {}
+
+
+def test_reuse_tokens_strips_ref_tags_before_splitting(tmp_path: Path) -> None:
+    results = {}
+    for reuse in (False, True):
+        root = tmp_path / str(reuse)
+        root.mkdir()
+        (root / "a.txt").write_text("Rosa cap. 3 pulchra est. Puella cap. 12 amat.\n", encoding="utf-8")
+        (root / "ref_tags.txt").write_text("cap\tcap\\. \\d+\n", encoding="utf-8")
+        cfg = {
+            "out_dir": "output",
+            "sentence_split": {"reuse_tokens": reuse},
+            "ref_tags": {"enabled": True, "patterns": "ref_tags.txt"},
+            "groups": {"g": {"files": [str(root / "a.txt")]}},
+        }
+        seen: dict = {}
+        assert _run(root, cfg, seen, TokenizingSplitter()) == 0
+        with (root / "output" / "ref_tags_g.csv").open(encoding="utf-8") as f:
+            refs = {row[0]: int(row[1]) for row in list(csv.reader(f))[1:]}
+        words = re.findall(r"\w+", seen["text"])
+        results[reuse] = (refs, words)
+
+    assert results[True] == results[False]
+    assert results[True][0] == {"cap": 2}
+    assert "cap" not in results[True][1]
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import count_corpus_vocabula.runner as runner_mod
+from runner_helpers import run_with_config, word_counter
+
+
+def test_streaming_input_matches_concatenated_counts(tmp_path: Path, monkeypatch) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("rosa puella\n\n" * 50, encoding="utf-8")
+    (data / "b.txt").write_text("deus\n", encoding="utf-8")
+    groups = {"g": {"files": [str(data / "*.txt")]}}
+
+    calls: list = []
+    assert run_with_config(tmp_path, {"out_dir": "whole", "groups": groups}, word_counter(calls)) == 0
+
+    def no_concat(files):
+        raise AssertionError("streaming input must not concatenate the group")
+
+    monkeypatch.setattr(runner_mod, "read_concat", no_concat)
+    calls.clear()
+    cfg = {"out_dir": "stream", "groups": groups, "input": {"streaming": True, "chunk_chars": 100}}
+    assert run_with_config(tmp_path, cfg, word_counter(calls)) == 0
+
+    assert len(calls) > 2
+    assert max(len(t) for t in calls) < 200
+    assert (tmp_path / "stream" / "noun_frequency_g.csv").read_text(encoding="utf-8") == (
+        tmp_path / "whole" / "noun_frequency_g.csv"
+    ).read_text(encoding="utf-8")
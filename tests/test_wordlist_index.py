@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import count_corpus_vocabula.wordlist_index as wi
+
+
+def _wordlist(tmp_path: Path, text: str = "rosa\n puella \n\nDeus\n") -> Path:
+    p = tmp_path / "words.txt"
+    p.write_text(text, encoding="utf-8")
+    return p
+
+
+def test_without_index_dir_builds_every_time(tmp_path: Path) -> None:
+    wl = _wordlist(tmp_path)
+    assert wi.load_wordlist_index(wl, index_dir=None) == frozenset({"rosa", "puella", "Deus"})
+    assert not any(tmp_path.glob("**/*.json"))
+
+
+def test_index_is_written_then_reused(tmp_path: Path) -> None:
+    wl = _wordlist(tmp_path)
+    idx = tmp_path / "idx"
+    calls = []
+
+    def build(p: Path):
+        calls.append(p)
+        return (w.lower() for w in wi.read_wordlist_lines(p))
+
+    first = wi.load_wordlist_index(wl, index_dir=idx, variant="lower", build_keys=build)
+    second = wi.load_wordlist_index(wl, index_dir=idx, variant="lower", build_keys=build)
+
+    assert first == second == frozenset({"rosa", "puella", "deus"})
+    assert len(calls) == 1
+    assert len(list(idx.glob("*.json"))) == 1
+
+
+def test_index_keyed_by_variant_and_content(tmp_path: Path) -> None:
+    wl = _wordlist(tmp_path)
+    idx = tmp_path / "idx"
+
+    plain = wi.load_wordlist_index(wl, index_dir=idx)
+    lower = wi.load_wordlist_index(
+        wl, index_dir=idx, variant="lower",
+        build_keys=lambda p: (w.lower() for w in wi.read_wordlist_lines(p)),
+    )
+    assert "Deus" in plain and "deus" in lower
+
+    wl.write_text("angelus\n", encoding="utf-8")
+    assert wi.load_wordlist_index(wl, index_dir=idx) == frozenset({"angelus"})
+
+
+def test_corrupt_index_is_rebuilt(tmp_path: Path) -> None:
+    wl = _wordlist(tmp_path)
+    idx = tmp_path / "idx"
+    wi.load_wordlist_index(wl, index_dir=idx)
+
+    (path,) = idx.glob("*.json")
+    path.write_bytes(b"not json")
+    assert wi.load_wordlist_index(wl, index_dir=idx) == frozenset({"rosa", "puella", "Deus"})
+    assert json.loads(path.read_text(encoding="utf-8"))["version"] == wi.INDEX_VERSION
+
+
+def test_index_with_wrong_shape_is_rebuilt(tmp_path: Path) -> None:
+    wl = _wordlist(tmp_path)
+    idx = tmp_path / "idx"
+    wi.load_wordlist_index(wl, index_dir=idx)
+
+    (path,) = idx.glob("*.json")
+    obj = json.loads(path.read_text(encoding="utf-8"))
+    obj["keys"] = {"rosa": 1}
+    path.write_text(json.dumps(obj), encoding="utf-8")
+    assert wi.load_wordlist_index(wl, index_dir=idx) == frozenset({"rosa", "puella", "Deus"})